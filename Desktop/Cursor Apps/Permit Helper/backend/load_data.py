@@ -0,0 +1,336 @@
+"""
+Bulk loader for crawler output
+
+Streams the CSV, JSON and JSON Lines files written by the crawlers in
+web_scraping_projects/permit_scraper into the database tables in
+models/database.py, which DatabaseOfficeScraper serves through the API.
+
+Records are validated and normalized as they are read and upserted on id in
+fixed-size batches, so memory use stays constant however large the files are.
+PostgreSQL batches are loaded with COPY; other databases use executemany.
+
+Usage:
+    python load_data.py ../web_scraping_projects/permit_scraper/output
+    python load_data.py output/atlanta_permit_fees.csv --database-url postgresql://localhost/permits
+"""
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+
+from models.database import TABLES, get_engine
+
+logger = logging.getLogger(__name__)
+
+FILE_EXTENSIONS = (".csv", ".json", ".jsonl")
+DATASET_PATTERN = re.compile(r"(offices|fees|forms)", re.I)
+
+REQUIRED_FIELDS = {
+    "offices": ("id", "name"),
+    "fees": ("id", "name"),
+    "forms": ("id", "title"),
+}
+
+# CSV files can be far wider than the default field size limit allows
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def iter_json_array(f, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array one at a time without reading the whole file
+    
+    Args:
+        f: A text file positioned at the array
+        chunk_size (int): Characters read at a time
+    
+    Returns:
+        Iterator: The array elements
+    """
+    decoder = json.JSONDecoder()
+    buffer = f.read(chunk_size).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("Expected a JSON array")
+    position = 1
+    eof = False
+    
+    while True:
+        # Skip whitespace and separators between elements
+        while position < len(buffer) and (buffer[position].isspace() or buffer[position] == ","):
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            # The element continues in the next chunk
+            if eof:
+                raise ValueError("Truncated JSON array")
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        
+        yield value
+        position = end
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the records of a crawler output file
+    
+    Args:
+        path (str): A .csv, .json or .jsonl file
+    
+    Returns:
+        Iterator: The records as dictionaries
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        elif path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for record in iter_json_array(f):
+                if isinstance(record, dict):
+                    yield record
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    # Collapse runs of whitespace
+    return " ".join(str(value).split()) or None
+
+
+def _float(value: Any) -> Optional[float]:
+    if value is None or value == "":
+        return None
+    try:
+        return float(str(value).replace("$", "").replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _int(value: Any) -> Optional[int]:
+    number = _float(value)
+    return int(number) if number is not None else None
+
+
+def _phone(value: Any) -> Optional[str]:
+    text = _text(value)
+    if text is None:
+        return None
+    digits = re.sub(r"\D", "", text)
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    if len(digits) == 10:
+        return f"({digits[:3]}) {digits[3:6]}-{digits[6:]}"
+    return text
+
+
+_CONVERTERS: Dict[str, List[Tuple[str, Any]]] = {}
+
+
+def _converters(table: Table) -> List[Tuple[str, Any]]:
+    if table.name not in _CONVERTERS:
+        types = {float: _float, int: _int}
+        _CONVERTERS[table.name] = [
+            (column.name, types.get(column.type.python_type, _text)) for column in table.columns
+        ]
+    return _CONVERTERS[table.name]
+
+
+def normalize(dataset: str, record: Dict[str, Any], table: Table) -> Optional[Dict[str, Any]]:
+    """
+    Validate and normalize one record
+    
+    Args:
+        dataset (str): "offices", "fees" or "forms"
+        record (dict): The record as read from the file
+        table (Table): The table the record is loaded into
+    
+    Returns:
+        dict: The row, with every column of the table, or None if the record is invalid
+    """
+    row = {name: convert(record.get(name)) for name, convert in _converters(table)}
+    
+    if any(row[field] is None for field in REQUIRED_FIELDS[dataset]):
+        return None
+    
+    if dataset == "offices":
+        if row["state"]:
+            row["state"] = row["state"].upper()
+        if row["zip"]:
+            match = re.search(r"\d{5}(?:-\d{4})?", row["zip"])
+            row["zip"] = match.group(0) if match else None
+        if row["email"]:
+            row["email"] = row["email"].lower()
+        row["phone"] = _phone(row["phone"])
+    
+    return row
+
+
+def _batches(rows: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = {}
+    for row in rows:
+        # A record can appear in several files; the last copy wins
+        batch[row["id"]] = row
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def _upsert_executemany(connection, table: Table, rows: List[Dict[str, Any]]) -> None:
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        # No portable upsert; replace the rows instead
+        connection.execute(table.delete().where(table.c.id.in_([row["id"] for row in rows])))
+        connection.execute(table.insert(), rows)
+        return
+    
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={column.name: statement.excluded[column.name] for column in table.columns if column.name != "id"}
+    )
+    connection.execute(statement, rows)
+
+
+def _upsert_copy(connection, table: Table, rows: List[Dict[str, Any]]) -> None:
+    columns = [column.name for column in table.columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["\\N" if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    
+    staging = f"{table.name}_staging"
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "id")
+    cursor = connection.connection.driver_connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} (LIKE {table.name}) ON COMMIT DELETE ROWS")
+        cursor.copy_expert(f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+        cursor.execute(
+            f"INSERT INTO {table.name} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {staging} "
+            f"ON CONFLICT (id) DO UPDATE SET {updates}"
+        )
+    finally:
+        cursor.close()
+
+
+def load_file(engine: Engine, path: str, dataset: Optional[str] = None, batch_size: int = 5000) -> Tuple[int, int]:
+    """
+    Load one crawler output file
+    
+    Args:
+        engine (Engine): The database engine
+        path (str): The file to load
+        dataset (str, optional): "offices", "fees" or "forms"; guessed from the file name by default
+        batch_size (int): Rows upserted per transaction
+    
+    Returns:
+        tuple: The number of rows loaded and the number of invalid records skipped
+    """
+    if dataset is None:
+        match = DATASET_PATTERN.search(os.path.basename(path))
+        if not match:
+            raise ValueError(f"Cannot tell whether {path} holds offices, fees or forms; pass --dataset")
+        dataset = match.group(1).lower()
+    table = TABLES[dataset]
+    
+    skipped = 0
+    
+    def rows():
+        nonlocal skipped
+        for record in iter_records(path):
+            row = normalize(dataset, record, table)
+            if row is None:
+                skipped += 1
+            else:
+                yield row
+    
+    upsert = _upsert_copy if engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2" else _upsert_executemany
+    loaded = 0
+    for batch in _batches(rows(), batch_size):
+        with engine.begin() as connection:
+            upsert(connection, table, batch)
+        loaded += len(batch)
+    
+    return loaded, skipped
+
+
+def find_files(paths: List[str]) -> List[str]:
+    """
+    Expand directories into the crawler output files they contain
+    
+    Args:
+        paths (list): Files and directories
+    
+    Returns:
+        list: The files to load
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(FILE_EXTENSIONS) and DATASET_PATTERN.search(name):
+                    files.append(os.path.join(path, name))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    """Load crawler output files into the database"""
+    load_dotenv()
+    
+    parser = argparse.ArgumentParser(description="Load crawler output into the PermitHelper database")
+    parser.add_argument("paths", nargs="+", help="Output files, or directories to load every output file from")
+    parser.add_argument("--database-url", help="The database URL (default: DATABASE_URL or sqlite:///permit_helper.db)")
+    parser.add_argument("--dataset", choices=sorted(TABLES), help="Load every file as this dataset")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows upserted per transaction (default: 5000)")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    engine = get_engine(args.database_url)
+    total = 0
+    start = time.perf_counter()
+    
+    for path in find_files(args.paths):
+        file_start = time.perf_counter()
+        try:
+            loaded, skipped = load_file(engine, path, args.dataset, args.batch_size)
+        except (OSError, ValueError) as e:
+            logger.error(f"Skipping {path}: {str(e)}")
+            continue
+        total += loaded
+        logger.info(f"Loaded {loaded} rows from {path} ({skipped} invalid records skipped) in {time.perf_counter() - file_start:.1f}s")
+    
+    elapsed = time.perf_counter() - start
+    logger.info(f"Loaded {total} rows in {elapsed:.1f}s ({total / (elapsed or 1e-9):.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,19 @@
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import logging
 import abc
 from typing import List, Optional, Dict, Any
 
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from models.database import fees_table, forms_table, get_database_url, get_engine, offices_table
+from utils.browser import create_driver
+
 class OfficeScraper(abc.ABC):
     """Base class for permit office scrapers"""
     
@@ -78,15 +80,8 @@ class OfficeScraper(abc.ABC):
     
     def _setup_selenium(self):
         """Set up Selenium WebDriver"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        return driver
+        # Lean headless profile; see utils/browser.py
+        return create_driver()
 
 
 class SanFranciscoOfficeScraper(OfficeScraper):
@@ -477,9 +472,82 @@ class DefaultOfficeScraper(OfficeScraper):
         ]
 
 
+class DatabaseOfficeScraper(OfficeScraper):
+    """Serves offices, fees and forms loaded from the crawlers' output (see load_data.py)"""
+    
+    def __init__(self):
+        super().__init__()
+        self.engine = get_engine()
+    
+    @staticmethod
+    def has_city(city: str, state: str) -> bool:
+        """Check whether the database has offices for a city"""
+        query = select(offices_table.c.id).where(
+            func.lower(offices_table.c.city) == city.lower(),
+            func.lower(offices_table.c.state) == state.lower()
+        ).limit(1)
+        with get_engine().connect() as connection:
+            return connection.execute(query).first() is not None
+    
+    @staticmethod
+    def has_office(office_id: str) -> bool:
+        """Check whether the database has an office"""
+        query = select(offices_table.c.id).where(offices_table.c.id == office_id)
+        with get_engine().connect() as connection:
+            return connection.execute(query).first() is not None
+    
+    def _fetch(self, query) -> List[Dict[str, Any]]:
+        with self.engine.connect() as connection:
+            # Leave out columns the crawlers did not fill in
+            return [
+                {key: value for key, value in row._mapping.items() if value is not None}
+                for row in connection.execute(query)
+            ]
+    
+    def get_offices(self, address: str, city: Optional[str] = None, state: Optional[str] = None, radius: float = 25.0) -> List[Dict[str, Any]]:
+        self.logger.info(f"Looking up permit offices in the database for address: {address}")
+        
+        query = select(offices_table).order_by(offices_table.c.name)
+        if city:
+            query = query.where(func.lower(offices_table.c.city) == city.lower())
+        if state:
+            query = query.where(func.lower(offices_table.c.state) == state.lower())
+        return self._fetch(query)
+    
+    def get_fees(self, office_id: str, permit_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        self.logger.info(f"Looking up permit fees in the database for office: {office_id}, permit type: {permit_type}")
+        
+        query = select(fees_table).where(fees_table.c.office_id == office_id).order_by(fees_table.c.id)
+        if permit_type:
+            query = query.where(func.lower(fees_table.c.permit_type) == permit_type.lower())
+        return self._fetch(query)
+    
+    def get_instructions(self, office_id: str, permit_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        # The crawlers do not collect application instructions yet
+        return []
+    
+    def get_forms(self, office_id: str, permit_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        self.logger.info(f"Looking up permit forms in the database for office: {office_id}, permit type: {permit_type}")
+        
+        query = select(forms_table).where(forms_table.c.office_id == office_id).order_by(forms_table.c.id)
+        if permit_type:
+            query = query.where(func.lower(forms_table.c.permit_type) == permit_type.lower())
+        return self._fetch(query)
+
+
 class OfficeScraperFactory:
     """Factory for creating permit office scrapers"""
     
+    @staticmethod
+    def _database_has(check, *args) -> bool:
+        """Run a DatabaseOfficeScraper check, treating an unusable database as empty"""
+        try:
+            return check(*args)
+        except (SQLAlchemyError, ImportError) as e:
+            # A bad DATABASE_URL or missing driver must not break the built-in scrapers
+            logging.getLogger(__name__).warning(f"Skipping the crawled-data database: {e}")
+            return False
+    
     def create_scraper(self, city: Optional[str] = None, state: Optional[str] = None) -> OfficeScraper:
         """
         Create a scraper based on city and state
@@ -493,6 +561,10 @@ class OfficeScraperFactory:
         """
         if not city or not state:
             return DefaultOfficeScraper()
+        
+        # Crawled data takes precedence over the built-in scrapers
+        if get_database_url() and self._database_has(DatabaseOfficeScraper.has_city, city, state):
+            return DatabaseOfficeScraper()
             
         city = city.lower()
         state = state.lower()
@@ -514,6 +586,9 @@ class OfficeScraperFactory:
         Returns:
             OfficeScraper: An appropriate scraper for the office
         """
+        if get_database_url() and self._database_has(DatabaseOfficeScraper.has_office, office_id):
+            return DatabaseOfficeScraper()
+        
         if office_id.startswith("sf-"):
             return SanFranciscoOfficeScraper()
         elif office_id.startswith("nyc-"):
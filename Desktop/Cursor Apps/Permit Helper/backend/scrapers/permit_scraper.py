@@ -1,15 +1,13 @@
 import requests
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 import time
 import logging
 
+from utils.browser import create_driver
+
 class PermitScraper:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
@@ -137,12 +135,5 @@ class PermitScraper:
     
     def _setup_selenium(self):
         """Set up Selenium WebDriver"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        return driver 
\ No newline at end of file
+        # Lean headless profile; see utils/browser.py
+        return create_driver()  
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Chrome WebDriver for the scrapers.
+
+The scrapers only read text, so by default Chrome starts with a lean profile:
+images, fonts, audio, video and known ad and analytics hosts are blocked
+through the DevTools Network.setBlockedURLs command, features a scraper never
+uses (sync, extensions, translation, background networking) are turned off,
+and pages load with the "eager" strategy, so driver.get returns once the
+document is parsed.
+
+Settings are read from the environment:
+
+- SELENIUM_LEAN_PROFILE: "false" to start a full browser instead (default true)
+- SELENIUM_PAGE_LOAD_STRATEGY: "normal", "eager" or "none" (default eager for
+  the lean profile, normal otherwise)
+"""
+
+import logging
+import os
+from typing import Iterable, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "bmp", "ico", "svg",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mov", "avi", "mp3", "m4a", "ogg", "wav",
+)
+
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "googleadservices.com",
+    "doubleclick.net", "facebook.net", "hotjar.com", "clarity.ms",
+    "newrelic.com", "nr-data.net", "segment.io", "segment.com", "mixpanel.com", "fullstory.com",
+    "quantserve.com", "scorecardresearch.com", "adnxs.com", "siteimproveanalytics.com",
+    "addthis.com", "sharethis.com", "monsido.com", "crazyegg.com",
+)
+
+# Extensions match with or without a query string; hosts match with any subdomain
+BLOCKED_URL_PATTERNS = (
+    [f"*.{extension}" for extension in BLOCKED_EXTENSIONS]
+    + [f"*.{extension}?*" for extension in BLOCKED_EXTENSIONS]
+    + [f"*://*{host}/*" for host in BLOCKED_HOSTS]
+)
+
+LEAN_ARGUMENTS = (
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--disable-breakpad",
+    "--disable-notifications",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--blink-settings=imagesEnabled=false",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+)
+
+
+def lean_profile_enabled() -> bool:
+    """Whether drivers use the lean profile"""
+    return os.environ.get("SELENIUM_LEAN_PROFILE", "true").lower() != "false"
+
+
+def chrome_options(lean: bool = True, page_load_strategy: Optional[str] = None) -> Options:
+    """
+    Build headless Chrome options
+    
+    Args:
+        lean: Use the lean profile instead of a full browser
+        page_load_strategy: "normal", "eager" or "none"
+    
+    Returns:
+        Options: The Chrome options
+    """
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    
+    page_load_strategy = page_load_strategy or os.environ.get("SELENIUM_PAGE_LOAD_STRATEGY")
+    if lean:
+        options.add_argument("--window-size=1366,768")
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        options.page_load_strategy = page_load_strategy or "eager"
+    else:
+        options.page_load_strategy = page_load_strategy or "normal"
+    
+    return options
+
+
+def block_resources(driver: webdriver.Chrome, patterns: Iterable[str] = BLOCKED_URL_PATTERNS) -> None:
+    """Block requests matching URL patterns in the driver's current tab"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def create_driver(lean: Optional[bool] = None, page_load_strategy: Optional[str] = None) -> webdriver.Chrome:
+    """
+    Start a headless Chrome WebDriver
+    
+    Args:
+        lean: Use the lean profile; defaults to SELENIUM_LEAN_PROFILE
+        page_load_strategy: "normal", "eager" or "none"
+    
+    Returns:
+        webdriver.Chrome: The driver
+    """
+    if lean is None:
+        lean = lean_profile_enabled()
+    
+    service = Service(ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=chrome_options(lean, page_load_strategy))
+    if lean:
+        block_resources(driver)
+    logger.info(f"Started Chrome with the {'lean' if lean else 'full'} profile")
+    return driver
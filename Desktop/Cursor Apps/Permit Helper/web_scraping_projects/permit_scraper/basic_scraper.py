@@ -8,15 +8,24 @@ using requests and BeautifulSoup.
 
 import requests
 from bs4 import BeautifulSoup
-import pandas as pd
 import os
 import logging
 import re
-import json
 import time
 import random
+import argparse
+import hashlib
 from datetime import datetime
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
+
+from checkpoint import CrawlJournal
+from extraction_cache import ExtractionCache
+from fee_tables import extract_fee_rows
+from frontier import CrawlFrontier, link_priority
+from crawl_state import CrawlState, ChangeLog
+from columnar import ColumnarWriter, COLUMNAR_FORMATS
+import transport
+from writers import RecordSink, OFFICE_FIELDS, FEE_FIELDS, FILE_EXTENSIONS, concat_files, parse_formats, remove_stale_tmp_files, write_csv, write_json
 
 # Set up logging
 logging.basicConfig(
@@ -32,6 +41,10 @@ logger = logging.getLogger(__name__)
 class PermitOfficeScraper:
     """A basic scraper for permit office information."""
     
+    # Bump this whenever the extraction logic changes so that cached
+    # extraction results from older versions are ignored
+    EXTRACTOR_VERSION = "2"
+    
     # Define city configurations
     CITY_CONFIGS = {
         "atlanta": {
@@ -81,12 +94,23 @@ class PermitOfficeScraper:
         }
     }
     
-    def __init__(self, city="atlanta"):
+    def __init__(self, city="atlanta", crawl_state=None, journal=None, cache_dir="cache",
+                 request_delay=(1, 3), url_rewriter=None):
         """
         Initialize the scraper with a city.
         
         Args:
             city (str): The city to scrape permit offices for.
+            crawl_state (CrawlState, optional): State from previous crawls. When
+                given, cached pages are revalidated with conditional requests
+                instead of being trusted for a day.
+            journal (CrawlJournal, optional): Checkpoint journal of the current
+                crawl. Pages it lists as fetched are always read from the cache.
+            cache_dir (str): Directory for cached pages and extraction results.
+            request_delay (tuple): Bounds of the random delay before each request, in seconds.
+            url_rewriter (callable, optional): Maps each URL to the one actually
+                requested, e.g. to send requests to a local replay server.
+                Cache keys and records still use the original URL.
         """
         self.city = city.lower().replace(" ", "_")
         
@@ -97,18 +121,29 @@ class PermitOfficeScraper:
         
         self.config = self.CITY_CONFIGS[self.city]
         self.base_url = self.config["base_url"]
+        self.crawl_state = crawl_state
+        self.journal = journal
+        self.cache_dir = cache_dir
+        self.request_delay = request_delay
+        self.url_rewriter = url_rewriter
         
-        # Set up session with headers
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': self.base_url
-        })
+        # All scrapers in the process share one pooled session, so
+        # connections to the same host are reused across cities. Headers
+        # specific to this city are sent with each request instead.
+        self.session = transport.get_session()
+        self.headers = {'Referer': self.base_url}
         
         # Create cache directory
-        os.makedirs("cache", exist_ok=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        
+        # Structured extraction results, keyed by page content hash
+        self.extraction_cache = ExtractionCache(os.path.join(self.cache_dir, "extracted"), self.EXTRACTOR_VERSION)
+        
+        # Page and parse counters, used to report crawl throughput
+        self.stats = {
+            "requests": 0, "not_modified": 0, "cache_hits": 0, "bytes": 0,
+            "parsed_pages": 0, "parse_seconds": 0.0
+        }
         
         logger.info(f"Initialized scraper for {self.city} ({self.base_url})")
     
@@ -123,134 +158,148 @@ class PermitOfficeScraper:
         Returns:
             BeautifulSoup: The parsed HTML.
         """
+        return BeautifulSoup(self._fetch_html(url, cache_key), 'html.parser')
+    
+    def _fetch_html(self, url, cache_key=None):
+        """
+        Get the raw HTML of a page from cache or make a request.
+        
+        Args:
+            url (str): The URL to request.
+            cache_key (str, optional): The cache key. If None, the URL will be used.
+            
+        Returns:
+            str: The page HTML.
+        """
         if cache_key is None:
             cache_key = url.replace("/", "_").replace(":", "_").replace(".", "_")
         
-        cache_file = f"cache/{cache_key}.html"
+        cache_file = os.path.join(self.cache_dir, f"{cache_key}.html")
         
-        # Check if cache exists and is less than 1 day old
-        if os.path.exists(cache_file) and (datetime.now().timestamp() - os.path.getmtime(cache_file)) < 86400:
+        # Pages fetched before a crawl was interrupted are reused as they are
+        resumed = self.journal is not None and self.journal.is_url_done(url) and os.path.exists(cache_file)
+        
+        # Check if cache exists and is less than 1 day old. In incremental mode
+        # cached pages are always revalidated so that changes are picked up.
+        if resumed or (self.crawl_state is None and os.path.exists(cache_file) and (datetime.now().timestamp() - os.path.getmtime(cache_file)) < 86400):
             logger.info(f"Loading from cache: {cache_file}")
             with open(cache_file, "r", encoding="utf-8") as f:
                 html = f.read()
+            self.stats["cache_hits"] += 1
+            
+            if resumed and self.crawl_state is not None:
+                self.crawl_state.record_page(url, html)
         else:
+            headers = dict(self.headers)
+            if self.crawl_state is not None and os.path.exists(cache_file):
+                headers.update(self.crawl_state.conditional_headers(url))
+            
             logger.info(f"Requesting: {url}")
             # Add a random delay to avoid being blocked
-            time.sleep(random.uniform(1, 3))
-            response = self.session.get(url)
-            response.raise_for_status()
-            html = response.text
+            if self.request_delay[1] > 0:
+                time.sleep(random.uniform(*self.request_delay))
+            request_url = self.url_rewriter(url) if self.url_rewriter else url
+            response = self.session.get(request_url, headers=headers)
+            self.stats["requests"] += 1
+            
+            if response.status_code == 304:
+                logger.info(f"Not modified, using cache: {cache_file}")
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    html = f.read()
+                os.utime(cache_file)
+                response_headers = None  # Keep the validators we already have
+                self.stats["not_modified"] += 1
+            else:
+                response.raise_for_status()
+                html = response.text
+                response_headers = response.headers
+                
+                # Save to cache. Several crawler processes may share the cache,
+                # so write to a temporary file and move it into place.
+                tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    f.write(html)
+                os.replace(tmp_file, cache_file)
+            
+            if self.crawl_state is not None:
+                self.crawl_state.record_page(url, html, response_headers)
+            if self.journal is not None:
+                self.journal.url_done(url)
+        
+        self.stats["bytes"] += len(html)
+        return html
+    
+    def _extract(self, kind, html, extract_func):
+        """
+        Run an extractor through the extraction cache, timing the parses that miss it.
+        
+        Args:
+            kind (str): The kind of extraction.
+            html (str): The raw page content.
+            extract_func (callable): Called with no arguments on a cache miss.
             
-            # Save to cache
-            with open(cache_file, "w", encoding="utf-8") as f:
-                f.write(html)
+        Returns:
+            Any: The cached or freshly extracted result.
+        """
+        def timed_extract():
+            start = time.perf_counter()
+            try:
+                return extract_func()
+            finally:
+                self.stats["parse_seconds"] += time.perf_counter() - start
+                self.stats["parsed_pages"] += 1
         
-        return BeautifulSoup(html, 'html.parser')
+        return self.extraction_cache.get_or_extract(kind, html, timed_extract)
     
-    def get_permit_offices(self):
+    def page_cache_key(self, url):
+        """
+        Get the cache key of a page found by a deep crawl.
+        
+        Args:
+            url (str): The canonical page URL.
+            
+        Returns:
+            str: The cache key.
+        """
+        return f"{self.city}_page_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]}"
+    
+    def get_permit_offices(self, max_depth=0, max_pages=200):
         """
         Scrape permit office information from the website.
         
+        Args:
+            max_depth (int): How many links deep to crawl from the permit page.
+                With 0, only the permit page itself is read.
+            max_pages (int): The most pages to fetch in a deep crawl.
+            
         Returns:
             list: A list of dictionaries containing permit office information.
         """
         logger.info(f"Fetching permit office information for {self.city}")
         
         try:
-            # Get the permit page
             permit_page_url = urljoin(self.base_url, self.config["permit_page"])
-            soup = self._get_cached_or_request(permit_page_url, f"{self.city}_permit_page")
-            
-            # Find the offices section using the city-specific selectors
-            offices = []
             
-            # Try each selector in order
-            for selector in self.config["department_selectors"]:
-                if selector["type"] == "div" and "class" in selector:
-                    departments = soup.find_all('div', class_=selector["class"])
-                elif selector["type"] == "a" and "href_pattern" in selector:
-                    departments = soup.find_all('a', href=re.compile(selector["href_pattern"]))
-                else:
-                    continue
+            if max_depth > 0:
+                offices = self._crawl_offices(permit_page_url, max_depth, max_pages)
+            else:
+                # Get the permit page
+                html = self._fetch_html(permit_page_url, f"{self.city}_permit_page")
                 
-                if departments:
-                    break
+                # Extract the offices, skipping the parse if this page was seen before.
+                # Office IDs and URLs depend on the city, so it is part of the key.
+                offices = self._extract(
+                    f"{self.city}_offices", html, lambda: self._extract_offices(BeautifulSoup(html, 'html.parser'))
+                )
             
-            # Process found departments
-            for dept in departments:
-                office = {}
-                
-                # Try to extract department name
-                name_elem = dept.find('h3') or dept.find('h2') or dept.find('h4') or dept
-                if name_elem:
-                    office["name"] = name_elem.get_text().strip()
-                else:
-                    continue  # Skip if we can't find a name
-                
-                # Generate an ID from the name
-                city_prefix = self.city.split("_")[0]
-                office["id"] = f"{city_prefix}-" + re.sub(r'[^a-z0-9]', '-', office["name"].lower())
-                
-                # Try to extract URL
-                url_elem = dept if dept.name == 'a' else dept.find('a')
-                if url_elem and url_elem.has_attr('href'):
-                    href = url_elem['href']
-                    if href.startswith('/'):
-                        office["website"] = urljoin(self.base_url, href)
-                    else:
-                        office["website"] = href
-                
-                # Set default values for city and state
-                if self.city == "san_francisco":
-                    office["city"] = "San Francisco"
-                    office["state"] = "CA"
-                elif self.city == "new_york":
-                    office["city"] = "New York"
-                    office["state"] = "NY"
-                elif self.city == "los_angeles":
-                    office["city"] = "Los Angeles"
-                    office["state"] = "CA"
-                elif self.city == "chicago":
-                    office["city"] = "Chicago"
-                    office["state"] = "IL"
-                elif self.city == "atlanta":
-                    office["city"] = "Atlanta"
-                    office["state"] = "GA"
-                
-                # If we have a website, try to get more details
+            # If we have a website, try to get more details
+            for office in offices:
                 if "website" in office:
                     try:
                         dept_details = self._get_department_details(office["website"], office["id"])
                         office.update(dept_details)
                     except Exception as e:
                         logger.warning(f"Error getting details for {office['name']}: {str(e)}")
-                
-                offices.append(office)
-            
-            # If we couldn't find any offices using the above methods,
-            # let's try a more general approach
-            if not offices:
-                # Look for any links that might be related to permits or departments
-                permit_links = soup.find_all('a', string=re.compile(r'permit|department|building|planning|inspection', re.I))
-                
-                for link in permit_links:
-                    office = {
-                        "name": link.get_text().strip(),
-                        "id": f"{city_prefix}-" + re.sub(r'[^a-z0-9]', '-', link.get_text().strip().lower()),
-                        "city": office.get("city", ""),
-                        "state": office.get("state", "")
-                    }
-                    
-                    if link.has_attr('href'):
-                        href = link['href']
-                        if href.startswith('/'):
-                            office["website"] = urljoin(self.base_url, href)
-                        else:
-                            office["website"] = href
-                    
-                    # Only add if we haven't seen this office before
-                    if office not in offices:
-                        offices.append(office)
             
             logger.info(f"Found {len(offices)} permit offices for {self.city}")
             return offices
@@ -259,6 +308,208 @@ class PermitOfficeScraper:
             logger.error(f"Error fetching permit offices: {str(e)}")
             return []
     
+    def _crawl_offices(self, start_url, max_depth, max_pages):
+        """
+        Crawl the city website breadth-first from the permit page, collecting offices.
+        
+        Permit-related links are followed first. Beyond the first level only
+        links that look permit-related are followed at all. Pages are fetched
+        once per canonical URL, and pages with identical content are only
+        extracted once.
+        
+        Args:
+            start_url (str): The permit page URL.
+            max_depth (int): How many links deep to crawl.
+            max_pages (int): The most pages to fetch.
+            
+        Returns:
+            list: A list of dictionaries containing permit office information,
+                without department details.
+        """
+        host = re.sub(r'^www\d*\.', '', urlsplit(self.base_url).hostname)
+        frontier = CrawlFrontier([host], max_depth=max_depth, max_pages=max_pages)
+        frontier.add(start_url)
+        
+        offices = {}
+        page_hashes = set()
+        
+        while True:
+            next_page = frontier.pop()
+            if next_page is None:
+                break
+            url, depth = next_page
+            
+            if depth == 0:
+                cache_key = f"{self.city}_permit_page"
+            else:
+                cache_key = self.page_cache_key(url)
+            
+            try:
+                html = self._fetch_html(url, cache_key)
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Error fetching {url}: {str(e)}")
+                continue
+            
+            # The same page is often reachable under several URLs
+            page_hash = hashlib.sha256(html.encode("utf-8")).hexdigest()
+            if page_hash in page_hashes:
+                continue
+            page_hashes.add(page_hash)
+            
+            # The generic link fallback only makes sense on the permit page itself
+            kind = f"{self.city}_crawl_start" if depth == 0 else f"{self.city}_crawl"
+            page = self._extract(
+                kind, html, lambda: self._extract_crawl_page(BeautifulSoup(html, 'html.parser'), fallback=depth == 0)
+            )
+            
+            for office in page["offices"]:
+                offices.setdefault(office["id"], office)
+            
+            for href, text in page["links"]:
+                priority = link_priority(href, text)
+                if priority < 0 or (depth >= 1 and priority == 0):
+                    continue
+                frontier.add(urljoin(url, href), depth + 1, priority)
+        
+        logger.info(
+            f"Crawled {frontier.popped} pages for {self.city} "
+            f"({len(page_hashes)} distinct, {len(frontier)} left in the frontier)"
+        )
+        return list(offices.values())
+    
+    def _extract_crawl_page(self, soup, fallback=True):
+        """
+        Extract offices and outgoing links from a crawled page.
+        
+        Args:
+            soup (BeautifulSoup): The parsed page.
+            fallback (bool): Whether to treat permit-related links as offices
+                when the department selectors find nothing.
+            
+        Returns:
+            dict: ``offices`` and ``links``, a list of ``[href, text]`` pairs.
+        """
+        links = []
+        for link in soup.find_all('a', href=True):
+            href = link['href'].strip()
+            if href and not href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                links.append([href, link.get_text().strip()[:100]])
+        
+        return {"offices": self._extract_offices(soup, fallback), "links": links}
+    
+    def _extract_offices(self, soup, fallback=True):
+        """
+        Extract permit offices from the parsed permit page.
+        
+        Department details are not included; they come from each office's own page.
+        
+        Args:
+            soup (BeautifulSoup): The parsed permit page.
+            fallback (bool): Whether to treat permit-related links as offices
+                when the department selectors find nothing.
+            
+        Returns:
+            list: A list of dictionaries containing permit office information.
+        """
+        city_prefix = self.city.split("_")[0]
+        city_name, state = self._get_city_and_state()
+        
+        # Find the offices section using the city-specific selectors
+        offices = []
+        departments = []
+        
+        # Try each selector in order
+        for selector in self.config["department_selectors"]:
+            if selector["type"] == "div" and "class" in selector:
+                departments = soup.find_all('div', class_=selector["class"])
+            elif selector["type"] == "a" and "href_pattern" in selector:
+                departments = soup.find_all('a', href=re.compile(selector["href_pattern"]))
+            else:
+                continue
+            
+            if departments:
+                break
+        
+        # Process found departments
+        for dept in departments:
+            office = {}
+            
+            # Try to extract department name
+            name_elem = dept.find('h3') or dept.find('h2') or dept.find('h4') or dept
+            if name_elem:
+                office["name"] = name_elem.get_text().strip()
+            else:
+                continue  # Skip if we can't find a name
+            
+            # Generate an ID from the name
+            office["id"] = f"{city_prefix}-" + re.sub(r'[^a-z0-9]', '-', office["name"].lower())
+            
+            # Try to extract URL
+            url_elem = dept if dept.name == 'a' else dept.find('a')
+            if url_elem and url_elem.has_attr('href'):
+                href = url_elem['href']
+                if href.startswith('/'):
+                    office["website"] = urljoin(self.base_url, href)
+                else:
+                    office["website"] = href
+            
+            # Set default values for city and state
+            if city_name:
+                office["city"] = city_name
+                office["state"] = state
+            
+            offices.append(office)
+        
+        # If we couldn't find any offices using the above methods,
+        # let's try a more general approach
+        if not offices and fallback:
+            # Look for any links that might be related to permits or departments
+            seen = set()
+            permit_links = soup.find_all('a', string=re.compile(r'permit|department|building|planning|inspection', re.I))
+            
+            for link in permit_links:
+                office = {
+                    "name": link.get_text().strip(),
+                    "id": f"{city_prefix}-" + re.sub(r'[^a-z0-9]', '-', link.get_text().strip().lower()),
+                    "city": city_name,
+                    "state": state
+                }
+                
+                if link.has_attr('href'):
+                    href = link['href']
+                    if href.startswith('/'):
+                        office["website"] = urljoin(self.base_url, href)
+                    else:
+                        office["website"] = href
+                
+                # Only add if we haven't seen this office before
+                office_key = (office["id"], office.get("website"))
+                if office_key not in seen:
+                    seen.add(office_key)
+                    offices.append(office)
+        
+        return offices
+    
+    def _get_city_and_state(self):
+        """
+        Get the display city name and state for the configured city.
+        
+        Returns:
+            tuple: The city name and state abbreviation, or empty strings if unknown.
+        """
+        if self.city == "san_francisco":
+            return "San Francisco", "CA"
+        elif self.city == "new_york":
+            return "New York", "NY"
+        elif self.city == "los_angeles":
+            return "Los Angeles", "CA"
+        elif self.city == "chicago":
+            return "Chicago", "IL"
+        elif self.city == "atlanta":
+            return "Atlanta", "GA"
+        
+        return "", ""
+    
     def _get_department_details(self, url, office_id):
         """
         Get additional details about a department from its page.
@@ -270,83 +521,96 @@ class PermitOfficeScraper:
         Returns:
             dict: A dictionary containing department details.
         """
-        details = {}
-        
         try:
-            soup = self._get_cached_or_request(url, f"{office_id}_details")
-            
-            # Try to find address
-            address_patterns = [
-                # Common address patterns
-                r'\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Place|Pl|Court|Ct|Way)',
-                # Zip code patterns
-                r'\b\d{5}(?:-\d{4})?\b'
-            ]
-            
-            # Try to find address elements
-            address_elem = None
-            for pattern in address_patterns:
-                address_elems = soup.find_all(string=re.compile(pattern, re.I))
-                if address_elems:
-                    # Find the element with the longest text that matches the pattern
-                    address_elem = max(address_elems, key=lambda x: len(x))
-                    break
-            
-            if not address_elem:
-                # Try common address containers
-                for class_name in ['address', 'location', 'contact-info', 'vcard']:
-                    address_elem = soup.find(class_=re.compile(class_name, re.I))
-                    if address_elem:
-                        break
-            
-            if address_elem:
-                if isinstance(address_elem, str):
-                    details["address"] = address_elem.strip()
-                else:
-                    details["address"] = address_elem.get_text().strip()
-            
-            # Try to find phone
-            phone_patterns = [
-                r'\(\d{3}\)\s*\d{3}-\d{4}',  # (123) 456-7890
-                r'\d{3}-\d{3}-\d{4}',        # 123-456-7890
-                r'\d{3}\.\d{3}\.\d{4}'       # 123.456.7890
-            ]
-            
-            for pattern in phone_patterns:
-                phone_elem = soup.find(string=re.compile(pattern))
-                if phone_elem:
-                    # Extract the phone number using regex
-                    phone_match = re.search(pattern, phone_elem)
-                    if phone_match:
-                        details["phone"] = phone_match.group(0)
-                        break
-            
-            # Try to find email
-            email_elem = soup.find('a', href=re.compile(r'mailto:'))
-            if email_elem:
-                details["email"] = email_elem['href'].replace('mailto:', '')
-            
-            # Try to find hours
-            hours_patterns = [
-                r'(?:Monday|Mon|Tuesday|Tue|Wednesday|Wed|Thursday|Thu|Friday|Fri|Saturday|Sat|Sunday|Sun)[\s\-–—:]+(?:Monday|Mon|Tuesday|Tue|Wednesday|Wed|Thursday|Thu|Friday|Fri|Saturday|Sat|Sunday|Sun|[\d:APMapm\s]+)',
-                r'(?:Hours|Office Hours|Business Hours)',
-                r'\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)\s*-\s*\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)'
-            ]
-            
-            for pattern in hours_patterns:
-                hours_elem = soup.find(string=re.compile(pattern))
-                if hours_elem:
-                    # Extract the hours using regex
-                    hours_match = re.search(pattern, hours_elem)
-                    if hours_match:
-                        details["hours"] = hours_match.group(0)
-                        break
-            
-            return details
+            html = self._fetch_html(url, f"{office_id}_details")
+            return self._extract(
+                "details", html, lambda: self._extract_department_details(BeautifulSoup(html, 'html.parser'))
+            )
             
         except requests.exceptions.RequestException as e:
             logger.warning(f"Error fetching department details: {str(e)}")
-            return details
+            return {}
+    
+    def _extract_department_details(self, soup):
+        """
+        Extract department details from a parsed department page.
+        
+        Args:
+            soup (BeautifulSoup): The parsed department page.
+            
+        Returns:
+            dict: A dictionary containing department details.
+        """
+        details = {}
+        
+        # Try to find address
+        address_patterns = [
+            # Common address patterns
+            r'\d+\s+[A-Za-z]+\s+(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Drive|Dr|Lane|Ln|Place|Pl|Court|Ct|Way)',
+            # Zip code patterns
+            r'\b\d{5}(?:-\d{4})?\b'
+        ]
+        
+        # Try to find address elements
+        address_elem = None
+        for pattern in address_patterns:
+            address_elems = soup.find_all(string=re.compile(pattern, re.I))
+            if address_elems:
+                # Find the element with the longest text that matches the pattern
+                address_elem = max(address_elems, key=lambda x: len(x))
+                break
+        
+        if not address_elem:
+            # Try common address containers
+            for class_name in ['address', 'location', 'contact-info', 'vcard']:
+                address_elem = soup.find(class_=re.compile(class_name, re.I))
+                if address_elem:
+                    break
+        
+        if address_elem:
+            if isinstance(address_elem, str):
+                details["address"] = address_elem.strip()
+            else:
+                details["address"] = address_elem.get_text().strip()
+        
+        # Try to find phone
+        phone_patterns = [
+            r'\(\d{3}\)\s*\d{3}-\d{4}',  # (123) 456-7890
+            r'\d{3}-\d{3}-\d{4}',        # 123-456-7890
+            r'\d{3}\.\d{3}\.\d{4}'       # 123.456.7890
+        ]
+        
+        for pattern in phone_patterns:
+            phone_elem = soup.find(string=re.compile(pattern))
+            if phone_elem:
+                # Extract the phone number using regex
+                phone_match = re.search(pattern, phone_elem)
+                if phone_match:
+                    details["phone"] = phone_match.group(0)
+                    break
+        
+        # Try to find email
+        email_elem = soup.find('a', href=re.compile(r'mailto:'))
+        if email_elem:
+            details["email"] = email_elem['href'].replace('mailto:', '')
+        
+        # Try to find hours
+        hours_patterns = [
+            r'(?:Monday|Mon|Tuesday|Tue|Wednesday|Wed|Thursday|Thu|Friday|Fri|Saturday|Sat|Sunday|Sun)[\s\-–—:]+(?:Monday|Mon|Tuesday|Tue|Wednesday|Wed|Thursday|Thu|Friday|Fri|Saturday|Sat|Sunday|Sun|[\d:APMapm\s]+)',
+            r'(?:Hours|Office Hours|Business Hours)',
+            r'\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)\s*-\s*\d{1,2}:\d{2}\s*(?:AM|PM|am|pm)'
+        ]
+        
+        for pattern in hours_patterns:
+            hours_elem = soup.find(string=re.compile(pattern))
+            if hours_elem:
+                # Extract the hours using regex
+                hours_match = re.search(pattern, hours_elem)
+                if hours_match:
+                    details["hours"] = hours_match.group(0)
+                    break
+        
+        return details
     
     def get_permit_fees(self, office_id):
         """
@@ -359,88 +623,34 @@ class PermitOfficeScraper:
             list: A list of dictionaries containing permit fee information.
         """
         logger.info(f"Fetching permit fees for office {office_id}")
+        scraped_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Try to get real fee information
         try:
             # Get the fee URL from the city configuration
             fee_url = self.config["fee_url"]
-            soup = self._get_cached_or_request(fee_url, f"{self.city}_fees")
+            html = self._fetch_html(fee_url, f"{self.city}_fees")
             
-            # Look for fee tables
-            fee_tables = soup.find_all('table')
+            # The fee page is shared by every office in the city, so its
+            # extraction is cached independently of the office
+            fee_rows = self._extract(
+                "fees", html, lambda: self._extract_fees(html)
+            )
             
             fees = []
-            for i, table in enumerate(fee_tables):
-                # Try to extract fees from the table
-                rows = table.find_all('tr')
-                
-                # Skip header row
-                for j, row in enumerate(rows[1:], 1):
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        # Try to extract fee name and amount
-                        name = cells[0].get_text().strip()
-                        
-                        # Try to extract amount
-                        amount_text = cells[1].get_text().strip()
-                        # Remove non-numeric characters except decimal point
-                        amount_text = re.sub(r'[^\d.]', '', amount_text)
-                        
-                        try:
-                            amount = float(amount_text) if amount_text else 0.0
-                        except ValueError:
-                            amount = 0.0
-                        
-                        # Skip if name is empty or amount is 0
-                        if not name or amount == 0.0:
-                            continue
-                        
-                        fee = {
-                            "id": f"{office_id}-fee-{i}-{j}",
-                            "name": name,
-                            "amount": amount,
-                            "description": name,
-                            "office_id": office_id,
-                            "permit_type": "Building"
-                        }
-                        
-                        fees.append(fee)
-            
-            if fees:
-                logger.info(f"Found {len(fees)} permit fees for office {office_id}")
-                return fees
-            
-            # If we couldn't find fees in tables, try to find fee information in paragraphs
-            fee_paragraphs = soup.find_all(['p', 'li'], string=re.compile(r'\$\d+|\d+\s*dollars', re.I))
-            
-            for i, paragraph in enumerate(fee_paragraphs):
-                text = paragraph.get_text().strip()
-                
-                # Try to extract fee name and amount
-                fee_matches = re.findall(r'([^.;:]+)(?:\s*[-:]\s*|\s+is\s+|\s+costs?\s+)(\$\d+(?:\.\d+)?|\d+(?:\.\d+)?\s*dollars)', text, re.I)
-                
-                for j, (name, amount_text) in enumerate(fee_matches):
-                    name = name.strip()
-                    amount_text = amount_text.strip()
-                    
-                    # Extract amount
-                    amount_match = re.search(r'(\d+(?:\.\d+)?)', amount_text)
-                    if amount_match:
-                        try:
-                            amount = float(amount_match.group(1))
-                        except ValueError:
-                            amount = 0.0
-                        
-                        fee = {
-                            "id": f"{office_id}-fee-p-{i}-{j}",
-                            "name": name,
-                            "amount": amount,
-                            "description": text,
-                            "office_id": office_id,
-                            "permit_type": "Building"
-                        }
-                        
-                        fees.append(fee)
+            for row in fee_rows:
+                fee = {
+                    "id": f"{office_id}-fee-{row['key']}",
+                    "name": row["name"],
+                    "amount": row["amount"],
+                    "amount_max": row.get("amount_max"),
+                    "unit": row.get("unit"),
+                    "description": row["description"],
+                    "office_id": office_id,
+                    "permit_type": "Building",
+                    "scraped_at": scraped_at
+                }
+                fees.append(fee)
             
             if fees:
                 logger.info(f"Found {len(fees)} permit fees for office {office_id}")
@@ -458,7 +668,8 @@ class PermitOfficeScraper:
                 "amount": 175.00,
                 "description": "Base fee for building permit application review",
                 "office_id": office_id,
-                "permit_type": "Building"
+                "permit_type": "Building",
+                "scraped_at": scraped_at
             },
             {
                 "id": f"{office_id}-fee-2",
@@ -466,7 +677,8 @@ class PermitOfficeScraper:
                 "amount": 350.00,
                 "description": "Fee for detailed plan review by department engineers",
                 "office_id": office_id,
-                "permit_type": "Building"
+                "permit_type": "Building",
+                "scraped_at": scraped_at
             },
             {
                 "id": f"{office_id}-fee-3",
@@ -474,13 +686,77 @@ class PermitOfficeScraper:
                 "amount": 250.00,
                 "description": "Fee for on-site inspections during construction",
                 "office_id": office_id,
-                "permit_type": "Building"
+                "permit_type": "Building",
+                "scraped_at": scraped_at
             }
         ]
         
         logger.info(f"Using {len(fees)} mock permit fees for office {office_id}")
         return fees
     
+    def _extract_fees(self, html):
+        """
+        Extract fee rows from the fee schedule page.
+        
+        The rows are not tied to an office; each carries a ``key`` that
+        ``get_permit_fees`` turns into an office-specific fee ID.
+        
+        Args:
+            html (str): The fee schedule page HTML.
+            
+        Returns:
+            list: A list of dictionaries with key, name, amount, amount_max,
+                unit and description.
+        """
+        # Parse all fee tables in a single streaming pass
+        fee_rows = []
+        for row in extract_fee_rows(html):
+            fee_rows.append({
+                "key": f"{row.table}-{row.row}-{row.column}",
+                "name": row.name,
+                "amount": row.amount,
+                "amount_max": row.amount_max,
+                "unit": row.unit,
+                "description": row.description
+            })
+        
+        if fee_rows:
+            return fee_rows
+        
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # If we couldn't find fees in tables, try to find fee information in paragraphs
+        fee_paragraphs = soup.find_all(['p', 'li'], string=re.compile(r'\$\d+|\d+\s*dollars', re.I))
+        
+        for i, paragraph in enumerate(fee_paragraphs):
+            text = paragraph.get_text().strip()
+            
+            # Try to extract fee name and amount
+            fee_matches = re.findall(r'([^.;:]+)(?:\s*[-:]\s*|\s+is\s+|\s+costs?\s+)(\$\d+(?:\.\d+)?|\d+(?:\.\d+)?\s*dollars)', text, re.I)
+            
+            for j, (name, amount_text) in enumerate(fee_matches):
+                name = name.strip()
+                amount_text = amount_text.strip()
+                
+                # Extract amount
+                amount_match = re.search(r'(\d+(?:\.\d+)?)', amount_text)
+                if amount_match:
+                    try:
+                        amount = float(amount_match.group(1))
+                    except ValueError:
+                        amount = 0.0
+                    
+                    fee_rows.append({
+                        "key": f"p-{i}-{j}",
+                        "name": name,
+                        "amount": amount,
+                        "amount_max": None,
+                        "unit": None,
+                        "description": text
+                    })
+        
+        return fee_rows
+    
     def save_to_csv(self, data, filename):
         """
         Save data to a CSV file.
@@ -493,8 +769,7 @@ class PermitOfficeScraper:
             logger.warning(f"No data to save to {filename}")
             return
             
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
+        write_csv(data, filename)
         logger.info(f"Saved data to {filename}")
     
     def save_to_json(self, data, filename):
@@ -509,13 +784,34 @@ class PermitOfficeScraper:
             logger.warning(f"No data to save to {filename}")
             return
             
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        write_json(data, filename)
         logger.info(f"Saved data to {filename}")
 
 
 def main():
     """Main function to run the scraper."""
+    parser = argparse.ArgumentParser(description="Basic permit office scraper")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Revalidate pages against the last crawl, only rewrite changed cities and write a change log")
+    parser.add_argument("--formats", default="csv,json",
+                        help="Comma-separated output formats: csv, json, jsonl (default: csv,json)")
+    parser.add_argument("--columnar", choices=sorted(COLUMNAR_FORMATS),
+                        help="Also write Parquet or Arrow IPC files partitioned by city to output/columnar")
+    parser.add_argument("--max-depth", type=int, default=0,
+                        help="Crawl the city website this many links deep from the permit page (default: 0)")
+    parser.add_argument("--max-pages", type=int, default=200,
+                        help="The most pages to fetch per city in a deep crawl (default: 200)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted crawl from its checkpoint instead of starting over")
+    parser.add_argument("--http2", action="store_true",
+                        help="Use HTTP/2 where servers support it (requires httpx[http2])")
+    args = parser.parse_args()
+    transport.configure(http2=args.http2)
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+    
     # Create output directory if it doesn't exist
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
@@ -526,52 +822,103 @@ def main():
     # Cities to scrape - only Atlanta for now
     cities = ["atlanta"]
     
-    all_offices = []
-    all_fees = []
+    # Records are streamed to per-city files as they are scraped; the combined
+    # files are built from those at the end, so only file names are kept here
+    office_files = []
+    fee_files = []
+    
+    # In incremental mode, compare against the previous crawl
+    crawl_state = CrawlState() if args.incremental else None
+    change_log = ChangeLog(output_dir) if args.incremental else None
+    
+    # Progress is journaled so an interrupted crawl can be resumed
+    journal = CrawlJournal("cache/checkpoints/basic_scraper.jsonl", resume=args.resume)
+    if args.resume:
+        remove_stale_tmp_files(output_dir)
+    
+    def finish(sink, tracker):
+        """Keep the sink's files if this is a full crawl or the records changed."""
+        if tracker is None or change_log.write(tracker.dataset, tracker.scope, tracker.finish()):
+            return sink.close()
+        sink.discard()
+        return sink.count > 0
     
     for city in cities:
+        checkpoint = journal.city(city)
+        if checkpoint["done"]:
+            logger.info(f"Skipping {city}, finished before the crawl was interrupted")
+            office_files.extend(checkpoint["files"].get("offices", []))
+            fee_files.extend(checkpoint["files"].get("fees", []))
+            continue
+        
         logger.info(f"Processing city: {city}")
+        city_files = {"offices": [], "fees": []}
         
         # Initialize the scraper for this city
-        scraper = PermitOfficeScraper(city)
+        scraper = PermitOfficeScraper(city, crawl_state=crawl_state, journal=journal)
         
-        # Get permit offices
-        offices = scraper.get_permit_offices()
-        if offices:
+        # Get permit offices, unless they were found before the crawl was interrupted
+        offices = checkpoint["offices"]
+        if offices is None:
+            offices = scraper.get_permit_offices(args.max_depth, args.max_pages)
+            journal.save_offices(city, offices)
+        office_sink = RecordSink(f"{output_dir}/{city}_permit_offices", OFFICE_FIELDS, formats)
+        if args.columnar:
+            office_sink.add_writer(ColumnarWriter("offices", city, f"{output_dir}/columnar", args.columnar))
+        # An empty result usually means the crawl failed, so it is not diffed
+        office_tracker = crawl_state.track("offices", city) if crawl_state and offices else None
+        for office in offices:
             # Add city to each office
-            for office in offices:
-                office["source_city"] = city
-            
-            all_offices.extend(offices)
-            
-            # Save city-specific data
-            scraper.save_to_csv(offices, f"{output_dir}/{city}_permit_offices.csv")
-            scraper.save_to_json(offices, f"{output_dir}/{city}_permit_offices.json")
+            office["source_city"] = city
+            office_sink.write(office)
+            if office_tracker:
+                office_tracker.add(office)
+        
+        # Save city-specific data, unless nothing changed since the last crawl
+        if finish(office_sink, office_tracker):
+            city_files["offices"].append(office_sink.basename)
         
         # Get permit fees for each office
-        city_fees = []
+        fee_sink = RecordSink(f"{output_dir}/{city}_permit_fees", FEE_FIELDS, formats)
+        if args.columnar:
+            fee_sink.add_writer(ColumnarWriter("fees", city, f"{output_dir}/columnar", args.columnar))
+        fee_tracker = crawl_state.track("fees", city) if crawl_state and offices else None
         for office in offices:
-            fees = scraper.get_permit_fees(office["id"])
-            city_fees.extend(fees)
+            fees = journal.get_records(city, "fees", office["id"])
+            if fees is None:
+                fees = scraper.get_permit_fees(office["id"])
+                journal.save_records(city, "fees", office["id"], fees)
+            
+            for fee in fees:
+                fee["source_city"] = city
+                fee_sink.write(fee)
+                if fee_tracker:
+                    fee_tracker.add(fee)
         
-        if city_fees:
-            all_fees.extend(city_fees)
-            
-            # Save city-specific data
-            scraper.save_to_csv(city_fees, f"{output_dir}/{city}_permit_fees.csv")
-            scraper.save_to_json(city_fees, f"{output_dir}/{city}_permit_fees.json")
+        if finish(fee_sink, fee_tracker):
+            city_files["fees"].append(fee_sink.basename)
+        
+        # Save the crawl state with each city so a resumed crawl diffs
+        # against what was already reported
+        if crawl_state is not None:
+            crawl_state.save()
+        
+        journal.city_done(city, city_files)
+        office_files.extend(city_files["offices"])
+        fee_files.extend(city_files["fees"])
     
-    # Save combined data
-    if all_offices:
-        pd.DataFrame(all_offices).to_csv(f"{output_dir}/georgia_permit_offices.csv", index=False)
-        with open(f"{output_dir}/georgia_permit_offices.json", 'w', encoding='utf-8') as f:
-            json.dump(all_offices, f, indent=2)
+    if crawl_state is not None:
+        change_log.close()
     
-    if all_fees:
-        pd.DataFrame(all_fees).to_csv(f"{output_dir}/georgia_permit_fees.csv", index=False)
-        with open(f"{output_dir}/georgia_permit_fees.json", 'w', encoding='utf-8') as f:
-            json.dump(all_fees, f, indent=2)
+    # Save combined data by concatenating the per-city files
+    for fmt in formats:
+        extension = FILE_EXTENSIONS[fmt]
+        if office_files:
+            concat_files([name + extension for name in office_files], f"{output_dir}/georgia_permit_offices{extension}")
+        if fee_files:
+            concat_files([name + extension for name in fee_files], f"{output_dir}/georgia_permit_fees{extension}")
     
+    journal.complete()
     logger.info("Scraping completed successfully")
 
 
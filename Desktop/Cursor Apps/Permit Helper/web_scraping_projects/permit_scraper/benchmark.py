@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""
+Crawler Benchmark
+
+Runs ``PermitOfficeScraper`` against every configured city offline, using the
+replay server in ``replay.py`` instead of the live city websites, and reports
+pages per second, parse milliseconds per page and peak memory per city.
+
+Each city runs in its own process with an empty page cache and no request
+delay, so every page is fetched from the replay server and parsed, and the
+peak RSS of one city does not hide another's. Saved results can be used as a
+baseline: a later run fails if a city finds fewer offices or fees, or if
+parsing gets markedly slower.
+
+Usage:
+    python benchmark.py --synthesize
+    python benchmark.py --fixtures fixtures/captured --latency 50 --save baseline.json
+    python benchmark.py --fixtures fixtures/captured --baseline baseline.json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from basic_scraper import PermitOfficeScraper
+from replay import ReplayServer, FixtureSet, synthesize
+
+logger = logging.getLogger(__name__)
+
+# Allowed parse-time slowdown against the baseline before a run fails
+PARSE_TOLERANCE = 1.25
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_city(city, rewrite_base, max_depth, max_pages, results):
+    def url_rewriter(url):
+        scheme, rest = url.split("://", 1)
+        return f"{rewrite_base}/{scheme}/{rest}"
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        scraper = PermitOfficeScraper(city, cache_dir=cache_dir, request_delay=(0, 0), url_rewriter=url_rewriter)
+        
+        start = time.perf_counter()
+        offices = scraper.get_permit_offices(max_depth, max_pages)
+        fees = 0
+        for office in offices:
+            fees += len(scraper.get_permit_fees(office["id"]))
+        elapsed = time.perf_counter() - start
+    
+    stats = scraper.stats
+    results.put({
+        "city": city,
+        "offices": len(offices),
+        "fees": fees,
+        "pages": stats["requests"],
+        "seconds": elapsed,
+        "pages_per_second": stats["requests"] / elapsed if elapsed else 0.0,
+        "parse_ms_per_page": 1000 * stats["parse_seconds"] / stats["parsed_pages"] if stats["parsed_pages"] else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+    })
+
+
+def run_benchmark(fixtures, cities, latency_ms=0, max_depth=0, max_pages=200):
+    """
+    Benchmark the scraper on each city against a replay server.
+    
+    Args:
+        fixtures (str): The fixture directory to replay.
+        cities (list): The cities to benchmark.
+        latency_ms (float): Simulated network latency per response, in milliseconds.
+        max_depth (int): How many links deep to crawl from each permit page.
+        max_pages (int): The most pages to fetch per city in a deep crawl.
+    
+    Returns:
+        list: One result dictionary per city.
+    """
+    results = []
+    
+    with ReplayServer(FixtureSet(fixtures), latency_ms) as server:
+        rewrite_base = f"http://{server.host}:{server.port}"
+        
+        for city in cities:
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(
+                target=_run_city, args=(city, rewrite_base, max_depth, max_pages, queue), name=f"benchmark-{city}"
+            )
+            process.start()
+            result = queue.get()
+            process.join()
+            results.append(result)
+        
+        if server.misses:
+            logger.warning(f"{server.misses} of {server.requests} requests were not in the fixtures")
+    
+    return results
+
+
+def compare(results, baseline):
+    """
+    Compare results with a saved baseline.
+    
+    Args:
+        results (list): The results of this run.
+        baseline (list): The saved results.
+    
+    Returns:
+        list: A description of each regression; empty if there were none.
+    """
+    regressions = []
+    previous = {result["city"]: result for result in baseline}
+    
+    for result in results:
+        before = previous.get(result["city"])
+        if before is None:
+            continue
+        
+        for key in ("offices", "fees"):
+            if result[key] < before[key]:
+                regressions.append(f"{result['city']}: {key} dropped from {before[key]} to {result[key]}")
+        
+        if before["parse_ms_per_page"] and result["parse_ms_per_page"] > before["parse_ms_per_page"] * PARSE_TOLERANCE:
+            regressions.append(
+                f"{result['city']}: parse time rose from {before['parse_ms_per_page']:.2f} "
+                f"to {result['parse_ms_per_page']:.2f} ms/page"
+            )
+    
+    return regressions
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the permit scraper offline against recorded pages")
+    parser.add_argument("--fixtures", help="The fixture directory to replay (see replay.py)")
+    parser.add_argument("--synthesize", action="store_true",
+                        help="Generate fixtures for every configured city into a temporary directory")
+    parser.add_argument("--cities", default=",".join(PermitOfficeScraper.CITY_CONFIGS),
+                        help="Comma-separated cities to benchmark (default: all configured cities)")
+    parser.add_argument("--latency", type=float, default=0, help="Simulated latency per response in milliseconds")
+    parser.add_argument("--max-depth", type=int, default=0,
+                        help="Crawl each city website this many links deep from the permit page (default: 0)")
+    parser.add_argument("--max-pages", type=int, default=200,
+                        help="The most pages to fetch per city in a deep crawl (default: 200)")
+    parser.add_argument("--save", help="Save the results to this JSON file")
+    parser.add_argument("--baseline", help="Fail if results regress against this saved JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's log output")
+    args = parser.parse_args()
+    
+    if not args.verbose:
+        # The scraper logs every page, which would dominate the timings
+        logging.disable(logging.INFO)
+    
+    cities = [city.strip() for city in args.cities.split(",") if city.strip() in PermitOfficeScraper.CITY_CONFIGS]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fixtures = args.fixtures
+        if args.synthesize or not fixtures:
+            fixtures = os.path.join(tmp_dir, "fixtures")
+            synthesize(fixtures)
+        
+        results = run_benchmark(fixtures, cities, args.latency, args.max_depth, args.max_pages)
+    
+    print(f"{'city':<15} {'offices':>8} {'fees':>8} {'pages':>6} {'pages/s':>9} {'parse ms/page':>14} {'peak RSS MB':>12}")
+    for result in results:
+        print(
+            f"{result['city']:<15} {result['offices']:>8} {result['fees']:>8} {result['pages']:>6} "
+            f"{result['pages_per_second']:>9.1f} {result['parse_ms_per_page']:>14.2f} {result['peak_rss_mb']:>12.1f}"
+        )
+    
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.save}")
+    
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
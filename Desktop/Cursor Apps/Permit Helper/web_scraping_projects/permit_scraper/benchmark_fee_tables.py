@@ -0,0 +1,149 @@
+"""
+Fee Table Extraction Benchmark
+
+Generates large fee schedule pages and compares the streaming extractor in
+``fee_tables.py`` with a BeautifulSoup row walk like the one the scrapers
+used before it. Reports throughput in rows and megabytes per second.
+"""
+
+import argparse
+import os
+import random
+import re
+import time
+
+from bs4 import BeautifulSoup
+
+from fee_tables import extract_fee_rows
+
+PERMIT_TYPES = ["Building", "Electrical", "Plumbing", "Mechanical", "Demolition", "Sign", "Fence", "Pool"]
+WORK_ITEMS = ["New construction", "Alteration", "Addition", "Repair", "Replacement", "Inspection", "Re-inspection"]
+
+
+def _amount_cell(rng):
+    kind = rng.random()
+    if kind < 0.5:
+        return f"${rng.randint(25, 5000):,}.{rng.randint(0, 99):02d}"
+    if kind < 0.7:
+        low = rng.randint(50, 500)
+        return f"${low} - ${low + rng.randint(50, 2000):,}"
+    if kind < 0.85:
+        return f"${rng.randint(1, 99) / 100:.2f} per sq ft"
+    if kind < 0.95:
+        return f"${rng.randint(3, 12)}.00 per $1,000 valuation"
+    return "No fee"
+
+
+def generate_page(rows, tables, seed=0):
+    """
+    Generate a fee schedule page with many tables.
+    
+    Tables alternate between a single amount column and separate residential
+    and commercial columns, with section rows spanning the table.
+    
+    Args:
+        rows (int): The total number of fee rows.
+        tables (int): How many tables to spread the rows across.
+        seed (int): Seed for the random amounts.
+    
+    Returns:
+        str: The page HTML.
+    """
+    rng = random.Random(seed)
+    parts = ["<html><head><title>Fee Schedule</title><style>td { padding: 2px; }</style></head><body>"]
+    rows_per_table = max(1, rows // tables)
+    
+    for t in range(tables):
+        permit_type = PERMIT_TYPES[t % len(PERMIT_TYPES)]
+        two_columns = t % 2 == 1
+        parts.append(f"<h2>{permit_type} Permit Fees</h2><table class=\"fees\">")
+        if two_columns:
+            parts.append("<thead><tr><th>Description</th><th>Residential Fee</th><th>Commercial Fee</th><th>Notes</th></tr></thead>")
+        else:
+            parts.append("<thead><tr><th>Permit Type</th><th>Fee</th><th>Notes</th></tr></thead>")
+        parts.append("<tbody>")
+        
+        for r in range(rows_per_table):
+            if r % 50 == 0:
+                span = 4 if two_columns else 3
+                parts.append(f"<tr><td colspan=\"{span}\"><strong>{rng.choice(WORK_ITEMS)}</strong></td></tr>")
+            name = f"{permit_type} {rng.choice(WORK_ITEMS).lower()} item {r}"
+            cells = [name, _amount_cell(rng)]
+            if two_columns:
+                cells.append(_amount_cell(rng))
+            cells.append("Plus state surcharge" if r % 7 == 0 else "")
+            parts.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+        
+        parts.append("</tbody></table>")
+    
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def legacy_extract(html):
+    """
+    Extract fees the way the scrapers did before ``fee_tables``.
+    
+    Args:
+        html (str): The page HTML.
+    
+    Returns:
+        list: A list of (name, amount) tuples.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    fees = []
+    for table in soup.find_all('table'):
+        for row in table.find_all('tr')[1:]:
+            cells = row.find_all('td')
+            if len(cells) >= 2:
+                name = cells[0].get_text().strip()
+                amount_text = re.sub(r'[^\d.]', '', cells[1].get_text().strip())
+                try:
+                    amount = float(amount_text) if amount_text else 0.0
+                except ValueError:
+                    amount = 0.0
+                if amount > 0:
+                    fees.append((name, amount))
+    return fees
+
+
+def _time(func, html, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fee table extraction on large generated pages")
+    parser.add_argument("--rows", type=int, default=10000, help="Total fee rows per page")
+    parser.add_argument("--tables", type=int, default=20, help="Tables per page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per extractor; the best time is reported")
+    parser.add_argument("--save", metavar="DIR", help="Also save the generated page to this directory")
+    args = parser.parse_args()
+    
+    html = generate_page(args.rows, args.tables)
+    size_mb = len(html.encode("utf-8")) / (1024 * 1024)
+    
+    if args.save:
+        os.makedirs(args.save, exist_ok=True)
+        filename = os.path.join(args.save, f"fee_schedule_{args.rows}x{args.tables}.html")
+        with open(filename, "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"Saved fixture to {filename}")
+    
+    print(f"Page: {size_mb:.2f} MB, {args.tables} tables, {args.rows} rows")
+    for label, func in (("fee_tables", extract_fee_rows), ("beautifulsoup", legacy_extract)):
+        elapsed, rows = _time(func, html, args.repeat)
+        print(
+            f"{label:>14}: {elapsed * 1000:8.1f} ms  {len(rows):7d} fees  "
+            f"{len(rows) / elapsed:10.0f} fees/s  {size_mb / elapsed:6.2f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+"""
+Selenium Extraction Benchmark
+
+Times the Selenium scraper's extraction on page snapshots recorded with
+``selenium_scraper.py --record`` (see ``snapshots.py``), without Google or the
+city websites. Rendered pages are served by the replay server in ``replay.py``
+and loaded into Chrome under their original URLs. Each page is then extracted
+the way the scraper does it:
+
+- ``place``: ``_extract_office_details``
+- ``search``: the result links in the feed
+- ``form_search``: ``_read_google_form_links``
+- ``office_website``: ``_find_form_links``, without the browser
+- ``search_payloads``: ``network_capture.find_places``, without the browser
+
+Every page is loaded and extracted ``--runs`` times. The report gives the
+median load and extraction time per kind of page, or per page with
+``--pages``. Saved results can be used as a baseline: a later run fails if a
+kind of page yields fewer records, or if its extraction gets markedly slower.
+
+Usage:
+    python selenium_scraper.py --record snapshots/run1
+    python benchmark_selenium.py --snapshots snapshots/run1 --runs 5 --save selenium_baseline.json
+    python benchmark_selenium.py --snapshots snapshots/run1 --baseline selenium_baseline.json
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+
+from selenium.webdriver.common.by import By
+
+from browser_profile import create_driver
+from network_capture import find_places, parse_payload
+from replay import ReplayServer
+from selenium_scraper import SeleniumPermitScraper
+from snapshots import SnapshotSet
+
+logger = logging.getLogger(__name__)
+
+# Allowed extraction slowdown against the baseline before a run fails
+EXTRACT_TOLERANCE = 1.25
+
+BROWSER_KINDS = ("search", "place", "form_search")
+OFFLINE_KINDS = ("office_website", "search_payloads")
+
+
+def _extract_in_browser(scraper, kind):
+    if kind == "place":
+        return 1 if scraper._extract_office_details() is not None else 0
+    if kind == "search":
+        return len(scraper.driver.find_elements(By.CSS_SELECTOR, scraper.PLACE_LINK_SELECTOR))
+    return len(scraper._read_google_form_links())
+
+
+def _extract_offline(snapshots, entry):
+    if entry["kind"] == "office_website":
+        return len(SeleniumPermitScraper._find_form_links(snapshots.read_html(entry)))
+    return sum(len(find_places(parse_payload(response["body"]))) for response in snapshots.read_responses(entry))
+
+
+def run_benchmark(directory, runs=3, city="atlanta", lean=True, latency_ms=0):
+    """
+    Time the extraction of every snapshot in a directory.
+    
+    Args:
+        directory (str): The snapshot directory.
+        runs (int): How many times to load and extract each page.
+        city (str): The city the scraper is configured for.
+        lean (bool): Load pages with the lean browser profile.
+        latency_ms (float): Simulated network latency per response, in milliseconds.
+    
+    Returns:
+        list: One result dictionary per page, with its ``kind``, ``url``,
+            ``records`` and median ``load_ms`` and ``extract_ms``.
+    """
+    snapshots = SnapshotSet(directory)
+    results = []
+    
+    for entry in snapshots.snapshots(OFFLINE_KINDS):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            records = _extract_offline(snapshots, entry)
+            timings.append((time.perf_counter() - start) * 1000)
+        results.append({
+            "kind": entry["kind"], "url": entry["url"], "records": records,
+            "load_ms": 0.0, "extract_ms": statistics.median(timings),
+        })
+    
+    browser_entries = [entry for entry in snapshots.snapshots(BROWSER_KINDS) if entry["html"]]
+    if not browser_entries:
+        return results
+    
+    driver = create_driver(headless=True, lean=lean)
+    scraper = SeleniumPermitScraper(city=city, lean=lean, driver=driver)
+    try:
+        with ReplayServer(snapshots.fixtures, latency_ms) as server:
+            for entry in browser_entries:
+                load_timings = []
+                extract_timings = []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    driver.get(server.url_rewriter(entry["url"]))
+                    scraper.waits.page_loaded()
+                    load_timings.append((time.perf_counter() - start) * 1000)
+                    
+                    start = time.perf_counter()
+                    records = _extract_in_browser(scraper, entry["kind"])
+                    extract_timings.append((time.perf_counter() - start) * 1000)
+                results.append({
+                    "kind": entry["kind"], "url": entry["url"], "records": records,
+                    "load_ms": statistics.median(load_timings), "extract_ms": statistics.median(extract_timings),
+                })
+            
+            if server.misses:
+                logger.warning(f"{server.misses} of {server.requests} requests were not in the snapshots")
+    finally:
+        scraper.close()
+        driver.quit()
+    
+    return results
+
+
+def summarize(results):
+    """
+    Combine the page results of each kind.
+    
+    Args:
+        results (list): The page results.
+    
+    Returns:
+        list: One dictionary per kind, with the number of ``pages``, the total
+            ``records`` and the median ``load_ms`` and ``extract_ms`` per page.
+    """
+    summary = []
+    for kind in BROWSER_KINDS + OFFLINE_KINDS:
+        pages = [result for result in results if result["kind"] == kind]
+        if pages:
+            summary.append({
+                "kind": kind,
+                "pages": len(pages),
+                "records": sum(result["records"] for result in pages),
+                "load_ms": statistics.median(result["load_ms"] for result in pages),
+                "extract_ms": statistics.median(result["extract_ms"] for result in pages),
+            })
+    return summary
+
+
+def compare(summary, baseline):
+    """
+    Compare a summary with a saved baseline.
+    
+    Args:
+        summary (list): The summary of this run.
+        baseline (list): The saved summary.
+    
+    Returns:
+        list: A description of each regression; empty if there were none.
+    """
+    regressions = []
+    previous = {row["kind"]: row for row in baseline}
+    
+    for row in summary:
+        before = previous.get(row["kind"])
+        if before is None:
+            continue
+        
+        if row["records"] < before["records"]:
+            regressions.append(f"{row['kind']}: records dropped from {before['records']} to {row['records']}")
+        if before["extract_ms"] and row["extract_ms"] > before["extract_ms"] * EXTRACT_TOLERANCE:
+            regressions.append(
+                f"{row['kind']}: extraction rose from {before['extract_ms']:.2f} to {row['extract_ms']:.2f} ms/page"
+            )
+    
+    return regressions
+
+
+def main():
+    """Main function to run the benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark the Selenium scraper's extraction on recorded snapshots")
+    parser.add_argument("--snapshots", required=True, help="The snapshot directory (see selenium_scraper.py --record)")
+    parser.add_argument("--runs", type=int, default=3, help="Times to load and extract each page (default: 3)")
+    parser.add_argument("--city", default="atlanta", help="The city the scraper is configured for (default: atlanta)")
+    parser.add_argument("--latency", type=float, default=0, help="Simulated latency per response in milliseconds")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Load pages with images, fonts, media and trackers instead of the lean browser profile")
+    parser.add_argument("--pages", action="store_true", help="Report every page, not only each kind of page")
+    parser.add_argument("--save", help="Save the summary to this JSON file")
+    parser.add_argument("--baseline", help="Fail if the summary regresses against this saved JSON file")
+    parser.add_argument("--verbose", action="store_true", help="Show the scraper's log output")
+    args = parser.parse_args()
+    
+    if not args.verbose:
+        # The scraper logs every field it misses, which would dominate the timings
+        logging.disable(logging.WARNING)
+    
+    results = run_benchmark(args.snapshots, args.runs, args.city, not args.full_browser, args.latency)
+    summary = summarize(results)
+    
+    if args.pages:
+        print(f"{'kind':<16} {'records':>8} {'load ms':>9} {'extract ms':>11}  url")
+        for result in results:
+            print(
+                f"{result['kind']:<16} {result['records']:>8} {result['load_ms']:>9.1f} "
+                f"{result['extract_ms']:>11.2f}  {result['url']}"
+            )
+        print()
+    
+    print(f"{'kind':<16} {'pages':>6} {'records':>8} {'load ms':>9} {'extract ms':>11}")
+    for row in summary:
+        print(
+            f"{row['kind']:<16} {row['pages']:>6} {row['records']:>8} "
+            f"{row['load_ms']:>9.1f} {row['extract_ms']:>11.2f}"
+        )
+    
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Saved results to {args.save}")
+    
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(summary, json.load(f))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
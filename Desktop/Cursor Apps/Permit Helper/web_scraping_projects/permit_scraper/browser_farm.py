@@ -0,0 +1,481 @@
+#!/usr/bin/env python
+"""
+Browser Farm
+
+Runs the Selenium scraper across many cities in parallel. Each worker process
+owns one Chrome for its whole life. A coordinator in the parent process hands
+out work through a per-worker inbox: first a "city" task (search the offices
+and the city's forms), then "forms" tasks that split the city's offices over
+the workers. All records come back through a single result queue to one
+writer.
+
+The coordinator keeps the farm within a global memory budget. It sums the RSS
+of every worker and its chromedriver and Chrome processes (this needs psutil).
+Over budget, the largest worker is asked to restart its browser after its
+current task. More than 25% over budget, that worker's browser is killed at
+once; the scraper does not fall back to mock data for a browser that is gone,
+so the worker sees its task fail, starts a new browser and the task is
+retried. Only the browser is killed, never the worker process, which could
+corrupt the shared result queue. Workers that crash, or whose Chrome dies,
+are restarted too, and their task is retried.
+"""
+
+import argparse
+import collections
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from browser_profile import browser_gone, create_driver, kill_process_tree, process_tree_rss_mb, psutil
+from columnar import ColumnarWriter, COLUMNAR_FORMATS
+from selenium_scraper import SeleniumPermitScraper
+from writers import RecordSink, OFFICE_FIELDS, FORM_FIELDS, FILE_EXTENSIONS, concat_files, parse_formats
+
+logger = logging.getLogger(__name__)
+
+
+def farm_worker(worker_id, generation, inbox, results, recycle, parallel_tabs=0, lean=True, network_capture=False):
+    """
+    Run tasks from the inbox in one browser until it hands out None.
+    
+    Every message starts with the kind, the worker number and the generation
+    it was started with. The worker reports ``("browser", worker_id,
+    generation, pid)`` whenever it starts a browser and ``("ready", worker_id,
+    generation, None)`` once it can take tasks. Records are sent as
+    ``("offices", ..., (city, records))`` and ``("forms", ..., (city, key,
+    records))``. Each task ends with ``("done", ..., (task, office_ids))`` or
+    ``("error", ..., (task, message))``. When the worker stops it sends
+    ``("exit", ..., stats)``.
+    
+    Args:
+        worker_id (int): The worker number.
+        generation (int): How many times this worker number has been started,
+            so the coordinator can ignore messages from a replaced process.
+        inbox (multiprocessing.Queue): Tasks for this worker.
+        results (multiprocessing.Queue): Where records and reports are sent.
+        recycle (multiprocessing.Event): Set to make the worker restart its
+            browser after the current task.
+        parallel_tabs (int): Load this many Google Maps results at once.
+        lean (bool): Use the lean browser profile.
+        network_capture (bool): Read Google Maps results from the network
+            payloads instead of the page.
+    """
+    stats = {"tasks": 0, "failed": 0, "records": 0, "browser_restarts": 0}
+    start = time.perf_counter()
+    
+    def send(kind, payload):
+        results.put((kind, worker_id, generation, payload))
+    
+    def restart_browser(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Worker {worker_id} could not close its browser: {str(e)}")
+        driver = create_driver(headless=True, lean=lean, network_log=network_capture)
+        send("browser", driver.service.process.pid)
+        stats["browser_restarts"] += 1
+        recycle.clear()
+        return driver
+    
+    driver = create_driver(headless=True, lean=lean, network_log=network_capture)
+    send("browser", driver.service.process.pid)
+    send("ready", None)
+    
+    while True:
+        task = inbox.get()
+        if task is None:
+            break
+        
+        # The coordinator may have killed the browser while this worker was idle
+        if recycle.is_set():
+            driver = restart_browser(driver)
+        
+        try:
+            office_ids = _run_task(send, task, driver, stats, parallel_tabs, lean, network_capture)
+            send("done", (task, office_ids))
+            stats["tasks"] += 1
+        except Exception as e:
+            logger.error(f"Worker {worker_id} failed on {task[0]} task for {task[1]}: {str(e)}")
+            send("error", (task, str(e)))
+            stats["failed"] += 1
+            # The browser itself may be broken, so start a fresh one
+            if isinstance(e, WebDriverException) or browser_gone(driver, e):
+                recycle.set()
+        
+        if recycle.is_set():
+            driver = restart_browser(driver)
+    
+    driver.quit()
+    stats["seconds"] = time.perf_counter() - start
+    send("exit", stats)
+
+
+def _run_task(send, task, driver, stats, parallel_tabs, lean, network_capture):
+    kind, city = task[0], task[1]
+    scraper = SeleniumPermitScraper(
+        city=city, headless=True, parallel_tabs=parallel_tabs, lean=lean, network_capture=network_capture, driver=driver
+    )
+    try:
+        if kind == "city":
+            offices = scraper.search_permit_offices()
+            for office in offices:
+                if "source_city" not in office:
+                    office["source_city"] = city
+            send("offices", (city, offices))
+            
+            city_forms = scraper.get_permit_forms()
+            send("forms", (city, city, city_forms))
+            stats["records"] += len(offices) + len(city_forms)
+            return [office["id"] for office in offices]
+        
+        for office_id, forms in scraper.get_permit_forms_batch(task[2]).items():
+            send("forms", (city, office_id, forms))
+            stats["records"] += len(forms)
+        return None
+    finally:
+        scraper.close()
+
+
+class FarmWriter:
+    """Writes the records of each city and office as they arrive."""
+    
+    def __init__(self, output_dir="output", formats=("csv", "json"), columnar=None):
+        """
+        Initialize the writer.
+        
+        Args:
+            output_dir (str): Directory the output files are written to.
+            formats (tuple): Any of "csv", "json" and "jsonl".
+            columnar (str, optional): "parquet" or "arrow" to also write columnar files.
+        """
+        self.output_dir = output_dir
+        self.formats = formats
+        self.columnar = columnar
+        self.files = {"offices": {}, "forms": {}}
+        self._written = set()
+    
+    def write(self, dataset, city, key, records):
+        """
+        Write the complete records of a city or office.
+        
+        A retried task sends records again; only the first copy is written.
+        
+        Args:
+            dataset (str): "offices" or "forms".
+            city (str): The city the records belong to.
+            key (str): The city, or the office ID for office forms.
+            records (list): The records.
+        """
+        if (dataset, key) in self._written:
+            return
+        self._written.add((dataset, key))
+        
+        if dataset == "offices":
+            basename, fieldnames = f"{self.output_dir}/{city}_permit_offices", OFFICE_FIELDS
+        elif key == city:
+            basename, fieldnames = f"{self.output_dir}/{city}_permit_forms", FORM_FIELDS
+        else:
+            basename, fieldnames = f"{self.output_dir}/{key}_forms", FORM_FIELDS
+        
+        sink = RecordSink(basename, fieldnames, self.formats)
+        if self.columnar:
+            sink.add_writer(ColumnarWriter(dataset, city, f"{self.output_dir}/columnar", self.columnar))
+        sink.write_all(records)
+        if sink.close():
+            self.files[dataset][key] = basename
+    
+    def write_combined(self, cities, office_ids):
+        """
+        Concatenate the per-city and per-office files, in city and office order.
+        
+        Args:
+            cities (list): The cities in the order they should appear.
+            office_ids (dict): The office IDs of each city, in order.
+        """
+        form_keys = [key for city in cities for key in [city] + office_ids.get(city, [])]
+        for fmt in self.formats:
+            extension = FILE_EXTENSIONS[fmt]
+            for dataset, keys in (("offices", cities), ("forms", form_keys)):
+                sources = [self.files[dataset][key] + extension for key in keys if key in self.files[dataset]]
+                if sources:
+                    concat_files(sources, f"{self.output_dir}/georgia_permit_{dataset}{extension}")
+
+
+class _Worker:
+    """The coordinator's view of one worker process."""
+    
+    def __init__(self, worker_id):
+        self.worker_id = worker_id
+        self.generation = 0
+        self.process = None
+        self.inbox = None
+        self.recycle = None
+        self.browser_pid = None
+        self.task = None
+        self.restarts = 0
+        self.stats = None
+
+
+def run_browser_farm(cities, workers=None, output_dir="output", formats=("csv", "json"), columnar=None,
+                     memory_budget_mb=None, parallel_tabs=0, lean=True, network_capture=False, office_batch_size=None,
+                     max_attempts=2, max_restarts=3, memory_check_interval=5):
+    """
+    Scrape cities with a farm of browser worker processes and write their records.
+    
+    Args:
+        cities (list): The cities to scrape.
+        workers (int, optional): The number of worker processes, each with its
+            own Chrome. Defaults to the number of CPUs.
+        output_dir (str): Directory the output files are written to.
+        formats (tuple): Any of "csv", "json" and "jsonl".
+        columnar (str, optional): "parquet" or "arrow" to also write columnar files.
+        memory_budget_mb (float, optional): The most memory all workers and
+            their browsers may use together. Defaults to 750 MB per worker.
+        parallel_tabs (int): Load this many Google Maps results at once in
+            each browser.
+        lean (bool): Use the lean browser profile.
+        network_capture (bool): Read Google Maps results from the network
+            payloads instead of the page.
+        office_batch_size (int, optional): Offices per forms task. Defaults to
+            spreading each city's offices evenly over the workers.
+        max_attempts (int): How many times a task is tried before it is given up.
+        max_restarts (int): How many times a crashed worker is restarted.
+        memory_check_interval (float): Seconds between memory checks.
+    
+    Returns:
+        list: Per-worker statistics.
+    """
+    worker_count = max(1, workers or os.cpu_count() or 1)
+    memory_budget_mb = memory_budget_mb or worker_count * 750
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs("cache", exist_ok=True)
+    if psutil is None:
+        logger.warning("psutil is not installed, so the memory budget is not enforced")
+    
+    # Bounded so that workers wait for the writer instead of piling up records
+    results = multiprocessing.Queue(maxsize=1000)
+    
+    def start(worker):
+        worker.inbox = multiprocessing.Queue()
+        worker.recycle = multiprocessing.Event()
+        worker.browser_pid = None
+        worker.task = None
+        worker.generation += 1
+        worker.process = multiprocessing.Process(
+            target=farm_worker,
+            args=(worker.worker_id, worker.generation, worker.inbox, results, worker.recycle,
+                  parallel_tabs, lean, network_capture),
+            name=f"browser-worker-{worker.worker_id}"
+        )
+        worker.process.start()
+    
+    farm = [_Worker(worker_id) for worker_id in range(worker_count)]
+    for worker in farm:
+        start(worker)
+    logger.info(f"Started {worker_count} browser workers for {len(cities)} cities, memory budget {memory_budget_mb:.0f} MB")
+    
+    pending = collections.deque(("city", city) for city in cities)
+    attempts = collections.Counter()
+    idle = collections.deque()
+    office_ids = {}
+    writer = FarmWriter(output_dir, formats, columnar)
+    failed = []
+    start_time = time.perf_counter()
+    last_memory_check = time.monotonic()
+    
+    def retry(task, reason):
+        attempts[task] += 1
+        if attempts[task] < max_attempts:
+            logger.warning(f"Retrying {task[0]} task for {task[1]}: {reason}")
+            pending.appendleft(task)
+        else:
+            logger.error(f"Giving up on {task[0]} task for {task[1]}: {reason}")
+            failed.append(task)
+    
+    def replace(worker, reason):
+        """Clean up after a dead or killed worker and start a new one."""
+        if worker.browser_pid:
+            kill_process_tree(worker.browser_pid)
+        if worker in idle:
+            idle.remove(worker)
+        if worker.task is not None:
+            retry(worker.task, reason)
+        if worker.restarts >= max_restarts:
+            logger.error(f"Worker {worker.worker_id} {reason} too often, not restarting it")
+            worker.process = None
+            return
+        worker.restarts += 1
+        logger.warning(f"Restarting worker {worker.worker_id}, which {reason}")
+        start(worker)
+    
+    while pending or any(worker.task is not None for worker in farm):
+        while idle and pending:
+            worker = idle.popleft()
+            worker.task = pending.popleft()
+            worker.inbox.put(worker.task)
+        
+        try:
+            kind, worker_id, generation, payload = results.get(timeout=1)
+        except queue.Empty:
+            # Look for crashed workers only once the queue is drained, so none
+            # of their last messages are missed
+            for worker in farm:
+                if worker.process is not None and not worker.process.is_alive():
+                    replace(worker, f"exited with code {worker.process.exitcode}")
+            if not any(worker.process is not None for worker in farm):
+                logger.error("Every browser worker has failed, stopping the farm")
+                break
+        else:
+            worker = farm[worker_id]
+            if generation != worker.generation and kind not in ("offices", "forms"):
+                # Left over from a process that was replaced; its task is already retried
+                continue
+            if kind == "browser":
+                worker.browser_pid = payload
+            elif kind == "ready":
+                idle.append(worker)
+            elif kind == "offices":
+                writer.write("offices", payload[0], payload[0], payload[1])
+            elif kind == "forms":
+                writer.write("forms", *payload)
+            elif kind == "done":
+                task, ids = payload
+                worker.task = None
+                idle.append(worker)
+                if task[0] == "city":
+                    office_ids[task[1]] = ids
+                    logger.info(f"Found {len(ids)} offices in {task[1]}")
+                    batch_size = office_batch_size or max(1, math.ceil(len(ids) / worker_count))
+                    for i in range(0, len(ids), batch_size):
+                        pending.append(("forms", task[1], tuple(ids[i:i + batch_size])))
+            elif kind == "error":
+                task, message = payload
+                worker.task = None
+                idle.append(worker)
+                retry(task, message)
+        
+        if psutil is not None and time.monotonic() - last_memory_check >= memory_check_interval:
+            last_memory_check = time.monotonic()
+            _enforce_memory_budget(farm, memory_budget_mb)
+    
+    # Stop the workers and collect their statistics
+    for worker in farm:
+        if worker.process is not None:
+            worker.inbox.put(None)
+    deadline = time.monotonic() + 60
+    while any(worker.process is not None and worker.stats is None for worker in farm) and time.monotonic() < deadline:
+        try:
+            kind, worker_id, generation, payload = results.get(timeout=1)
+        except queue.Empty:
+            if not any(worker.process is not None and worker.process.is_alive() for worker in farm):
+                break
+            continue
+        if kind == "exit" and generation == farm[worker_id].generation:
+            farm[worker_id].stats = payload
+    for worker in farm:
+        if worker.process is not None:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+                if worker.browser_pid:
+                    kill_process_tree(worker.browser_pid)
+    
+    writer.write_combined(cities, office_ids)
+    worker_stats = [dict(worker.stats, worker=worker.worker_id, restarts=worker.restarts)
+                    for worker in farm if worker.stats is not None]
+    _log_farm_stats(worker_stats, failed, time.perf_counter() - start_time)
+    return worker_stats
+
+
+def _enforce_memory_budget(farm, budget_mb):
+    usage = {}
+    for worker in farm:
+        if worker.process is not None and worker.process.is_alive():
+            usage[worker] = process_tree_rss_mb(worker.process.pid) or 0
+    total = sum(usage.values())
+    if total <= budget_mb or not usage:
+        return
+    
+    largest = max(usage, key=usage.get)
+    if total > budget_mb * 1.25 and largest.browser_pid:
+        logger.warning(
+            f"Browser farm uses {total:.0f} MB of a {budget_mb:.0f} MB budget, "
+            f"killing the browser of worker {largest.worker_id} ({usage[largest]:.0f} MB)"
+        )
+        # Kill only the browser: killing the worker while it writes to the result
+        # queue can corrupt the queue for every worker. The worker's task fails
+        # with a browser error, it starts a new browser and the task is retried
+        kill_process_tree(largest.browser_pid)
+        largest.browser_pid = None
+        largest.recycle.set()
+    elif not largest.recycle.is_set():
+        logger.info(
+            f"Browser farm uses {total:.0f} MB of a {budget_mb:.0f} MB budget, "
+            f"restarting the browser of worker {largest.worker_id} ({usage[largest]:.0f} MB)"
+        )
+        largest.recycle.set()
+
+
+def _log_farm_stats(worker_stats, failed, elapsed):
+    total_records = 0
+    for stats in sorted(worker_stats, key=lambda s: s["worker"]):
+        seconds = stats["seconds"] or 1e-9
+        logger.info(
+            f"Worker {stats['worker']}: {stats['tasks']} tasks ({stats['failed']} failed), "
+            f"{stats['records']} records, {stats['records'] / seconds:.1f} records/s, "
+            f"{stats['browser_restarts']} browser restarts, {stats['restarts']} worker restarts"
+        )
+        total_records += stats["records"]
+    
+    elapsed = elapsed or 1e-9
+    logger.info(f"Total: {total_records} records in {elapsed:.1f}s ({total_records / elapsed:.1f} records/s)")
+    if failed:
+        logger.warning("Failed tasks: " + ", ".join(f"{task[0]} {task[1]}" for task in failed))
+
+
+def main():
+    """Main function to run the browser farm."""
+    parser = argparse.ArgumentParser(description="Scrape many cities with a farm of browser worker processes")
+    parser.add_argument("--cities", default=",".join(SeleniumPermitScraper.CITY_CONFIGS),
+                        help="Comma-separated cities to scrape (default: all configured cities)")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--memory-budget", type=float,
+                        help="Memory all workers and their browsers may use, in MB (default: 750 per worker)")
+    parser.add_argument("--formats", default="csv,json",
+                        help="Comma-separated output formats: csv, json, jsonl (default: csv,json)")
+    parser.add_argument("--columnar", choices=sorted(COLUMNAR_FORMATS),
+                        help="Also write Parquet or Arrow IPC files partitioned by city to output/columnar")
+    parser.add_argument("--parallel-tabs", type=int, default=0,
+                        help="Load this many Google Maps results at once in separate tabs (default: one at a time)")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Load pages with images, fonts, media and trackers instead of the lean browser profile")
+    parser.add_argument("--network-capture", action="store_true",
+                        help="Read Google Maps results from the network payloads instead of the page")
+    args = parser.parse_args()
+    
+    cities = []
+    for city in args.cities.split(","):
+        city = city.strip().lower().replace(" ", "_")
+        if city in SeleniumPermitScraper.CITY_CONFIGS:
+            cities.append(city)
+        elif city:
+            logger.warning(f"Skipping unknown city: {city}")
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    run_browser_farm(
+        cities, args.workers, formats=formats, columnar=args.columnar, memory_budget_mb=args.memory_budget,
+        parallel_tabs=args.parallel_tabs, lean=not args.full_browser, network_capture=args.network_capture
+    )
+    logger.info("Browser farm completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+"""
+Lean Browser Profile
+
+Chrome settings for scraping text. The scrapers only read text, so the lean
+profile does not download images, fonts, audio or video, and it blocks known ad
+and analytics hosts through the DevTools ``Network.setBlockedURLs`` command.
+Chrome also runs without the features a scraper never uses, such as sync,
+extensions, translation and background networking, and with a smaller window.
+Pages load with the ``eager`` strategy, so ``driver.get`` returns when the
+document has been parsed instead of waiting for every subresource.
+
+Blocking is set per tab: call ``block_resources`` again after switching to a
+newly opened tab, before navigating it.
+
+To compare the full and lean profiles on some pages, run:
+
+    python browser_profile.py https://www.atlantaga.gov https://www.savannahga.gov --runs 3
+
+It reports page-load time, bytes transferred and the RSS of the browser
+processes for each profile. The RSS column needs psutil (``pip install psutil``).
+"""
+
+import argparse
+import logging
+import os
+import signal
+import statistics
+import time
+
+import urllib3
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Images, fonts and media, by file extension, with or without a query string
+BLOCKED_EXTENSIONS = (
+    "png", "jpg", "jpeg", "gif", "webp", "avif", "bmp", "ico", "svg",
+    "woff", "woff2", "ttf", "otf", "eot",
+    "mp4", "webm", "mov", "avi", "mp3", "m4a", "ogg", "wav",
+)
+
+# Ad, analytics and session-recording hosts common on city websites
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "googleadservices.com",
+    "doubleclick.net", "facebook.net", "hotjar.com", "clarity.ms",
+    "newrelic.com", "nr-data.net", "segment.io", "segment.com", "mixpanel.com", "fullstory.com",
+    "quantserve.com", "scorecardresearch.com", "adnxs.com", "siteimproveanalytics.com",
+    "addthis.com", "sharethis.com", "monsido.com", "crazyegg.com",
+)
+
+BLOCKED_URL_PATTERNS = (
+    [f"*.{extension}" for extension in BLOCKED_EXTENSIONS]
+    + [f"*.{extension}?*" for extension in BLOCKED_EXTENSIONS]
+    + [f"*://*{host}/*" for host in BLOCKED_HOSTS]
+)
+
+# Browser features a scraper does not need
+LEAN_ARGUMENTS = (
+    "--disable-extensions",
+    "--disable-gpu",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-domain-reliability",
+    "--disable-client-side-phishing-detection",
+    "--disable-breakpad",
+    "--disable-notifications",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    # Tabs loading in the background should not be throttled
+    "--disable-background-timer-throttling",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-renderer-backgrounding",
+    "--blink-settings=imagesEnabled=false",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+)
+
+
+def chrome_options(headless=True, lean=True, page_load_strategy=None, network_log=False):
+    """
+    Build the Chrome options for a scraper.
+    
+    Args:
+        headless (bool): Whether to run Chrome in headless mode.
+        lean (bool): Use the lean profile instead of a full browser.
+        page_load_strategy (str, optional): "normal", "eager" or "none".
+            Defaults to "eager" for the lean profile and "normal" otherwise.
+        network_log (bool): Log network events to the performance log, for
+            ``network_capture.NetworkCapture``.
+    
+    Returns:
+        Options: The Chrome options.
+    """
+    options = Options()
+    if headless:
+        options.add_argument("--headless")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument(f"user-agent={USER_AGENT}")
+    
+    if lean:
+        options.add_argument("--window-size=1366,768")
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+        options.add_experimental_option("prefs", {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        })
+        options.page_load_strategy = page_load_strategy or "eager"
+    else:
+        options.add_argument("--window-size=1920,1080")
+        options.page_load_strategy = page_load_strategy or "normal"
+    
+    if network_log:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    
+    return options
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """
+    Block requests matching URL patterns in the current tab.
+    
+    Args:
+        driver: The Chrome WebDriver.
+        patterns (list): URL patterns, with ``*`` as a wildcard.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+
+
+def create_driver(headless=True, lean=True, page_load_strategy=None, network_log=False):
+    """
+    Start Chrome with the full or lean scraping profile.
+    
+    Args:
+        headless (bool): Whether to run Chrome in headless mode.
+        lean (bool): Use the lean profile instead of a full browser.
+        page_load_strategy (str, optional): "normal", "eager" or "none".
+        network_log (bool): Log network events to the performance log.
+    
+    Returns:
+        WebDriver: The Chrome WebDriver.
+    """
+    service = Service(ChromeDriverManager().install())
+    driver = webdriver.Chrome(
+        service=service, options=chrome_options(headless, lean, page_load_strategy, network_log)
+    )
+    if lean:
+        block_resources(driver)
+    return driver
+
+
+def browser_rss_mb(driver):
+    """
+    Get the resident memory of a driver's browser processes.
+    
+    Args:
+        driver: The Chrome WebDriver.
+    
+    Returns:
+        float: The RSS of chromedriver and every Chrome process it started, in
+            MB, or None without psutil.
+    """
+    return process_tree_rss_mb(driver.service.process.pid)
+
+
+def process_tree_rss_mb(pid):
+    """
+    Get the resident memory of a process and all its descendants.
+    
+    Args:
+        pid (int): The root process ID.
+    
+    Returns:
+        float: The total RSS in MB, or None without psutil or if the process
+            is gone.
+    """
+    if psutil is None:
+        return None
+    
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return None
+    
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total / (1024 * 1024)
+
+
+def kill_process_tree(pid):
+    """
+    Kill a process and all its descendants, such as chromedriver and its Chrome.
+    
+    Without psutil only the process itself is killed.
+    
+    Args:
+        pid (int): The root process ID.
+    """
+    if psutil is None:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+        return
+    
+    try:
+        root = psutil.Process(pid)
+        processes = root.children(recursive=True) + [root]
+    except psutil.NoSuchProcess:
+        return
+    for process in processes:
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def browser_gone(driver, error):
+    """
+    Tell whether an error means the browser itself is gone, not that a page lacks something.
+    
+    Chromedriver that cannot be reached raises urllib3 connection errors; a
+    dead Chrome behind a live chromedriver fails every command, which is
+    checked by asking for the window handles.
+    
+    Args:
+        driver (WebDriver): The driver the error came from.
+        error (Exception): The error.
+    
+    Returns:
+        bool: True if the browser can no longer be used.
+    """
+    if isinstance(error, (urllib3.exceptions.HTTPError, ConnectionError)):
+        return True
+    if not isinstance(error, WebDriverException):
+        return False
+    try:
+        driver.window_handles
+    except Exception:
+        return True
+    return False
+
+
+def measure_profile(urls, lean, runs=1, headless=True):
+    """
+    Load pages with one profile and measure the cost.
+    
+    Args:
+        urls (list): The pages to load.
+        lean (bool): Measure the lean profile instead of a full browser.
+        runs (int): How many times to load each page.
+        headless (bool): Whether to run Chrome in headless mode.
+    
+    Returns:
+        dict: The mean and median load time in ms, the mean KB transferred per
+            page and the browser RSS in MB after the last page.
+    """
+    driver = create_driver(headless=headless, lean=lean)
+    load_times = []
+    transferred = []
+    try:
+        for _ in range(runs):
+            for url in urls:
+                start = time.perf_counter()
+                try:
+                    driver.get(url)
+                except Exception as e:
+                    logger.warning(f"Error loading {url}: {str(e)}")
+                    continue
+                load_times.append((time.perf_counter() - start) * 1000)
+                transferred.append(driver.execute_script(
+                    "return performance.getEntries()"
+                    ".reduce((total, entry) => total + (entry.transferSize || 0), 0);"
+                ) / 1024)
+        rss = browser_rss_mb(driver)
+    finally:
+        driver.quit()
+    
+    return {
+        "profile": "lean" if lean else "full",
+        "pages": len(load_times),
+        "mean_load_ms": statistics.mean(load_times) if load_times else None,
+        "median_load_ms": statistics.median(load_times) if load_times else None,
+        "mean_kb": statistics.mean(transferred) if transferred else None,
+        "rss_mb": rss,
+    }
+
+
+def main():
+    """Compare page loads with the full and lean profiles."""
+    parser = argparse.ArgumentParser(description="Compare the full and lean browser profiles")
+    parser.add_argument("urls", nargs="+", help="Pages to load")
+    parser.add_argument("--runs", type=int, default=1, help="Times to load each page (default: 1)")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a window")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    
+    def number(value, fmt):
+        return format(value, fmt) if value is not None else "n/a"
+    
+    print(f"{'profile':<8} {'pages':>6} {'mean ms':>9} {'median ms':>10} {'KB/page':>9} {'RSS MB':>8}")
+    for lean in (False, True):
+        result = measure_profile(args.urls, lean, args.runs, headless=not args.show_browser)
+        print(
+            f"{result['profile']:<8} {result['pages']:>6} {number(result['mean_load_ms'], '9.0f')} "
+            f"{number(result['median_load_ms'], '10.0f')} {number(result['mean_kb'], '9.0f')} "
+            f"{number(result['rss_mb'], '8.0f')}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Crawl Checkpoints
+
+An append-only journal of crawl progress, so a crawl that dies halfway can be
+restarted where it stopped instead of from the first city. The journal records
+fetched page URLs, the offices found for each city, the fees or forms scraped
+for each office and the output files of every finished city. Each entry is
+flushed and synced to disk as soon as it is written, so at most the work in
+progress is lost.
+
+On ``--resume`` the scrapers replay the journal: finished cities are skipped,
+and the offices and per-office records already scraped for an unfinished city
+are written out again from the journal instead of being scraped again.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlJournal:
+    """A JSON Lines journal of finished crawl work."""
+    
+    def __init__(self, path, resume=False, fsync=True):
+        """
+        Open the journal.
+        
+        Args:
+            path (str): The journal file.
+            resume (bool): Replay an existing journal. Otherwise any existing
+                journal is discarded and a new crawl starts.
+            fsync (bool): Sync every entry to disk, so entries survive a
+                machine crash as well as a process crash.
+        """
+        self.path = path
+        self.fsync = fsync
+        self.urls = set()
+        self.cities = {}
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        if resume and os.path.exists(path):
+            self._truncate_partial_line()
+            self._replay()
+            finished = sum(1 for city in self.cities.values() if city["done"])
+            logger.info(
+                f"Resuming from {path}: {finished} finished cities, "
+                f"{len(self.cities) - finished} in progress, {len(self.urls)} fetched pages"
+            )
+        elif os.path.exists(path):
+            logger.info(f"Starting a new crawl, discarding checkpoint {path}")
+            os.remove(path)
+        
+        self._file = open(path, "a", encoding="utf-8")
+    
+    def _truncate_partial_line(self):
+        # A crash can leave the last line half-written. Cut it off, so new
+        # entries are not appended to it and lost on the next resume as well
+        with open(self.path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = size
+            # Scan backwards for the last newline; everything after it is incomplete
+            while end > 0:
+                start = max(0, end - 4096)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    end = start + newline + 1
+                    break
+                end = start
+            if end < size:
+                logger.warning(f"Dropping a truncated checkpoint entry at the end of {self.path}")
+                f.truncate(end)
+    
+    def _replay(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash can leave the last line half-written
+                    logger.warning(f"Ignoring truncated checkpoint entry at {self.path}:{line_number}")
+                    continue
+                
+                event = entry.get("event")
+                if event == "url":
+                    self.urls.add(entry["url"])
+                elif event == "offices":
+                    self.city(entry["city"])["offices"] = entry["offices"]
+                elif event == "records":
+                    records = self.city(entry["city"])["records"].setdefault(entry["dataset"], {})
+                    records[entry["key"]] = entry["records"]
+                elif event == "city_done":
+                    checkpoint = self.city(entry["city"])
+                    checkpoint["done"] = True
+                    checkpoint["files"] = entry["files"]
+    
+    def _append(self, entry):
+        entry["at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+    
+    def city(self, city):
+        """
+        Get the checkpoint of a city.
+        
+        Args:
+            city (str): The city.
+        
+        Returns:
+            dict: ``done``; ``files``, the output files per dataset of a
+                finished city; ``offices``, the city's offices or None if they
+                were not scraped yet; and ``records``, the per-office records
+                by dataset and office ID.
+        """
+        if city not in self.cities:
+            self.cities[city] = {"done": False, "files": {}, "offices": None, "records": {}}
+        return self.cities[city]
+    
+    def is_url_done(self, url):
+        """
+        Check whether a page was fetched before the restart.
+        
+        Args:
+            url (str): The page URL.
+        
+        Returns:
+            bool: True if the page was fetched and cached.
+        """
+        return url in self.urls
+    
+    def url_done(self, url):
+        """
+        Record that a page was fetched and cached.
+        
+        Args:
+            url (str): The page URL.
+        """
+        if url not in self.urls:
+            self.urls.add(url)
+            self._append({"event": "url", "url": url})
+    
+    def save_offices(self, city, offices):
+        """
+        Record the offices found for a city.
+        
+        Args:
+            city (str): The city.
+            offices (list): The office records.
+        """
+        self.city(city)["offices"] = offices
+        self._append({"event": "offices", "city": city, "offices": offices})
+    
+    def save_records(self, city, dataset, key, records):
+        """
+        Record the records scraped for one unit of work, such as an office's fees.
+        
+        Args:
+            city (str): The city.
+            dataset (str): The dataset name, e.g. "fees" or "forms".
+            key (str): The unit of work, usually an office ID.
+            records (list): The records.
+        """
+        self.city(city)["records"].setdefault(dataset, {})[key] = records
+        self._append({"event": "records", "city": city, "dataset": dataset, "key": key, "records": records})
+    
+    def get_records(self, city, dataset, key):
+        """
+        Look up records scraped before the restart.
+        
+        Args:
+            city (str): The city.
+            dataset (str): The dataset name.
+            key (str): The unit of work, usually an office ID.
+        
+        Returns:
+            list: The records, or None if this work was not finished.
+        """
+        return self.city(city)["records"].get(dataset, {}).get(key)
+    
+    def city_done(self, city, files):
+        """
+        Record that a city is finished and its output files are written.
+        
+        Args:
+            city (str): The city.
+            files (dict): The output file basenames per dataset.
+        """
+        checkpoint = self.city(city)
+        checkpoint["done"] = True
+        checkpoint["files"] = files
+        self._append({"event": "city_done", "city": city, "files": files})
+    
+    def complete(self):
+        """Close the journal and remove it, since the crawl finished."""
+        self._file.close()
+        os.remove(self.path)
+        logger.info(f"Crawl complete, removed checkpoint {self.path}")
+    
+    def close(self):
+        """Close the journal, keeping it for a later ``--resume``."""
+        self._file.close()
@@ -0,0 +1,235 @@
+"""
+Columnar Output
+
+Optional Parquet / Arrow IPC output for the scraped office, fee and form
+records. Files are partitioned by ``source_city`` using hive-style
+directories (``output/columnar/<format>/<dataset>/source_city=<city>/``), use an
+explicit schema, and dictionary-encode low-cardinality columns such as
+``state``, ``permit_type`` and ``source``. Loading many crawls back is a
+memory-mapped scan instead of re-parsing CSV and JSON.
+
+Requires pyarrow (``pip install pyarrow``).
+"""
+
+import logging
+import os
+import uuid
+from datetime import datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Columnar output requires pyarrow. Install it with: pip install pyarrow")
+
+
+def _category():
+    return pa.dictionary(pa.int32(), pa.string())
+
+
+def get_schema(dataset):
+    """
+    Get the explicit Arrow schema for a dataset.
+    
+    ``source_city`` is not part of the schema because it is stored in the
+    partition directory name.
+    
+    Args:
+        dataset (str): One of "offices", "fees" or "forms".
+    
+    Returns:
+        pyarrow.Schema: The dataset schema.
+    """
+    _require_pyarrow()
+    
+    if dataset == "offices":
+        return pa.schema([
+            ("id", pa.string()),
+            ("name", pa.string()),
+            ("address", pa.string()),
+            ("city", _category()),
+            ("state", _category()),
+            ("zip", pa.string()),
+            ("phone", pa.string()),
+            ("email", pa.string()),
+            ("website", pa.string()),
+            ("hours", pa.string()),
+            ("latitude", pa.float64()),
+            ("longitude", pa.float64()),
+            ("distance", pa.float64()),
+            ("source", _category()),
+            ("scraped_at", pa.timestamp("s")),
+        ])
+    elif dataset == "fees":
+        return pa.schema([
+            ("id", pa.string()),
+            ("name", pa.string()),
+            ("amount", pa.float64()),
+            ("amount_max", pa.float64()),
+            ("unit", _category()),
+            ("description", pa.string()),
+            ("office_id", pa.string()),
+            ("permit_type", _category()),
+            ("scraped_at", pa.timestamp("s")),
+        ])
+    elif dataset == "forms":
+        return pa.schema([
+            ("id", pa.string()),
+            ("title", pa.string()),
+            ("description", pa.string()),
+            ("file_url", pa.string()),
+            ("file_type", _category()),
+            ("file_size", pa.int64()),
+            ("last_updated", pa.date32()),
+            ("office_id", pa.string()),
+            ("permit_type", _category()),
+            ("source", _category()),
+            ("scraped_at", pa.timestamp("s")),
+        ])
+    
+    raise ValueError(f"Unknown dataset: {dataset}")
+
+
+def _convert(value, field_type):
+    """Coerce a scraped value to the Python type Arrow expects for a column."""
+    if value is None or value == "":
+        return None
+    
+    try:
+        if pa.types.is_timestamp(field_type):
+            return datetime.strptime(value, "%Y-%m-%d %H:%M:%S") if isinstance(value, str) else value
+        if pa.types.is_date32(field_type):
+            return datetime.strptime(value, "%Y-%m-%d").date() if isinstance(value, str) else value
+        if pa.types.is_floating(field_type):
+            return float(value)
+        if pa.types.is_integer(field_type):
+            return int(value)
+    except (TypeError, ValueError):
+        return None
+    
+    return str(value)
+
+
+class ColumnarWriter:
+    """Writes one city's records for a dataset to a Parquet or Arrow IPC file."""
+    
+    def __init__(self, dataset, source_city, root="output/columnar", fmt="parquet", batch_size=1000):
+        """
+        Open the writer.
+        
+        Each run writes a new part file into the city's partition directory,
+        so repeated crawls accumulate and can be scanned together.
+        
+        Args:
+            dataset (str): One of "offices", "fees" or "forms".
+            source_city (str): The partition the records belong to.
+            root (str): The root directory of the columnar datasets.
+            fmt (str): "parquet" or "arrow".
+            batch_size (int): Records buffered before a record batch is written.
+        """
+        _require_pyarrow()
+        
+        if fmt not in COLUMNAR_FORMATS:
+            raise ValueError(f"Unknown columnar format: {fmt}")
+        
+        self.schema = get_schema(dataset)
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.count = 0
+        self._columns = {field.name: [] for field in self.schema}
+        self._buffered = 0
+        
+        partition_dir = os.path.join(root, fmt, dataset, f"source_city={source_city}")
+        os.makedirs(partition_dir, exist_ok=True)
+        
+        run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        self.filename = os.path.join(partition_dir, f"part-{run_id}{COLUMNAR_FORMATS[fmt]}")
+        # The leading dot keeps unfinished files out of dataset scans
+        self._tmp_filename = os.path.join(partition_dir, f".part-{run_id}.{os.getpid()}.tmp")
+        
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(self._tmp_filename, self.schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(self._tmp_filename, "wb")
+            self._writer = pa.ipc.new_file(self._sink, self.schema)
+    
+    def write(self, record):
+        """
+        Buffer a single record, writing a record batch when the buffer is full.
+        
+        Args:
+            record (dict): The record to write. Fields outside the schema are ignored.
+        """
+        for field in self.schema:
+            self._columns[field.name].append(_convert(record.get(field.name), field.type))
+        self._buffered += 1
+        self.count += 1
+        
+        if self._buffered >= self.batch_size:
+            self._flush()
+    
+    def close(self):
+        """Write any buffered records and move the file into place."""
+        self._flush()
+        self._writer.close()
+        if self.fmt == "arrow":
+            self._sink.close()
+        os.replace(self._tmp_filename, self.filename)
+        logger.info(f"Saved {self.count} records to {self.filename}")
+    
+    def discard(self):
+        """Throw away everything written."""
+        self._writer.close()
+        if self.fmt == "arrow":
+            self._sink.close()
+        os.remove(self._tmp_filename)
+    
+    def _flush(self):
+        if not self._buffered:
+            return
+        
+        arrays = [pa.array(self._columns[field.name], type=field.type) for field in self.schema]
+        self._writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        
+        for values in self._columns.values():
+            values.clear()
+        self._buffered = 0
+
+
+def load_dataset(dataset, root="output/columnar", fmt="parquet"):
+    """
+    Open all crawls of a dataset as a single memory-mapped Arrow dataset.
+    
+    Args:
+        dataset (str): One of "offices", "fees" or "forms".
+        root (str): The root directory of the columnar datasets.
+        fmt (str): "parquet" or "arrow".
+    
+    Returns:
+        pyarrow.dataset.Dataset: The dataset, with ``source_city`` restored
+        from the partition directories. Use ``.to_table(filter=...)`` to scan.
+    """
+    _require_pyarrow()
+    
+    # The explicit schema keeps columns added since older part files were
+    # written; those files read them as nulls
+    partition = pa.field("source_city", pa.string())
+    partitioning = ds.partitioning(pa.schema([partition]), flavor="hive")
+    return ds.dataset(
+        os.path.join(root, fmt, dataset),
+        schema=get_schema(dataset).append(partition),
+        format="parquet" if fmt == "parquet" else "ipc",
+        partitioning=partitioning,
+        filesystem=pafs.LocalFileSystem(use_mmap=True),
+    )
@@ -0,0 +1,278 @@
+"""
+Incremental Crawl Support
+
+Remembers what the last crawl saw so the next one can skip unchanged work:
+
+- per-page fingerprints (content hash plus ETag/Last-Modified validators),
+  so pages can be revalidated with conditional requests and unchanged pages
+  hit the extraction cache instead of being re-parsed
+- per-record hashes for offices, fees and forms, so each run can emit a
+  compact change log of added, removed and modified records
+"""
+
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Fields that change on every run without the underlying record changing
+VOLATILE_FIELDS = ("scraped_at",)
+
+
+def record_hash(record, volatile_fields=VOLATILE_FIELDS):
+    """
+    Hash a record's content, ignoring volatile fields.
+    
+    Args:
+        record (dict): The record to hash.
+        volatile_fields (tuple): Field names to leave out of the hash.
+    
+    Returns:
+        str: A hex digest of the record content.
+    """
+    content = {k: v for k, v in record.items() if k not in volatile_fields}
+    serialized = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class CrawlState:
+    """Fingerprints of pages and records from previous crawls."""
+    
+    def __init__(self, state_file="cache/crawl_state.json"):
+        """
+        Load the crawl state.
+        
+        Args:
+            state_file (str): Where the state is persisted between runs.
+        """
+        self.state_file = state_file
+        self.pages = {}
+        self.records = {}
+        
+        if os.path.exists(state_file):
+            try:
+                with open(state_file, "r", encoding="utf-8") as f:
+                    state = json.load(f)
+                self.pages = state.get("pages", {})
+                self.records = state.get("records", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable crawl state {state_file}: {str(e)}")
+        
+        self.changed_pages = 0
+        self.unchanged_pages = 0
+    
+    def conditional_headers(self, url):
+        """
+        Build conditional request headers for a previously seen page.
+        
+        Args:
+            url (str): The page URL.
+        
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers, possibly empty.
+        """
+        page = self.pages.get(url, {})
+        headers = {}
+        if page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
+        return headers
+    
+    def record_page(self, url, html, headers=None):
+        """
+        Record a page fingerprint and report whether it changed.
+        
+        Args:
+            url (str): The page URL.
+            html (str): The page content.
+            headers (dict, optional): Response headers carrying validators.
+        
+        Returns:
+            bool: True if the page is new or its content changed.
+        """
+        fingerprint = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        previous = self.pages.get(url, {})
+        changed = previous.get("sha256") != fingerprint
+        
+        page = {
+            "sha256": fingerprint,
+            "etag": previous.get("etag"),
+            "last_modified": previous.get("last_modified"),
+            "checked_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+        if headers is not None:
+            page["etag"] = headers.get("ETag")
+            page["last_modified"] = headers.get("Last-Modified")
+        self.pages[url] = page
+        
+        if changed:
+            self.changed_pages += 1
+        else:
+            self.unchanged_pages += 1
+        return changed
+    
+    def diff(self, dataset, scope, records):
+        """
+        Compare records against the previous crawl of the same scope.
+        
+        The stored hashes are replaced with the new ones, so calling this
+        twice with the same records yields an empty diff the second time.
+        
+        Args:
+            dataset (str): The dataset name (e.g. "offices", "fees", "forms").
+            scope (str): The unit that was fully re-crawled, usually a city.
+                Records are only reported as removed within the same scope.
+            records (list): The records found in this crawl.
+        
+        Returns:
+            dict: Lists of ``added`` and ``modified`` records and ``removed`` IDs.
+        """
+        tracker = self.track(dataset, scope)
+        for record in records:
+            tracker.add(record)
+        return tracker.finish()
+    
+    def track(self, dataset, scope):
+        """
+        Start comparing a stream of records against the previous crawl.
+        
+        Args:
+            dataset (str): The dataset name (e.g. "offices", "fees", "forms").
+            scope (str): The unit that was fully re-crawled, usually a city.
+        
+        Returns:
+            RecordTracker: Feed it records with ``add`` and call ``finish``.
+        """
+        return RecordTracker(self, dataset, scope)
+    
+    def save(self):
+        """Persist the crawl state atomically."""
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_file = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"pages": self.pages, "records": self.records}, f)
+        os.replace(tmp_file, self.state_file)
+        
+        logger.info(
+            f"Saved crawl state ({self.changed_pages} changed pages, "
+            f"{self.unchanged_pages} unchanged)"
+        )
+
+
+class RecordTracker:
+    """Diffs a stream of records against the previous crawl of a scope."""
+    
+    def __init__(self, crawl_state, dataset, scope):
+        """
+        Initialize the tracker.
+        
+        Args:
+            crawl_state (CrawlState): The state holding previous record hashes.
+            dataset (str): The dataset name.
+            scope (str): The scope being re-crawled.
+        """
+        self.crawl_state = crawl_state
+        self.dataset = dataset
+        self.scope = scope
+        self.previous = crawl_state.records.get(dataset, {}).get(scope, {})
+        self.current = {}
+        self.added = []
+        self.modified = []
+    
+    def add(self, record):
+        """
+        Compare a single record. Only the hash of unchanged records is kept.
+        
+        Args:
+            record (dict): The record found in this crawl.
+        """
+        record_id = record.get("id")
+        if record_id is None:
+            return
+        
+        digest = record_hash(record)
+        self.current[record_id] = digest
+        
+        if record_id not in self.previous:
+            self.added.append(record)
+        elif self.previous[record_id] != digest:
+            self.modified.append(record)
+    
+    def finish(self):
+        """
+        Finish the comparison and store the new hashes in the crawl state.
+        
+        Returns:
+            dict: Lists of ``added`` and ``modified`` records and ``removed`` IDs.
+        """
+        removed = [record_id for record_id in self.previous if record_id not in self.current]
+        self.crawl_state.records.setdefault(self.dataset, {})[self.scope] = self.current
+        return {"added": self.added, "modified": self.modified, "removed": removed}
+
+
+class ChangeLog:
+    """A compact JSON Lines log of record changes between crawls."""
+    
+    def __init__(self, output_dir="output"):
+        """
+        Open a change log for this run.
+        
+        Args:
+            output_dir (str): Directory the change log is written to.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        self.filename = f"{output_dir}/changes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self.counts = {"added": 0, "modified": 0, "removed": 0}
+        self._file = None
+    
+    def write(self, dataset, scope, diff):
+        """
+        Append the changes from a diff to the log.
+        
+        Args:
+            dataset (str): The dataset name.
+            scope (str): The scope the diff was computed for.
+            diff (dict): A diff as returned by ``CrawlState.diff``.
+        
+        Returns:
+            int: The number of changes written.
+        """
+        entries = []
+        for record in diff["added"]:
+            entries.append({"op": "added", "dataset": dataset, "scope": scope, "id": record["id"], "record": record})
+        for record in diff["modified"]:
+            entries.append({"op": "modified", "dataset": dataset, "scope": scope, "id": record["id"], "record": record})
+        for record_id in diff["removed"]:
+            entries.append({"op": "removed", "dataset": dataset, "scope": scope, "id": record_id})
+        
+        if not entries:
+            return 0
+        
+        if self._file is None:
+            self._file = open(self.filename, "a", encoding="utf-8")
+        
+        for entry in entries:
+            self._file.write(json.dumps(entry) + "\n")
+            self.counts[entry["op"]] += 1
+        self._file.flush()
+        
+        return len(entries)
+    
+    def close(self):
+        """Close the log and report a summary."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            logger.info(
+                f"Wrote change log {self.filename}: {self.counts['added']} added, "
+                f"{self.counts['modified']} modified, {self.counts['removed']} removed"
+            )
+        else:
+            logger.info("No changes since the last crawl")
@@ -0,0 +1,128 @@
+"""
+Extraction Cache
+
+Second cache tier for the permit scrapers. The page cache in ``cache/*.html``
+saves us the network round trip, but every run still has to rebuild a
+BeautifulSoup tree and re-run extraction. This cache stores the structured
+extraction output instead, keyed by a hash of the page content and the
+extractor version, so unchanged pages skip parsing entirely.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractionCache:
+    """A content-addressed cache for structured extraction results."""
+    
+    def __init__(self, cache_dir="cache/extracted", version="1"):
+        """
+        Initialize the extraction cache.
+        
+        Args:
+            cache_dir (str): Directory where extraction results are stored.
+            version (str): The extractor version. Bump it whenever extraction
+                logic changes so stale results are never reused.
+        """
+        self.cache_dir = cache_dir
+        self.version = str(version)
+        self._memory = {}
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def make_key(self, kind, html):
+        """
+        Build the cache key for a page.
+        
+        Args:
+            kind (str): The kind of extraction (e.g. "offices", "fees").
+            html (str): The raw page content.
+        
+        Returns:
+            str: A hex digest identifying the extraction result.
+        """
+        digest = hashlib.sha256(f"{kind}\0{self.version}\0".encode("utf-8"))
+        digest.update(html.encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, kind, html):
+        """
+        Look up a cached extraction result.
+        
+        Args:
+            kind (str): The kind of extraction.
+            html (str): The raw page content.
+        
+        Returns:
+            Any: The cached result, or None on a cache miss.
+        """
+        key = self.make_key(kind, html)
+        
+        # Results are kept serialized in memory so callers can freely
+        # mutate what they get back without corrupting the cache
+        if key not in self._memory:
+            cache_file = self._cache_file(kind, key)
+            if not os.path.exists(cache_file):
+                return None
+            
+            try:
+                with open(cache_file, "r", encoding="utf-8") as f:
+                    self._memory[key] = f.read()
+            except OSError as e:
+                logger.warning(f"Ignoring unreadable extraction cache {cache_file}: {str(e)}")
+                return None
+        
+        try:
+            return json.loads(self._memory[key])
+        except ValueError as e:
+            logger.warning(f"Ignoring corrupt extraction cache entry for {kind}: {str(e)}")
+            del self._memory[key]
+            return None
+    
+    def put(self, kind, html, result):
+        """
+        Store an extraction result.
+        
+        Args:
+            kind (str): The kind of extraction.
+            html (str): The raw page content the result was extracted from.
+            result (Any): A JSON-serializable extraction result.
+        """
+        key = self.make_key(kind, html)
+        serialized = json.dumps(result)
+        self._memory[key] = serialized
+        
+        # Write to a temporary file first so readers never see a partial entry
+        cache_file = self._cache_file(kind, key)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(serialized)
+        os.replace(tmp_file, cache_file)
+    
+    def get_or_extract(self, kind, html, extract_func):
+        """
+        Return the cached extraction result or run the extractor.
+        
+        Args:
+            kind (str): The kind of extraction.
+            html (str): The raw page content.
+            extract_func (callable): Called with no arguments on a cache miss.
+        
+        Returns:
+            Any: The cached or freshly extracted result.
+        """
+        result = self.get(kind, html)
+        if result is not None:
+            logger.info(f"Using cached {kind} extraction")
+            return result
+        
+        result = extract_func()
+        self.put(kind, html, result)
+        return result
+    
+    def _cache_file(self, kind, key):
+        return os.path.join(self.cache_dir, f"{kind}-{key}.json")
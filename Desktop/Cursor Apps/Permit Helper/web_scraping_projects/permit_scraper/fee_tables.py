@@ -0,0 +1,366 @@
+"""
+Fee Schedule Table Extraction
+
+A streaming extractor for fee schedule tables. Municipal fee schedules often
+run to thousands of rows spread across many tables, with tiered ranges and
+per-unit rates. Instead of building a BeautifulSoup tree and walking it row by
+row, this parses the HTML in a single pass with the standard library's
+``HTMLParser``, so pages can be fed in chunks and only the table currently
+being read is held in memory.
+
+For each table the extractor detects the header row and the columns holding
+amounts, then yields typed ``FeeRow`` tuples. Amounts such as ``$1,250.00``,
+``$100 - $500``, ``$0.25 per sq ft`` and ``2% of valuation`` are understood.
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import NamedTuple, Optional
+
+
+class FeeRow(NamedTuple):
+    """A single fee parsed from a fee schedule table."""
+    
+    table: int
+    row: int
+    column: int
+    name: str
+    amount: float
+    amount_max: Optional[float]
+    unit: Optional[str]
+    description: str
+
+
+# A money amount: optional "$", thousands separators and cents
+_MONEY = r"\$?\s*(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?"
+_MONEY_RE = re.compile(_MONEY)
+_DOLLAR_RE = re.compile(r"\$\s*\d")
+_RANGE_RE = re.compile(_MONEY + r"\s*(?:-|–|—|to)\s*" + _MONEY, re.I)
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*%")
+_UNIT_RE = re.compile(r"(?:\bper\b|/|\beach\b|\bea\.?)\s*([^;()]*)", re.I)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+_UNIT_ALIASES = [
+    (re.compile(r"^(?:sq\.?\s*f(?:oo)?t\.?|square\s+f(?:oo|ee)t|sf|s\.f\.)", re.I), "sq ft"),
+    (re.compile(r"^(?:lin(?:ear)?\.?\s*f(?:oo)?t\.?|linear\s+f(?:oo|ee)t|lf)", re.I), "linear ft"),
+    (re.compile(r"^(?:hour|hr)s?\b", re.I), "hour"),
+    (re.compile(r"^\$?\s*1,?000\b", re.I), "$1,000 valuation"),
+    (re.compile(r"^\$?\s*100\b", re.I), "$100 valuation"),
+]
+
+_AMOUNT_HEADER_RE = re.compile(r"fee|amount|cost|price|rate|charge|total|\$", re.I)
+_NAME_HEADER_RE = re.compile(r"description|item|type|service|permit|name|category|activity|valuation", re.I)
+_NO_FEE_RE = re.compile(r"^(?:no\s+(?:fee|charge)|free|n/?c)$", re.I)
+
+
+def _to_float(whole, cents):
+    return float(whole.replace(",", "") + ("." + cents if cents else ""))
+
+
+def _normalize_unit(text):
+    text = text.strip(" .:,-")
+    if not text:
+        return "each"
+    for pattern, unit in _UNIT_ALIASES:
+        if pattern.match(text):
+            return unit
+    return text.lower()[:40]
+
+
+def parse_amount(text, require_dollar=True):
+    """
+    Parse a fee amount cell.
+    
+    Args:
+        text (str): The cell text, e.g. "$1,250.00", "$100 - $500",
+            "$0.25 per sq ft" or "2% of valuation".
+        require_dollar (bool): Only accept plain numbers such as "125.00" when
+            False. Used for columns already known to hold amounts.
+    
+    Returns:
+        tuple: ``(amount, amount_max, unit)``, or None if no amount was found.
+            ``amount_max`` is set for ranges and ``unit`` for per-unit rates.
+    """
+    text = text.strip()
+    if not text:
+        return None
+    
+    if _NO_FEE_RE.match(text):
+        return 0.0, None, None
+    
+    percent = _PERCENT_RE.search(text)
+    if percent and not _DOLLAR_RE.search(text):
+        return float(percent.group(1)), None, "percent"
+    
+    if require_dollar and not _DOLLAR_RE.search(text):
+        return None
+    
+    unit_match = _UNIT_RE.search(text)
+    unit = _normalize_unit(unit_match.group(1)) if unit_match else None
+    
+    range_match = _RANGE_RE.search(text)
+    if range_match:
+        low = _to_float(range_match.group(1), range_match.group(2))
+        high = _to_float(range_match.group(3), range_match.group(4))
+        return min(low, high), max(low, high), unit
+    
+    money_match = _MONEY_RE.search(text)
+    if not money_match:
+        return None
+    
+    # Outside known amount columns, a bare number must be the whole cell
+    if not require_dollar and "$" not in text and unit is None and money_match.group(0).strip() != text:
+        return None
+    
+    return _to_float(money_match.group(1), money_match.group(2)), None, unit
+
+
+class _Table:
+    """Rows collected for the table currently being parsed."""
+    
+    __slots__ = ("index", "rows", "row", "cell", "cell_is_header", "in_head", "caption")
+    
+    def __init__(self, index):
+        self.index = index
+        self.rows = []
+        self.row = None
+        self.cell = None
+        self.cell_is_header = False
+        self.in_head = False
+        self.caption = []
+
+
+class FeeTableParser(HTMLParser):
+    """Single-pass parser that turns every fee table on a page into ``FeeRow``s."""
+    
+    def __init__(self, min_amount_ratio=0.5):
+        """
+        Initialize the parser.
+        
+        Args:
+            min_amount_ratio (float): A column counts as an amount column
+                when at least this fraction of its non-empty cells parse as
+                amounts.
+        """
+        super().__init__(convert_charrefs=True)
+        self.min_amount_ratio = min_amount_ratio
+        self.fee_rows = []
+        self.table_count = 0
+        self._tables = []
+        self._skip = 0
+    
+    def feed_chunks(self, chunks):
+        """
+        Feed the page in chunks, yielding fee rows as each table is completed.
+        
+        Args:
+            chunks (iterable): Pieces of the HTML page, in order.
+        
+        Yields:
+            FeeRow: The parsed fees.
+        """
+        for chunk in chunks:
+            self.feed(chunk)
+            yield from self._drain()
+        self.close()
+        yield from self._drain()
+    
+    def _drain(self):
+        rows, self.fee_rows = self.fee_rows, []
+        return rows
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif tag == "table":
+            self._tables.append(_Table(self.table_count))
+            self.table_count += 1
+        elif not self._tables:
+            return
+        elif tag == "thead":
+            self._tables[-1].in_head = True
+        elif tag == "tr":
+            table = self._tables[-1]
+            self._end_row(table)
+            table.row = []
+        elif tag in ("td", "th"):
+            table = self._tables[-1]
+            self._end_cell(table)
+            if table.row is None:
+                table.row = []
+            colspan = dict(attrs).get("colspan") or "1"
+            table.cell = []
+            table.cell_is_header = tag == "th" or table.in_head
+            table.row.append((table.cell, table.cell_is_header, int(colspan) if colspan.isdigit() else 1))
+        elif tag == "br":
+            self.handle_data(" ")
+    
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif not self._tables:
+            return
+        elif tag == "table":
+            table = self._tables.pop()
+            self._end_row(table)
+            self._process_table(table)
+        elif tag == "thead":
+            self._tables[-1].in_head = False
+        elif tag == "tr":
+            self._end_row(self._tables[-1])
+        elif tag in ("td", "th"):
+            self._end_cell(self._tables[-1])
+    
+    def handle_data(self, data):
+        if self._skip or not self._tables:
+            return
+        table = self._tables[-1]
+        if table.cell is not None:
+            table.cell.append(data)
+        elif table.row is None:
+            table.caption.append(data)
+    
+    def close(self):
+        super().close()
+        while self._tables:
+            table = self._tables.pop()
+            self._end_row(table)
+            self._process_table(table)
+    
+    def _end_cell(self, table):
+        table.cell = None
+    
+    def _end_row(self, table):
+        self._end_cell(table)
+        if table.row:
+            cells = []
+            is_header = all(header for _, header, _ in table.row)
+            for parts, _, colspan in table.row:
+                text = _WHITESPACE_RE.sub(" ", "".join(parts)).strip()
+                cells.append(text)
+                # Pad spanned columns so later cells stay aligned
+                cells.extend([""] * (colspan - 1))
+            table.rows.append((cells, is_header))
+        table.row = None
+    
+    def _process_table(self, table):
+        rows = table.rows
+        if not rows:
+            return
+        
+        width = max(len(cells) for cells, _ in rows)
+        
+        # The header is the last header-only row before the data, or a first
+        # row without any amounts in it
+        header = None
+        data_start = 0
+        for i, (cells, is_header) in enumerate(rows):
+            if is_header:
+                header, data_start = cells, i + 1
+            else:
+                break
+        if header is None and len(rows) > 1:
+            first = rows[0][0]
+            if len(first) > 1 and not any(parse_amount(cell, require_dollar=False) for cell in first):
+                header, data_start = first, 1
+        
+        amount_columns = self._detect_amount_columns(rows[data_start:], header, width)
+        if not amount_columns:
+            return
+        
+        name_column = self._detect_name_column(rows[data_start:], header, width, amount_columns)
+        section = _WHITESPACE_RE.sub(" ", "".join(table.caption)).strip()
+        
+        for row_index, (cells, _) in enumerate(rows[data_start:], data_start):
+            filled = [cell for cell in cells if cell]
+            
+            # A single spanning cell is a section heading, e.g. "Residential"
+            if len(filled) == 1 and len(cells) > 1 and not parse_amount(filled[0]):
+                section = filled[0]
+                continue
+            
+            name = cells[name_column] if name_column < len(cells) else ""
+            if not name:
+                continue
+            
+            other_text = [
+                cell for i, cell in enumerate(cells)
+                if cell and i != name_column and i not in amount_columns
+            ]
+            description = "; ".join(([section] if section else []) + [name] + other_text)
+            
+            for column in amount_columns:
+                if column >= len(cells):
+                    continue
+                parsed = parse_amount(cells[column], require_dollar=False)
+                if parsed is None:
+                    continue
+                
+                amount, amount_max, unit = parsed
+                fee_name = name
+                if len(amount_columns) > 1 and header and column < len(header) and header[column]:
+                    fee_name = f"{name} ({header[column]})"
+                
+                self.fee_rows.append(FeeRow(
+                    table.index, row_index, column, fee_name, amount, amount_max, unit, description
+                ))
+    
+    def _detect_amount_columns(self, rows, header, width):
+        # Columns mostly holding dollar amounts, plus columns whose header says
+        # they hold fees. Headers like "Fee" also label the name column, so
+        # labelled columns must hold amounts too
+        columns = {
+            column for column in range(width)
+            if self._amount_ratio(rows, column, True) >= self.min_amount_ratio
+        }
+        if header:
+            columns.update(
+                i for i, label in enumerate(header)
+                if _AMOUNT_HEADER_RE.search(label) and not _NAME_HEADER_RE.search(label)
+                and self._amount_ratio(rows, i, False) >= self.min_amount_ratio
+            )
+        
+        # Fall back to columns of bare numbers, e.g. "125.00"
+        if not columns:
+            columns = {
+                column for column in range(1, width)
+                if self._amount_ratio(rows, column, False) >= self.min_amount_ratio
+            }
+        columns = sorted(columns)
+        
+        # The leftmost column names the fee, even when it holds valuation tiers
+        if len(columns) > 1 and columns[0] == 0:
+            columns = columns[1:]
+        return columns
+    
+    def _amount_ratio(self, rows, column, require_dollar):
+        values = [cells[column] for cells, _ in rows if column < len(cells) and cells[column]]
+        if not values:
+            return 0.0
+        return sum(1 for value in values if parse_amount(value, require_dollar)) / len(values)
+    
+    def _detect_name_column(self, rows, header, width, amount_columns):
+        candidates = [i for i in range(width) if i not in amount_columns]
+        if not candidates:
+            return 0
+        if header:
+            for i in candidates:
+                if i < len(header) and _NAME_HEADER_RE.search(header[i]):
+                    return i
+        return candidates[0]
+
+
+def extract_fee_rows(html, chunk_size=1 << 16):
+    """
+    Extract every fee from the tables of a fee schedule page.
+    
+    Args:
+        html (str): The page HTML.
+        chunk_size (int): How much of the page to feed the parser at a time.
+    
+    Returns:
+        list: The ``FeeRow``s in document order.
+    """
+    parser = FeeTableParser()
+    chunks = (html[i:i + chunk_size] for i in range(0, len(html), chunk_size))
+    return list(parser.feed_chunks(chunks))
@@ -0,0 +1,212 @@
+"""
+Form Metadata
+
+Fills in the real size, modification date and content type of discovered form
+files without downloading them. Each file gets a ``HEAD`` request. If the
+server refuses ``HEAD`` or leaves out the length, a ``GET`` for the first byte
+(``Range: bytes=0-0``) is sent instead, and the total size is read from
+``Content-Range``. Requests run concurrently through the shared session in
+``transport.py``, so a few hundred forms take seconds.
+
+Results are cached per URL in ``cache/form_metadata.json``. Entries younger
+than a day are used as they are. Older entries are revalidated with
+``If-None-Match`` / ``If-Modified-Since``, so unchanged files cost a
+``304 Not Modified``.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from transport import get_session
+
+logger = logging.getLogger(__name__)
+
+CONTENT_RANGE_TOTAL = re.compile(r"/\s*(\d+)\s*$")
+
+
+class FormMetadata:
+    """Looks up and caches the metadata of form files."""
+    
+    def __init__(self, cache_file="cache/form_metadata.json", max_age=86400, max_workers=16, timeout=10):
+        """
+        Initialize the metadata lookup.
+        
+        Args:
+            cache_file (str): Where the metadata of each URL is cached.
+            max_age (float): Seconds before a cached entry is revalidated.
+            max_workers (int): Requests in flight at once.
+            timeout (float): Seconds to wait for each response.
+        """
+        self.cache_file = cache_file
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.session = get_session()
+        self.entries = self._load()
+        self.changed = False
+        self.stats = {"cached": 0, "revalidated": 0, "head": 0, "range": 0, "failed": 0}
+        self._lock = threading.Lock()
+    
+    def _load(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable form metadata cache {self.cache_file}: {str(e)}")
+            return {}
+    
+    def enrich(self, forms):
+        """
+        Fill in ``file_size``, ``last_updated`` and ``file_type`` of forms in place.
+        
+        Values the server does not report are left as they were.
+        
+        Args:
+            forms (list): Form records with a ``file_url``.
+        
+        Returns:
+            list: The same forms.
+        """
+        urls = list(dict.fromkeys(form["file_url"] for form in forms if form.get("file_url")))
+        if not urls:
+            return forms
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls))) as executor:
+            metadata = dict(zip(urls, executor.map(self.lookup, urls)))
+        
+        for form in forms:
+            entry = metadata.get(form.get("file_url"))
+            if not entry:
+                continue
+            if entry.get("size") is not None:
+                form["file_size"] = entry["size"]
+            if entry.get("last_modified"):
+                form["last_updated"] = entry["last_modified"]
+            if entry.get("content_type"):
+                form["file_type"] = entry["content_type"]
+        
+        logger.info(f"Looked up metadata for {len(urls)} form files in {time.perf_counter() - start:.1f}s")
+        return forms
+    
+    def _count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+    
+    def lookup(self, url):
+        """
+        Get the metadata of one file, from the cache or the server.
+        
+        Args:
+            url (str): The file URL.
+        
+        Returns:
+            dict: The size, last-modified date (YYYY-MM-DD) and content type,
+                or None if the server could not be reached.
+        """
+        cached = self.entries.get(url)
+        if cached and time.time() - cached["checked_at"] < self.max_age:
+            self._count("cached")
+            return cached
+        
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified_header"):
+                headers["If-Modified-Since"] = cached["last_modified_header"]
+        
+        try:
+            response = self.session.head(url, headers=headers, allow_redirects=True, timeout=self.timeout)
+            if cached and response.status_code == 304:
+                self._count("revalidated")
+                entry = dict(cached, checked_at=time.time())
+            elif response.status_code < 400 and response.headers.get("Content-Length"):
+                self._count("head")
+                entry = self._entry(response.headers, int(response.headers["Content-Length"]))
+            else:
+                # HEAD refused or without a length: ask for the first byte only
+                entry = self._ranged_get(url)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"Could not get metadata for {url}: {str(e)}")
+            self._count("failed")
+            return cached
+        
+        if entry is None:
+            self._count("failed")
+            return cached
+        
+        with self._lock:
+            self.entries[url] = entry
+            self.changed = True
+        return entry
+    
+    def _ranged_get(self, url):
+        # requests reads the body lazily when streaming; servers that ignore
+        # Range would otherwise send the whole file
+        stream = {"stream": True} if isinstance(self.session, requests.Session) else {}
+        response = self.session.get(url, headers={"Range": "bytes=0-0"}, timeout=self.timeout, **stream)
+        try:
+            if response.status_code >= 400:
+                return None
+            size = None
+            match = CONTENT_RANGE_TOTAL.search(response.headers.get("Content-Range", ""))
+            if response.status_code == 206 and match:
+                size = int(match.group(1))
+            elif response.headers.get("Content-Length"):
+                size = int(response.headers["Content-Length"])
+            self._count("range")
+            return self._entry(response.headers, size)
+        finally:
+            if hasattr(response, "close"):
+                response.close()
+    
+    @staticmethod
+    def _entry(headers, size):
+        last_modified = None
+        if headers.get("Last-Modified"):
+            try:
+                last_modified = parsedate_to_datetime(headers["Last-Modified"]).strftime("%Y-%m-%d")
+            except (TypeError, ValueError):
+                pass
+        content_type = headers.get("Content-Type", "").split(";")[0].strip().lower() or None
+        
+        return {
+            "size": size,
+            "last_modified": last_modified,
+            "content_type": content_type,
+            "etag": headers.get("ETag"),
+            "last_modified_header": headers.get("Last-Modified"),
+            "checked_at": time.time(),
+        }
+    
+    def save(self):
+        """Persist the cache atomically."""
+        if not self.changed:
+            return
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_file, self.cache_file)
+        self.changed = False
+    
+    def log_summary(self):
+        """Log where the form metadata came from."""
+        logger.info(
+            f"Form metadata: {self.stats['cached']} cached, {self.stats['revalidated']} revalidated, "
+            f"{self.stats['head']} HEAD, {self.stats['range']} ranged GET, {self.stats['failed']} failed"
+        )
@@ -0,0 +1,236 @@
+"""
+Crawl Frontier
+
+Breadth-first crawl frontier for following links across a whole city website.
+URLs are put in canonical form before they are queued so that trivially
+different spellings of the same page (fragments, tracking parameters, default
+ports, parameter order) are only fetched once. Visited URLs are tracked in a
+Bloom filter, which stays a few hundred kilobytes even for sites with hundreds
+of thousands of pages.
+"""
+
+import hashlib
+import heapq
+import math
+import posixpath
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that never change page content
+TRACKING_PARAMS = re.compile(r"^(?:utm_\w+|gclid|fbclid|msclkid|mc_cid|mc_eid|_ga|sessionid|phpsessid|jsessionid)$", re.I)
+
+# Links to files the scrapers cannot extract offices from
+SKIP_EXTENSIONS = (
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".zip", ".jpg", ".jpeg",
+    ".png", ".gif", ".svg", ".mp3", ".mp4", ".ics", ".css", ".js", ".xml", ".rss"
+)
+
+# Keyword weights used to rank links; permit-related pages are crawled first
+PRIORITY_KEYWORDS = [
+    (re.compile(r"permit", re.I), 5),
+    (re.compile(r"fee|inspection|license|zoning", re.I), 3),
+    (re.compile(r"building|planning|development|construction|code", re.I), 2),
+    (re.compile(r"department|office|contact|division|services", re.I), 1),
+    (re.compile(r"news|event|calendar|login|search|print|share|subscribe|mailto:|tel:", re.I), -4),
+]
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url):
+    """
+    Put a URL in canonical form.
+    
+    The scheme and host are lowercased, default ports, fragments and tracking
+    parameters are dropped, dot segments are resolved, the remaining query
+    parameters are sorted and trailing slashes are removed.
+    
+    Args:
+        url (str): An absolute URL.
+    
+    Returns:
+        str: The canonical URL, or None if it is not an http(s) URL.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return None
+    
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+    
+    host = parts.hostname.lower().rstrip(".")
+    if port and port != DEFAULT_PORTS[scheme]:
+        host = f"{host}:{port}"
+    
+    path = re.sub(r"/{2,}", "/", parts.path or "/")
+    path = posixpath.normpath(path) if path != "/" else path
+    if path.startswith("//"):
+        path = path[1:]
+    if path != "/" and path.endswith("/"):
+        path = path.rstrip("/")
+    
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not TRACKING_PARAMS.match(k)]
+    query.sort()
+    
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def link_priority(url, text=""):
+    """
+    Score a link by how likely it is to lead to permit office information.
+    
+    Args:
+        url (str): The link URL.
+        text (str): The link text.
+    
+    Returns:
+        int: The score. Higher scores are crawled first; negative scores mark
+            links that are unlikely to be useful.
+    """
+    haystack = f"{url} {text}"
+    return sum(weight for pattern, weight in PRIORITY_KEYWORDS if pattern.search(haystack))
+
+
+class BloomFilter:
+    """A fixed-size probabilistic set of strings with no false negatives."""
+    
+    def __init__(self, capacity=100000, error_rate=0.001):
+        """
+        Size the filter.
+        
+        Args:
+            capacity (int): The number of items expected.
+            error_rate (float): The acceptable false positive rate at capacity.
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, item):
+        # Double hashing: derive all k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+    
+    def add(self, item):
+        """
+        Add an item.
+        
+        Args:
+            item (str): The item to add.
+        
+        Returns:
+            bool: True if the item was not in the filter before.
+        """
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                self.bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+    
+    def __contains__(self, item):
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                return False
+        return True
+    
+    def __len__(self):
+        return self.count
+
+
+class CrawlFrontier:
+    """A breadth-first queue of URLs to crawl that ranks permit links first."""
+    
+    def __init__(self, allowed_hosts, max_depth=2, max_pages=500, capacity=100000):
+        """
+        Initialize the frontier.
+        
+        Pages are visited level by level; within a level, links with a higher
+        ``link_priority`` are visited first.
+        
+        Args:
+            allowed_hosts (iterable): Hostnames the crawl may visit. Subdomains
+                of these hosts are allowed too.
+            max_depth (int): How many links away from the start page to go.
+            max_pages (int): Stop handing out URLs after this many pages.
+            capacity (int): The expected number of distinct URLs, used to
+                size the visited set.
+        """
+        self.allowed_hosts = {host.lower() for host in allowed_hosts}
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.seen = BloomFilter(capacity)
+        self.popped = 0
+        self._heap = []
+        self._counter = 0
+    
+    def is_allowed(self, url):
+        """
+        Check whether a canonical URL is on the crawled site and looks like a page.
+        
+        Args:
+            url (str): A canonical URL.
+        
+        Returns:
+            bool: True if the URL may be crawled.
+        """
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if not any(host == allowed or host.endswith("." + allowed) for allowed in self.allowed_hosts):
+            return False
+        return not parts.path.lower().endswith(SKIP_EXTENSIONS)
+    
+    def add(self, url, depth=0, priority=0):
+        """
+        Queue a URL unless it was queued before or is out of scope.
+        
+        Args:
+            url (str): An absolute URL.
+            depth (int): How many links away from the start page it is.
+            priority (int): Its rank within its depth level.
+        
+        Returns:
+            str: The canonical URL if it was queued, otherwise None.
+        """
+        if depth > self.max_depth:
+            return None
+        
+        url = normalize_url(url)
+        if url is None or not self.is_allowed(url):
+            return None
+        if not self.seen.add(url):
+            return None
+        
+        heapq.heappush(self._heap, (depth, -priority, self._counter, url))
+        self._counter += 1
+        return url
+    
+    def pop(self):
+        """
+        Take the next URL to crawl.
+        
+        Returns:
+            tuple: ``(url, depth)``, or None when the frontier is exhausted or
+                the page budget is spent.
+        """
+        if not self._heap or self.popped >= self.max_pages:
+            return None
+        
+        depth, _, _, url = heapq.heappop(self._heap)
+        self.popped += 1
+        return url, depth
+    
+    def __len__(self):
+        return len(self._heap)
@@ -0,0 +1,236 @@
+"""
+Hybrid Page Fetching
+
+Most municipal pages are rendered on the server, so loading them in Chrome
+just to read their links is wasted work. ``HybridFetcher`` first fetches a
+page with a plain HTTP GET through the shared session in ``transport.py`` and
+only loads it in the browser when the response looks like it needs
+JavaScript: the request failed or was refused, the page has almost no text,
+it is a single-page-app shell, or it is missing the element the caller is
+looking for.
+
+What each domain needed is remembered in ``cache/fetch_modes.json``. Later
+fetches from a domain that needed the browser go straight to it, without
+another HTTP probe. A domain whose pages came back no better from the browser
+is remembered as HTTP-only. Entries expire after a week, so sites that change
+are probed again.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from transport import get_session
+
+logger = logging.getLogger(__name__)
+
+# The empty mount point of a client-rendered app shell
+SPA_MARKERS = re.compile(
+    r'<div[^>]+id=["\'](?:root|app|__next|___gatsby)["\'][^>]*>\s*</div>'
+    r'|<app-root[^>]*>\s*</app-root>',
+    re.I
+)
+
+
+class FetchResult:
+    """A fetched page."""
+    
+    def __init__(self, url, html, mode, reason=None):
+        """
+        Initialize the result.
+        
+        Args:
+            url (str): The final URL of the page, after redirects.
+            html (str): The page HTML.
+            mode (str): "http" or "browser".
+            reason (str, optional): Why the page was loaded in the browser.
+        """
+        self.url = url
+        self.html = html
+        self.mode = mode
+        self.reason = reason
+
+
+def needs_javascript(html, selector=None, min_text_chars=200):
+    """
+    Guess whether a page fetched over plain HTTP needs JavaScript to render.
+    
+    Args:
+        html (str): The page HTML.
+        selector (str, optional): A CSS selector the caller needs on the page.
+        min_text_chars (int): Pages with less visible text than this are
+            treated as unrendered.
+    
+    Returns:
+        str: Why the page looks unrendered, or None if it looks complete.
+    """
+    if not html or not html.strip():
+        return "empty body"
+    
+    soup = BeautifulSoup(html, "html.parser")
+    if selector and soup.select_one(selector) is not None:
+        return None
+    
+    for tag in soup(["script", "style", "noscript", "template"]):
+        tag.decompose()
+    text_chars = len("".join((soup.body or soup).get_text().split()))
+    
+    if text_chars < min_text_chars:
+        return f"only {text_chars} characters of text"
+    if SPA_MARKERS.search(html):
+        return "single-page app markup"
+    if selector:
+        return f"no match for {selector}"
+    return None
+
+
+class HybridFetcher:
+    """Fetches pages over HTTP, falling back to a browser when they need JavaScript."""
+    
+    def __init__(self, driver_factory, memory_file="cache/fetch_modes.json", min_text_chars=200,
+                 browser_timeout=10, memory_ttl=7 * 86400):
+        """
+        Initialize the fetcher.
+        
+        Args:
+            driver_factory (callable): Returns the WebDriver to load pages in.
+                It is only called when a page needs the browser.
+            memory_file (str): Where the mode each domain needed is kept.
+            min_text_chars (int): Pages with less visible text need the browser.
+            browser_timeout (float): How long to wait in the browser for the
+                element the caller is looking for, in seconds.
+            memory_ttl (float): Seconds before a domain is probed again.
+        """
+        self.driver_factory = driver_factory
+        self.memory_file = memory_file
+        self.min_text_chars = min_text_chars
+        self.browser_timeout = browser_timeout
+        self.memory_ttl = memory_ttl
+        self.session = get_session()
+        self.domains = self._load_memory()
+        self.changed = False
+        self.stats = {"http": 0, "browser": 0, "escalated": 0, "probes_skipped": 0}
+    
+    def _load_memory(self):
+        if not os.path.exists(self.memory_file):
+            return {}
+        try:
+            with open(self.memory_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable fetch mode file {self.memory_file}: {str(e)}")
+            return {}
+    
+    def domain_mode(self, url):
+        """
+        Get the mode a URL's domain needed last time.
+        
+        Args:
+            url (str): The URL.
+        
+        Returns:
+            str: "http" or "browser", or None if the domain has to be probed.
+        """
+        entry = self.domains.get(urlsplit(url).hostname or "")
+        if entry is None or time.time() - entry["checked_at"] > self.memory_ttl:
+            return None
+        return entry["mode"]
+    
+    def _remember(self, url, mode, reason=None):
+        host = urlsplit(url).hostname or ""
+        previous = self.domains.get(host, {}).get("mode")
+        self.domains[host] = {"mode": mode, "reason": reason, "checked_at": time.time()}
+        self.changed = True
+        if previous != mode:
+            logger.info(f"Fetching {host} with {mode}" + (f" ({reason})" if reason else ""))
+    
+    def fetch(self, url, selector=None):
+        """
+        Fetch a page, loading it in the browser only if it needs JavaScript.
+        
+        Args:
+            url (str): The page URL.
+            selector (str, optional): A CSS selector the caller needs. A page
+                fetched over HTTP without a match is loaded in the browser.
+        
+        Returns:
+            FetchResult: The page.
+        """
+        mode = self.domain_mode(url)
+        if mode == "browser":
+            self.stats["probes_skipped"] += 1
+            return self._fetch_browser(url, selector, self.domains[urlsplit(url).hostname]["reason"])
+        
+        try:
+            response = self.session.get(url)
+            response.raise_for_status()
+            # On a domain where the browser did no better last time, a page
+            # only goes to the browser if it is clearly unrendered
+            reason = needs_javascript(response.text, None if mode == "http" else selector, self.min_text_chars)
+        except Exception as e:
+            response = None
+            reason = f"HTTP request failed: {str(e)}"
+        
+        if reason is None:
+            self.stats["http"] += 1
+            if mode is None:
+                self._remember(url, "http")
+            return FetchResult(response.url, response.text, "http")
+        
+        self.stats["escalated"] += 1
+        result = self._fetch_browser(url, selector, reason)
+        
+        # Only send the domain to the browser next time if it helped
+        if response is None or needs_javascript(result.html, selector, self.min_text_chars) is None:
+            self._remember(url, "browser", reason)
+        else:
+            self._remember(url, "http")
+        return result
+    
+    def _fetch_browser(self, url, selector, reason):
+        driver = self.driver_factory()
+        driver.get(url)
+        if selector:
+            try:
+                WebDriverWait(driver, self.browser_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                )
+            except TimeoutException:
+                pass
+        self.stats["browser"] += 1
+        try:
+            final_url = driver.current_url
+        except WebDriverException:
+            final_url = url
+        return FetchResult(final_url, driver.page_source, "browser", reason)
+    
+    def save(self):
+        """Persist the per-domain modes atomically."""
+        if not self.changed:
+            return
+        directory = os.path.dirname(self.memory_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        tmp_file = f"{self.memory_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.domains, f, indent=2)
+        os.replace(tmp_file, self.memory_file)
+        self.changed = False
+    
+    def log_summary(self):
+        """Log how pages were fetched."""
+        logger.info(
+            f"Fetched {self.stats['http']} pages over HTTP and {self.stats['browser']} in the browser "
+            f"({self.stats['escalated']} escalated after an HTTP probe, "
+            f"{self.stats['probes_skipped']} sent straight to the browser)"
+        )
@@ -0,0 +1,268 @@
+"""
+Network Capture
+
+Reads the data a page downloads instead of the page it renders. With Chrome's
+performance log turned on (``browser_profile.create_driver(network_log=True)``),
+``NetworkCapture`` reads the logged network events and fetches the bodies of
+the JSON and XHR responses it is interested in through DevTools. A whole
+results page then takes a single log read plus one ``Network.getResponseBody``
+call per payload. It no longer needs a WebDriver round trip for every field
+of every result.
+
+``find_places`` turns Google Maps payloads into place records. Maps answers
+searches with undocumented nested arrays (the ``/search?tbm=map`` and
+``/maps/preview/place`` responses, prefixed with ``)]}'``). A place is
+recognised by its shape: a name at index 11 and coordinates in index 9. Its
+fields are read from the fixed positions in ``PLACE_FIELDS``. When Google
+moves them, update that table; the scraper falls back to reading the DOM when
+no places are found.
+"""
+
+import base64
+import json
+import logging
+import re
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Responses worth reading: JSON payloads and the script-like XHR answers Maps sends
+JSON_MIME_TYPES = ("application/json", "text/json", "application/javascript", "text/javascript", "text/plain")
+
+# Google Maps responses that carry place data
+MAPS_PAYLOAD_URLS = re.compile(r"/search\?tbm=map|/maps/preview/place")
+
+# Anti-JSON-hijacking prefixes and suffixes Google wraps its payloads in
+XSSI_PREFIX = re.compile(r"^\s*(?:/\*\"\"\*/)?\s*(?:\)\]\}'\s*)?")
+XSSI_SUFFIX = re.compile(r"/\*\"\"\*/\s*$")
+
+# Positions of place fields in a Maps place array
+PLACE_FIELDS = {
+    "name": (11,),
+    "address": (18,),
+    "full_address": (39,),
+    "website": (7, 0),
+    "phone": (178, 0, 0),
+    "latitude": (9, 2),
+    "longitude": (9, 3),
+    "hours": (34, 1),
+}
+
+
+class CapturedResponse:
+    """A network response read from the performance log."""
+    
+    def __init__(self, url, status, mime_type, body):
+        """
+        Initialize the response.
+        
+        Args:
+            url (str): The response URL.
+            status (int): The HTTP status.
+            mime_type (str): The response MIME type.
+            body (str): The response body.
+        """
+        self.url = url
+        self.status = status
+        self.mime_type = mime_type
+        self.body = body
+    
+    def json(self):
+        """
+        Parse the body as JSON, without any XSSI prefix.
+        
+        Returns:
+            Any: The parsed payload, or None if the body is not JSON.
+        """
+        return parse_payload(self.body)
+
+
+def parse_payload(text):
+    """
+    Parse a JSON payload, stripping the prefixes Google puts in front of it.
+    
+    Args:
+        text (str): The payload.
+    
+    Returns:
+        Any: The parsed payload, or None if it is not JSON.
+    """
+    if not text:
+        return None
+    text = XSSI_SUFFIX.sub("", XSSI_PREFIX.sub("", text, count=1))
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+class NetworkCapture:
+    """Collects response bodies from a driver's performance log."""
+    
+    def __init__(self, driver, url_pattern=None, mime_types=JSON_MIME_TYPES):
+        """
+        Initialize the capture.
+        
+        Args:
+            driver: A Chrome WebDriver started with the performance log on.
+            url_pattern (re.Pattern, optional): Only keep responses whose URL
+                matches. By default every response with a matching MIME type is kept.
+            mime_types (tuple): MIME types of the responses to keep.
+        """
+        self.driver = driver
+        self.url_pattern = url_pattern
+        self.mime_types = mime_types
+        self.stats = {"events": 0, "responses": 0, "bodies_missing": 0}
+    
+    def clear(self):
+        """Throw away the events logged so far."""
+        self.driver.get_log("performance")
+    
+    def _wanted(self, response):
+        if self.url_pattern is not None:
+            return bool(self.url_pattern.search(response.get("url", "")))
+        return response.get("mimeType", "").startswith(self.mime_types)
+    
+    def drain(self):
+        """
+        Read the performance log and fetch the bodies of the wanted responses.
+        
+        The log is emptied by reading it, so each response is returned once.
+        
+        Returns:
+            list: The ``CapturedResponse`` objects, in the order they arrived.
+        """
+        received = {}
+        finished = []
+        for entry in self.driver.get_log("performance"):
+            self.stats["events"] += 1
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Network.responseReceived" and self._wanted(params.get("response", {})):
+                received[params["requestId"]] = params["response"]
+            elif method == "Network.loadingFinished":
+                finished.append(params.get("requestId"))
+        
+        responses = []
+        for request_id in finished:
+            response = received.get(request_id)
+            if response is None:
+                continue
+            try:
+                result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            except Exception as e:
+                # Bodies are dropped once the page navigates away or the buffer fills
+                logger.debug(f"No body for {response['url']}: {str(e)}")
+                self.stats["bodies_missing"] += 1
+                continue
+            
+            body = result.get("body", "")
+            if result.get("base64Encoded"):
+                body = base64.b64decode(body).decode("utf-8", errors="replace")
+            responses.append(CapturedResponse(response["url"], response.get("status"), response.get("mimeType"), body))
+        
+        self.stats["responses"] += len(responses)
+        return responses
+
+
+def _get(data, path):
+    for index in path:
+        try:
+            data = data[index]
+        except (IndexError, KeyError, TypeError):
+            return None
+    return data
+
+
+def _is_place(data):
+    return (
+        isinstance(data, list)
+        and isinstance(_get(data, PLACE_FIELDS["name"]), str)
+        and isinstance(_get(data, PLACE_FIELDS["latitude"]), float)
+        and isinstance(_get(data, PLACE_FIELDS["longitude"]), float)
+    )
+
+
+def _website(url):
+    # Maps links through a redirect; keep the target
+    if url and url.startswith("/url?"):
+        return parse_qs(urlsplit(url).query).get("q", [url])[0]
+    return url
+
+
+def _hours(days):
+    if not isinstance(days, list):
+        return None
+    lines = []
+    for day in days:
+        name, times = _get(day, (0,)), _get(day, (1,))
+        if isinstance(name, str) and isinstance(times, list):
+            lines.append(f"{name}: {', '.join(str(span) for span in times)}")
+    return "; ".join(lines) or None
+
+
+def place_record(data):
+    """
+    Read the fields of one Maps place array.
+    
+    Args:
+        data (list): The place array.
+    
+    Returns:
+        dict: The name, address, phone, website, hours, latitude and longitude.
+            Missing fields are None.
+    """
+    name = _get(data, PLACE_FIELDS["name"])
+    address = _get(data, PLACE_FIELDS["address"])
+    if isinstance(address, str):
+        # This field starts with the place name
+        address = address[len(name):].lstrip(", ") if address.startswith(name) else address
+    else:
+        address = _get(data, PLACE_FIELDS["full_address"])
+    phone = _get(data, PLACE_FIELDS["phone"])
+    website = _get(data, PLACE_FIELDS["website"])
+    
+    return {
+        "name": name.strip(),
+        "address": address.strip() if isinstance(address, str) and address.strip() else None,
+        "phone": phone if isinstance(phone, str) else None,
+        "website": _website(website) if isinstance(website, str) else None,
+        "hours": _hours(_get(data, PLACE_FIELDS["hours"])),
+        "latitude": _get(data, PLACE_FIELDS["latitude"]),
+        "longitude": _get(data, PLACE_FIELDS["longitude"]),
+    }
+
+
+def find_places(payload):
+    """
+    Find every place in a Google Maps payload.
+    
+    Payloads nest further payloads as prefixed JSON strings; those are parsed
+    and searched too.
+    
+    Args:
+        payload (Any): A parsed payload.
+    
+    Returns:
+        list: Place records from ``place_record``, in the order they appear.
+    """
+    places = []
+    stack = [payload]
+    while stack:
+        data = stack.pop()
+        if isinstance(data, str):
+            if data.lstrip().startswith(")]}'"):
+                stack.append(parse_payload(data))
+        elif isinstance(data, dict):
+            stack.extend(reversed(list(data.values())))
+        elif isinstance(data, list):
+            if _is_place(data):
+                places.append(place_record(data))
+            else:
+                stack.extend(reversed(data))
+    return places
@@ -0,0 +1,418 @@
+#!/usr/bin/env python
+"""
+Replay Server
+
+Serves recorded pages from a fixture directory over local HTTP, so the
+crawlers can be run and benchmarked without touching live city websites.
+
+A fixture directory holds the recorded HTML files plus an ``index.json`` that
+maps each original URL to its file. Fixtures can be captured from an existing
+page cache (``capture``) or generated from ``CITY_CONFIGS`` (``synthesize``).
+
+The scrapers reach the server through a URL rewriter: a request for
+``https://www.atlantaga.gov/permits`` goes to
+``http://127.0.0.1:<port>/https/www.atlantaga.gov/permits`` and the server
+looks the original URL up in the index. Every response can be delayed to
+simulate network latency, and ETags are sent so conditional requests get
+``304 Not Modified`` just like on a real site.
+
+Usage:
+    python replay.py synthesize --out fixtures/synthetic
+    python replay.py capture --cache cache --out fixtures/captured
+    python replay.py serve --fixtures fixtures/synthetic --latency 50
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from frontier import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# A fee table whose rows have more cells than its header, as real schedules often do
+RAGGED_FEE_TABLE = (
+    "<h2>Reinspection Fees</h2><table>"
+    "<tr><th>Item</th><th>Fee</th></tr>"
+    "<tr><td>First reinspection</td><td>$75.00</td><td>$150.00</td></tr>"
+    "<tr><td>Each additional reinspection</td><td>$100.00</td><td>$200.00</td></tr>"
+    "</table>"
+)
+
+
+class FixtureSet:
+    """Recorded pages and the URLs they were recorded from."""
+    
+    def __init__(self, directory):
+        """
+        Open a fixture directory, loading its index if there is one.
+        
+        Args:
+            directory (str): The fixture directory.
+        """
+        self.directory = directory
+        self.index = {}
+        
+        index_file = os.path.join(directory, "index.json")
+        if os.path.exists(index_file):
+            with open(index_file, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+        self._lookup = {normalize_url(url): name for url, name in self.index.items()}
+    
+    def __len__(self):
+        return len(self.index)
+    
+    def lookup(self, url):
+        """
+        Find the recorded file for a URL.
+        
+        Args:
+            url (str): The original URL.
+        
+        Returns:
+            str: The path of the recorded file, or None if the URL was not recorded.
+        """
+        name = self._lookup.get(normalize_url(url))
+        return os.path.join(self.directory, name) if name else None
+    
+    def add(self, url, html, name=None):
+        """
+        Record a page.
+        
+        Args:
+            url (str): The URL the page was recorded from.
+            html (str): The page content.
+            name (str, optional): The file name. Defaults to a hash of the URL.
+        """
+        name = name or hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+            f.write(html)
+        self.index[url] = name
+        self._lookup[normalize_url(url)] = name
+    
+    def save(self):
+        """Write the index."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        logger.info(f"Saved {len(self.index)} fixtures to {self.directory}")
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        server = self.server.replay
+        server.count_request()
+        
+        # The path is /<scheme>/<host>/<original path and query>
+        match = re.match(r"^/(https?)/([^/]+)(/.*)?$", self.path)
+        path = server.fixtures.lookup(f"{match.group(1)}://{match.group(2)}{match.group(3) or '/'}") if match else None
+        
+        latency = server.latency()
+        if latency:
+            time.sleep(latency)
+        
+        if path is None:
+            server.count_miss()
+            self._send(404, b"Not recorded")
+            return
+        
+        with open(path, "rb") as f:
+            body = f.read()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        
+        self._send(200, body, etag)
+    
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class ReplayServer:
+    """A local HTTP server that serves a fixture set with simulated latency."""
+    
+    def __init__(self, fixtures, latency_ms=0, jitter_ms=0, host="127.0.0.1", port=0):
+        """
+        Initialize the server.
+        
+        Args:
+            fixtures (FixtureSet or str): The fixtures, or their directory.
+            latency_ms (float): Delay before every response, in milliseconds.
+            jitter_ms (float): Random extra delay of up to this many milliseconds.
+            host (str): The interface to listen on.
+            port (int): The port to listen on; 0 picks a free port.
+        """
+        self.fixtures = fixtures if isinstance(fixtures, FixtureSet) else FixtureSet(fixtures)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.requests = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        self._httpd = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.replay = self
+        self.host, self.port = self._httpd.server_address[:2]
+        self._thread = None
+    
+    def latency(self):
+        """Pick the delay for a response, in seconds."""
+        return (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+    
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+    
+    def count_miss(self):
+        with self._lock:
+            self.misses += 1
+    
+    def url_rewriter(self, url):
+        """
+        Map an original URL to the server. Pass this to the scraper as ``url_rewriter``.
+        
+        Args:
+            url (str): The original URL.
+        
+        Returns:
+            str: The URL to request instead.
+        """
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        query = f"?{parts.query}" if parts.query else ""
+        return f"http://{self.host}:{self.port}/{parts.scheme}/{parts.netloc}{path}{query}"
+    
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Replaying {len(self.fixtures)} pages on http://{self.host}:{self.port}")
+        return self
+    
+    def stop(self):
+        """Stop serving."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def capture_from_cache(cache_dir, out_dir):
+    """
+    Build a fixture set from the basic scraper's page cache.
+    
+    Cached pages are keyed by name rather than URL, so the URLs are worked out
+    the way the scraper names its cache files: each city's permit and fee
+    pages, the detail page of every office found on the permit page, and the
+    deep-crawl pages reachable through cached pages.
+    
+    Args:
+        cache_dir (str): The page cache directory.
+        out_dir (str): The fixture directory to write.
+    
+    Returns:
+        FixtureSet: The captured fixtures.
+    """
+    from basic_scraper import PermitOfficeScraper
+    
+    fixtures = FixtureSet(out_dir)
+    
+    def read(key):
+        path = os.path.join(cache_dir, f"{key}.html")
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    
+    for city, config in PermitOfficeScraper.CITY_CONFIGS.items():
+        scraper = PermitOfficeScraper(city, cache_dir=cache_dir)
+        
+        fee_html = read(f"{city}_fees")
+        if fee_html is not None:
+            fixtures.add(config["fee_url"], fee_html, f"{city}_fees.html")
+        
+        permit_url = urljoin(config["base_url"], config["permit_page"])
+        permit_html = read(f"{city}_permit_page")
+        if permit_html is None:
+            continue
+        fixtures.add(permit_url, permit_html, f"{city}_permit_page.html")
+        
+        for office in scraper._extract_offices(BeautifulSoup(permit_html, 'html.parser')):
+            details_html = read(f"{office['id']}_details") if "website" in office else None
+            if details_html is not None:
+                fixtures.add(office["website"], details_html, f"{office['id']}_details.html")
+        
+        # Follow links through cached deep-crawl pages
+        queue = deque([(permit_url, permit_html)])
+        seen = {normalize_url(permit_url)}
+        while queue:
+            url, html = queue.popleft()
+            for link in BeautifulSoup(html, 'html.parser').find_all('a', href=True):
+                link_url = normalize_url(urljoin(url, link['href']))
+                if link_url is None or link_url in seen:
+                    continue
+                seen.add(link_url)
+                page_html = read(scraper.page_cache_key(link_url))
+                if page_html is not None:
+                    fixtures.add(link_url, page_html)
+                    queue.append((link_url, page_html))
+    
+    fixtures.save()
+    return fixtures
+
+
+def synthesize(out_dir, offices_per_city=8, fee_rows=2000, fee_tables=10, topic_pages=12, seed=0):
+    """
+    Generate a fixture set for every city in ``CITY_CONFIGS``.
+    
+    Each city gets a permit page matching its department selectors, a detail
+    page per office with address, phone, email and hours, a large fee
+    schedule ending in a ragged table, and a web of linked permit topic pages
+    for deep crawls.
+    
+    Args:
+        out_dir (str): The fixture directory to write.
+        offices_per_city (int): Offices listed on each permit page.
+        fee_rows (int): Rows in each fee schedule.
+        fee_tables (int): Tables the fee rows are spread across.
+        topic_pages (int): Linked topic pages per city.
+        seed (int): Seed for the generated content.
+    
+    Returns:
+        FixtureSet: The generated fixtures.
+    """
+    from basic_scraper import PermitOfficeScraper
+    from benchmark_fee_tables import generate_page
+    
+    rng = random.Random(seed)
+    fixtures = FixtureSet(out_dir)
+    streets = ["Main Street", "Market Avenue", "Civic Center Drive", "Broad Street", "Mitchell Street"]
+    divisions = ["Building", "Planning", "Zoning", "Inspections", "Permits", "Code Enforcement",
+                 "Development Services", "Fire Prevention", "Public Works", "Signs"]
+    
+    for city, config in PermitOfficeScraper.CITY_CONFIGS.items():
+        base_url = config["base_url"]
+        div_selector = next(s for s in config["department_selectors"] if s["type"] == "div")
+        dept_path = next(s for s in config["department_selectors"] if s["type"] == "a")["href_pattern"]
+        city_name = city.replace("_", " ").title()
+        
+        cards = []
+        for i in range(offices_per_city):
+            name = f"{city_name} {divisions[i % len(divisions)]} Office {i + 1}"
+            href = f"{dept_path}{divisions[i % len(divisions)].lower().replace(' ', '-')}-{i + 1}"
+            cards.append(f'<div class="{div_selector["class"]}"><h3>{name}</h3><a href="{href}">Visit</a></div>')
+            
+            fixtures.add(urljoin(base_url, href), (
+                f"<html><body><h1>{name}</h1>"
+                f"<p class=\"address\">{rng.randint(10, 999)} {rng.choice(streets)}, {city_name} {rng.randint(10000, 99999)}</p>"
+                f"<p>Phone: ({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}</p>"
+                f"<p><a href=\"mailto:office{i + 1}@example.gov\">Email us</a></p>"
+                f"<p>Monday - Friday 8:00 AM - 5:00 PM</p>"
+                f"<nav><a href=\"/permits/topic-0\">Permit topics</a></nav>"
+                f"</body></html>"
+            ))
+        
+        topic_links = "".join(
+            f'<li><a href="/permits/topic-{t}">Permit topic {t}</a></li>' for t in range(topic_pages)
+        )
+        permit_url = urljoin(base_url, config["permit_page"])
+        fee_html = generate_page(fee_rows, fee_tables, seed=rng.randint(0, 10 ** 6))
+        fee_html = fee_html.replace("</body>", RAGGED_FEE_TABLE + "</body>")
+        permit_html = (
+            f"<html><head><title>{city_name} Permits</title></head><body>"
+            f"<h1>Permits</h1>{''.join(cards)}<ul>{topic_links}</ul>"
+            f"<a href=\"/news\">News</a></body></html>"
+        )
+        if normalize_url(config["fee_url"]) == normalize_url(permit_url):
+            # Some cities publish their fees on the permit page itself
+            permit_html = permit_html.replace("</body>", fee_html[fee_html.index("<body>") + 6:])
+        else:
+            fixtures.add(config["fee_url"], fee_html, f"{city}_fees.html")
+        fixtures.add(permit_url, permit_html, f"{city}_permit_page.html")
+        
+        for t in range(topic_pages):
+            neighbours = "".join(
+                f'<a href="/permits/topic-{(t + k) % topic_pages}?utm_source=nav">Permit topic {(t + k) % topic_pages}</a>'
+                for k in (1, 2, 3)
+            )
+            fixtures.add(urljoin(base_url, f"/permits/topic-{t}"), (
+                f"<html><body><h1>Permit topic {t}</h1>"
+                f"<p>{' '.join(rng.choice(divisions) for _ in range(200))}</p>"
+                f"{neighbours}</body></html>"
+            ))
+    
+    fixtures.save()
+    return fixtures
+
+
+def main():
+    """Main function to serve, capture or generate fixtures."""
+    parser = argparse.ArgumentParser(description="Record and replay pages for offline crawls")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    serve = subparsers.add_parser("serve", help="Serve a fixture directory")
+    serve.add_argument("--fixtures", required=True, help="The fixture directory")
+    serve.add_argument("--latency", type=float, default=0, help="Delay per response in milliseconds")
+    serve.add_argument("--jitter", type=float, default=0, help="Random extra delay in milliseconds")
+    serve.add_argument("--port", type=int, default=8765, help="The port to listen on (default: 8765)")
+    
+    capture = subparsers.add_parser("capture", help="Build fixtures from the page cache")
+    capture.add_argument("--cache", default="cache", help="The page cache directory (default: cache)")
+    capture.add_argument("--out", required=True, help="The fixture directory to write")
+    
+    synth = subparsers.add_parser("synthesize", help="Generate fixtures for every configured city")
+    synth.add_argument("--out", required=True, help="The fixture directory to write")
+    synth.add_argument("--offices", type=int, default=8, help="Offices per city (default: 8)")
+    synth.add_argument("--fee-rows", type=int, default=2000, help="Rows per fee schedule (default: 2000)")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    if args.command == "capture":
+        capture_from_cache(args.cache, args.out)
+    elif args.command == "synthesize":
+        synthesize(args.out, offices_per_city=args.offices, fee_rows=args.fee_rows)
+    else:
+        server = ReplayServer(args.fixtures, args.latency, args.jitter, port=args.port).start()
+        logger.info("Rewrite requests as http://127.0.0.1:<port>/<scheme>/<host>/<path>; press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Scrapy Items for Permit Offices
+
+The fields of each item match the CSV columns in ``writers.py``.
+"""
+
+import scrapy
+
+
+class OfficeItem(scrapy.Item):
+    """A permit office. The fields match ``writers.OFFICE_FIELDS``."""
+    id = scrapy.Field()
+    name = scrapy.Field()
+    address = scrapy.Field()
+    city = scrapy.Field()
+    state = scrapy.Field()
+    zip = scrapy.Field()
+    phone = scrapy.Field()
+    email = scrapy.Field()
+    website = scrapy.Field()
+    hours = scrapy.Field()
+    latitude = scrapy.Field()
+    longitude = scrapy.Field()
+    distance = scrapy.Field()
+    source = scrapy.Field()
+    source_city = scrapy.Field()
+    scraped_at = scrapy.Field()
+
+
+class FeeItem(scrapy.Item):
+    """A permit fee charged by an office. The fields match ``writers.FEE_FIELDS``."""
+    id = scrapy.Field()
+    name = scrapy.Field()
+    amount = scrapy.Field()
+    amount_max = scrapy.Field()
+    unit = scrapy.Field()
+    description = scrapy.Field()
+    office_id = scrapy.Field()
+    permit_type = scrapy.Field()
+    source_city = scrapy.Field()
+    scraped_at = scrapy.Field()
+
+
+class FormItem(scrapy.Item):
+    """A permit form document. The fields match ``writers.FORM_FIELDS``."""
+    id = scrapy.Field()
+    title = scrapy.Field()
+    description = scrapy.Field()
+    file_url = scrapy.Field()
+    file_type = scrapy.Field()
+    file_size = scrapy.Field()
+    last_updated = scrapy.Field()
+    office_id = scrapy.Field()
+    permit_type = scrapy.Field()
+    source = scrapy.Field()
+    source_city = scrapy.Field()
+    scraped_at = scrapy.Field()
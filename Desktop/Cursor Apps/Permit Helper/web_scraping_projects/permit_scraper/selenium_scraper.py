@@ -6,23 +6,28 @@ This script demonstrates how to scrape permit office information from a JavaScri
 using Selenium and WebDriver.
 """
 
-import time
 import os
 import logging
-import pandas as pd
 import re
 import json
-import random
+import argparse
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, ElementClickInterceptedException, WebDriverException
+
+from browser_profile import block_resources, browser_gone, create_driver
+from checkpoint import CrawlJournal
+from crawl_state import CrawlState, ChangeLog
+from form_metadata import FormMetadata
+from hybrid_fetch import HybridFetcher
+from network_capture import MAPS_PAYLOAD_URLS, NetworkCapture, find_places
+from snapshots import SnapshotRecorder
+from waits import WaitEngine
+from columnar import ColumnarWriter, COLUMNAR_FORMATS
+from writers import RecordSink, OFFICE_FIELDS, FORM_FIELDS, FILE_EXTENSIONS, concat_files, parse_formats, remove_stale_tmp_files, write_csv, write_json
 
 # Set up logging
 logging.basicConfig(
@@ -77,15 +82,40 @@ class SeleniumPermitScraper:
         }
     }
     
-    def __init__(self, city="atlanta", headless=True):
+    # The place name in the details panel, and the links to places in the results feed
+    PLACE_NAME_SELECTOR = "div.fontHeadlineSmall"
+    PLACE_LINK_SELECTOR = "a[href*='/maps/place/']"
+    
+    # The address, phone and website entries of the place details
+    PLACE_INFO_SELECTOR = "[data-item-id]"
+    
+    # Words in the text of a link to a permit form
+    FORM_LINK_KEYWORDS = ("form", "application", "permit")
+    
+    def __init__(self, city="atlanta", headless=True, parallel_tabs=0, lean=True, network_capture=False,
+                 record_dir=None, driver=None):
         """
         Initialize the Selenium scraper.
         
         Args:
             city (str): The city to search for permit offices.
             headless (bool): Whether to run Chrome in headless mode.
+            parallel_tabs (int): Load this many search results at once in
+                separate tabs. 0 or 1 clicks through the results one at a time.
+            lean (bool): Use the lean browser profile from browser_profile.py,
+                which skips images, fonts, media and trackers.
+            network_capture (bool): Read Google Maps results from the network
+                payloads the page downloads instead of the rendered page.
+            record_dir (str, optional): Save a snapshot of every page extracted
+                from to this directory, for offline replay (see snapshots.py).
+            driver (WebDriver, optional): A running driver to use instead of
+                starting one. The caller keeps ownership: ``close`` leaves it open.
         """
         self.city = city.lower().replace(" ", "_")
+        self.parallel_tabs = parallel_tabs
+        self.lean = lean
+        self.network_capture = network_capture
+        self.recorder = SnapshotRecorder(record_dir) if record_dir else None
         
         # Get city configuration
         if self.city not in self.CITY_CONFIGS:
@@ -94,35 +124,43 @@ class SeleniumPermitScraper:
         
         self.config = self.CITY_CONFIGS[self.city]
         
-        self.setup_driver(headless)
+        # Real sizes, dates and types of discovered forms, looked up with HEAD requests
+        self.form_metadata = FormMetadata()
+        
+        # Cached offices keyed by ID, reloaded when the offices file changes
+        self._offices_by_id = {}
+        self._offices_mtime = None
+        
+        # Links found by the Google form search, which is the same for every office
+        self._google_form_links = None
+        
+        self.setup_driver(headless, driver)
         logger.info(f"Initialized Selenium scraper for {self.city}")
         
         # Create cache directory
         os.makedirs("cache", exist_ok=True)
     
-    def setup_driver(self, headless):
+    def setup_driver(self, headless, driver=None):
         """
         Set up the Selenium WebDriver.
         
         Args:
             headless (bool): Whether to run Chrome in headless mode.
+            driver (WebDriver, optional): A running driver to use instead of
+                starting one.
         """
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
+        self.owns_driver = driver is None
+        self.driver = driver or create_driver(headless=headless, lean=self.lean, network_log=self.network_capture)
         
-        # Add user agent to mimic a real browser
-        chrome_options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        # Maps payloads are read from the performance log in network capture mode
+        self.network = NetworkCapture(self.driver, MAPS_PAYLOAD_URLS) if self.network_capture else None
         
-        # Initialize the WebDriver
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        # Office websites are read over plain HTTP, in this browser only when they need it
+        self.fetcher = HybridFetcher(lambda: self.driver)
         
-        # Set implicit wait time
-        self.driver.implicitly_wait(10)
+        # No implicit wait: every wait is explicit, so lookups for elements a
+        # page does not have return at once instead of after a timeout
+        self.waits = WaitEngine(self.driver)
         logger.info("WebDriver set up successfully")
     
     def _get_cached_or_execute(self, cache_key, execute_func):
@@ -132,10 +170,43 @@ class SeleniumPermitScraper:
         Args:
             cache_key (str): The cache key.
             execute_func (callable): The function to execute if cache miss.
-            
+        
         Returns:
             Any: The cached or executed result.
         """
+        result = self._read_cache(cache_key)
+        if result is None:
+            logger.info(f"Executing function for: {cache_key}")
+            result = execute_func()
+            # Mock data stands in for a failed search; the next run should search again
+            if not self._is_mock(result):
+                self._write_cache(cache_key, result)
+        
+        return result
+    
+    @staticmethod
+    def _is_mock(records):
+        """
+        Check whether records are mock data.
+        
+        Args:
+            records (list): The records.
+        
+        Returns:
+            bool: True if any record is mock data.
+        """
+        return any(record.get("source") == "mock_data" for record in records)
+    
+    def _read_cache(self, cache_key):
+        """
+        Read cached data if it is less than a day old.
+        
+        Args:
+            cache_key (str): The cache key.
+        
+        Returns:
+            Any: The cached data, or None on a cache miss.
+        """
         cache_file = f"cache/{cache_key}.json"
         
         # Check if cache exists and is less than 1 day old
@@ -143,15 +214,18 @@ class SeleniumPermitScraper:
             logger.info(f"Loading from cache: {cache_file}")
             with open(cache_file, "r", encoding="utf-8") as f:
                 return json.load(f)
-        else:
-            logger.info(f"Executing function for: {cache_key}")
-            result = execute_func()
-            
-            # Save to cache
-            with open(cache_file, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2)
-            
-            return result
+        return None
+    
+    def _write_cache(self, cache_key, data):
+        """
+        Cache data.
+        
+        Args:
+            cache_key (str): The cache key.
+            data (Any): The data to cache.
+        """
+        with open(f"cache/{cache_key}.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
     
     def search_permit_offices(self):
         """
@@ -166,6 +240,41 @@ class SeleniumPermitScraper:
         cache_key = f"{self.city}_permit_offices"
         return self._get_cached_or_execute(cache_key, self._execute_office_search)
     
+    def _open_search_results(self, search_query):
+        """
+        Search Google Maps and wait for the results feed.
+        
+        Args:
+            search_query (str): The search query.
+        """
+        # Navigate to Google Maps
+        self.driver.get("https://www.google.com/maps")
+        self._accept_cookies()
+        
+        # Find the search box and enter the query
+        search_box = self.waits.element(By.ID, "searchboxinput")
+        search_box.clear()
+        search_box.send_keys(search_query)
+        search_box.send_keys(Keys.RETURN)
+        
+        # Wait for search results to load
+        self.waits.element(By.CSS_SELECTOR, "div[role='feed']")
+    
+    def _accept_cookies(self):
+        """Accept cookies if the consent dialog is showing."""
+        # The consent page is served before the page itself, so it is there
+        # once the page has loaded or not at all
+        accept_button = self.waits.optional(By.XPATH, "//button[contains(text(), 'Accept all')]")
+        if accept_button is None:
+            logger.info("No cookie consent dialog found or it was already accepted")
+            return
+        
+        accept_button.click()
+        try:
+            self.waits.gone(accept_button, "cookie consent dialog", timeout=5)
+        except TimeoutException:
+            logger.warning("Cookie consent dialog did not close")
+    
     def _execute_office_search(self):
         """
         Execute the search for permit offices.
@@ -176,169 +285,28 @@ class SeleniumPermitScraper:
         search_query = self.config["search_query"]
         
         try:
-            # Navigate to Google Maps
-            self.driver.get("https://www.google.com/maps")
-            
-            # Accept cookies if the dialog appears
-            try:
-                WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Accept all')]"))
-                )
-                accept_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Accept all')]")
-                accept_button.click()
-                time.sleep(1)
-            except (TimeoutException, NoSuchElementException):
-                logger.info("No cookie consent dialog found or it was already accepted")
-            
-            # Find the search box and enter the query
-            search_box = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "searchboxinput"))
-            )
-            search_box.clear()
-            search_box.send_keys(search_query)
-            search_box.send_keys(Keys.RETURN)
-            
-            # Wait for search results to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']"))
-            )
-            
-            # Give some time for all results to load
-            time.sleep(3)
-            
-            # Find all result items
-            result_items = self.driver.find_elements(By.CSS_SELECTOR, "div[role='feed'] > div")
-            
             offices = []
-            max_results = min(len(result_items), self.config["max_results"])
+            if self.network is not None:
+                # Only this search's payloads are wanted
+                self.network.clear()
+            self._open_search_results(search_query)
+            if self.recorder is not None:
+                self.recorder.record_page(self.driver, "search")
             
-            for i in range(max_results):
-                try:
-                    # Refresh the result items list if needed
-                    if i > 0:
-                        result_items = self.driver.find_elements(By.CSS_SELECTOR, "div[role='feed'] > div")
-                    
-                    # Click on the result to view details
-                    result_items[i].click()
-                    
-                    # Wait for details panel to load
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.fontHeadlineSmall"))
-                    )
-                    
-                    # Add a small delay to ensure all details are loaded
-                    time.sleep(1)
-                    
-                    # Extract office information
-                    office = {}
-                    
-                    # Name
-                    try:
-                        name_elem = self.driver.find_element(By.CSS_SELECTOR, "div.fontHeadlineSmall")
-                        office["name"] = name_elem.text.strip()
-                    except NoSuchElementException:
-                        logger.warning("Could not find name for an office")
-                        continue
-                    
-                    # Generate ID
-                    office["id"] = f"ga-{re.sub(r'[^a-z0-9]', '-', office['name'].lower())}"
-                    
-                    # City and State
-                    office["city"] = self.config["city"]
-                    office["state"] = self.config["state"]
-                    
-                    # Address
-                    try:
-                        address_button = self.driver.find_element(By.XPATH, "//button[contains(@data-item-id, 'address')]")
-                        office["address"] = address_button.text.strip()
-                        
-                        # Try to extract zip from address
-                        zip_match = re.search(r'GA\s+(\d{5}(?:-\d{4})?)', office["address"])
-                        if zip_match:
-                            office["zip"] = zip_match.group(1)
-                    except NoSuchElementException:
-                        logger.warning(f"Could not find address for {office['name']}")
-                    
-                    # Phone
-                    try:
-                        phone_button = self.driver.find_element(By.XPATH, "//button[contains(@data-item-id, 'phone:')]")
-                        office["phone"] = phone_button.text.strip()
-                    except NoSuchElementException:
-                        logger.warning(f"Could not find phone for {office['name']}")
-                    
-                    # Website
-                    try:
-                        website_button = self.driver.find_element(By.XPATH, "//a[contains(@data-item-id, 'authority')]")
-                        office["website"] = website_button.get_attribute("href")
-                    except NoSuchElementException:
-                        logger.warning(f"Could not find website for {office['name']}")
-                    
-                    # Hours
-                    try:
-                        hours_section = self.driver.find_element(By.XPATH, "//div[contains(text(), 'Hours')]/following-sibling::div")
-                        office["hours"] = hours_section.text.strip().replace('\n', '; ')
-                    except NoSuchElementException:
-                        logger.warning(f"Could not find hours for {office['name']}")
-                    
-                    # Get coordinates
-                    try:
-                        url = self.driver.current_url
-                        coords_match = re.search(r'@([-\d.]+),([-\d.]+)', url)
-                        if coords_match:
-                            office["latitude"] = float(coords_match.group(1))
-                            office["longitude"] = float(coords_match.group(2))
-                    except Exception as e:
-                        logger.warning(f"Could not extract coordinates for {office['name']}: {str(e)}")
-                    
-                    # Calculate distance (approximate)
-                    try:
-                        distance_elem = self.driver.find_element(By.XPATH, "//div[contains(text(), 'mi') or contains(text(), 'km')]")
-                        distance_text = distance_elem.text.strip()
-                        distance_match = re.search(r'([\d.]+)', distance_text)
-                        if distance_match:
-                            distance = float(distance_match.group(1))
-                            # Convert km to miles if needed
-                            if 'km' in distance_text:
-                                distance *= 0.621371
-                            office["distance"] = distance
-                    except NoSuchElementException:
-                        logger.warning(f"Could not find distance for {office['name']}")
-                    
-                    # Add a source field
-                    office["source"] = "google_maps"
-                    office["source_city"] = self.city
-                    
-                    # Add timestamp
-                    office["scraped_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    
-                    offices.append(office)
-                    
-                    # Go back to results list
-                    back_button = self.driver.find_element(By.XPATH, "//button[@aria-label='Back']")
-                    back_button.click()
-                    
-                    # Wait for results to reload
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_element_located((By.CSS_SELECTOR, "div[role='feed']"))
-                    )
-                    
-                    # Add a random delay to avoid being blocked
-                    time.sleep(random.uniform(1, 3))
-                    
-                except (NoSuchElementException, ElementClickInterceptedException, TimeoutException) as e:
-                    logger.error(f"Error processing result {i}: {str(e)}")
-                    # Try to go back to results if we're stuck in details view
-                    try:
-                        back_button = self.driver.find_element(By.XPATH, "//button[@aria-label='Back']")
-                        back_button.click()
-                        time.sleep(1)
-                    except:
-                        pass
+            if self.network is not None:
+                offices = self._extract_results_from_network()
+            if not offices and self.parallel_tabs > 1:
+                offices = self._extract_results_in_tabs()
+            elif not offices:
+                offices = self._extract_results_sequentially()
             
             logger.info(f"Found {len(offices)} permit offices in {self.config['city']}")
             return offices
-            
+        
         except Exception as e:
+            # A dead browser is not a failed search: let the caller restart it and try again
+            if browser_gone(self.driver, e):
+                raise
             logger.error(f"Error searching for permit offices: {str(e)}")
             
             # If we couldn't get real data, return mock data
@@ -363,13 +331,345 @@ class SeleniumPermitScraper:
             ]
             return offices
     
+    def _extract_results_from_network(self):
+        """
+        Read the search results from the payloads Google Maps downloaded.
+        
+        Every field of every result comes from the captured search responses,
+        so there are no per-result clicks, waits or element lookups.
+        
+        Returns:
+            list: A list of dictionaries containing permit office information,
+                empty if the payloads held no places.
+        """
+        max_results = self.config["max_results"]
+        
+        # Scrolling the feed makes Maps fetch the further pages of results
+        self._collect_result_urls(max_results)
+        
+        responses = self.network.drain()
+        if self.recorder is not None:
+            self.recorder.record_responses("search_payloads", self.driver.current_url, responses)
+        offices = {}
+        for response in responses:
+            for place in find_places(response.json()):
+                office = self._office_from_place(place)
+                offices.setdefault(office["id"], office)
+        
+        logger.info(f"Read {len(offices)} places from {len(responses)} Google Maps payloads")
+        if not offices:
+            logger.warning("No places found in the network payloads, reading the page instead")
+        return list(offices.values())[:max_results]
+    
+    def _office_from_place(self, place):
+        """
+        Build an office from a place read by ``network_capture.find_places``.
+        
+        Args:
+            place (dict): The place fields.
+        
+        Returns:
+            dict: The permit office information.
+        """
+        office = {
+            "name": place["name"],
+            "id": f"ga-{re.sub(r'[^a-z0-9]', '-', place['name'].lower())}",
+            "city": self.config["city"],
+            "state": self.config["state"],
+        }
+        
+        if place["address"]:
+            office["address"] = place["address"]
+            zip_match = re.search(r'GA\s+(\d{5}(?:-\d{4})?)', place["address"])
+            if zip_match:
+                office["zip"] = zip_match.group(1)
+        for field in ("phone", "website", "hours", "latitude", "longitude"):
+            if place[field] is not None:
+                office[field] = place[field]
+        
+        office["source"] = "google_maps"
+        office["source_city"] = self.city
+        office["scraped_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return office
+    
+    def _extract_results_sequentially(self):
+        """
+        Click through the search results one at a time.
+        
+        Returns:
+            list: A list of dictionaries containing permit office information.
+        """
+        # Wait for the first results to render
+        self.waits.element(By.CSS_SELECTOR, f"div[role='feed'] {self.PLACE_LINK_SELECTOR}")
+        
+        # Find all result items
+        result_items = self.driver.find_elements(By.CSS_SELECTOR, "div[role='feed'] > div")
+        
+        offices = []
+        max_results = min(len(result_items), self.config["max_results"])
+        
+        for i in range(max_results):
+            try:
+                # Refresh the result items list if needed
+                if i > 0:
+                    result_items = self.driver.find_elements(By.CSS_SELECTOR, "div[role='feed'] > div")
+                
+                # Click on the result to view details
+                result_items[i].click()
+                
+                # Wait for the details panel to render
+                name_elem = self.waits.element_with_text(By.CSS_SELECTOR, self.PLACE_NAME_SELECTOR)
+                
+                office = self._extract_office_details()
+                if office is None:
+                    continue
+                offices.append(office)
+                
+                # Go back to results list
+                back_button = self.waits.clickable(By.XPATH, "//button[@aria-label='Back']")
+                back_button.click()
+                
+                # Wait for the details panel to close and the results to reload,
+                # so the next result's panel is not mistaken for this one
+                self.waits.gone(name_elem, "details panel closed")
+                self.waits.element(By.CSS_SELECTOR, "div[role='feed']")
+            
+            except (NoSuchElementException, ElementClickInterceptedException, TimeoutException) as e:
+                logger.error(f"Error processing result {i}: {str(e)}")
+                # Try to go back to results if we're stuck in details view
+                try:
+                    back_button = self.waits.optional(By.XPATH, "//button[@aria-label='Back']")
+                    if back_button is not None:
+                        back_button.click()
+                        self.waits.element(By.CSS_SELECTOR, "div[role='feed']")
+                except:
+                    pass
+        
+        return offices
+    
+    def _collect_result_urls(self, max_results):
+        """
+        Collect the place URLs of the search results, scrolling the feed until there are enough.
+        
+        Args:
+            max_results (int): The number of URLs wanted.
+        
+        Returns:
+            list: The place URLs, in result order.
+        """
+        feed = self.driver.find_element(By.CSS_SELECTOR, "div[role='feed']")
+        self.waits.until(
+            lambda driver: feed.find_elements(By.CSS_SELECTOR, self.PLACE_LINK_SELECTOR), self.PLACE_LINK_SELECTOR
+        )
+        
+        while True:
+            links = feed.find_elements(By.CSS_SELECTOR, self.PLACE_LINK_SELECTOR)
+            urls = list(dict.fromkeys(link.get_attribute("href") for link in links))
+            if len(urls) >= max_results:
+                break
+            
+            # Scroll the feed to load more results, until it stops growing
+            self.driver.execute_script("arguments[0].scrollTop = arguments[0].scrollHeight;", feed)
+            try:
+                self.waits.until(
+                    lambda driver: len(feed.find_elements(By.CSS_SELECTOR, self.PLACE_LINK_SELECTOR)) > len(links),
+                    "more results", timeout=3
+                )
+            except TimeoutException:
+                break
+        
+        return urls[:max_results]
+    
+    def _extract_results_in_tabs(self):
+        """
+        Open the search results in several tabs at once and extract each one.
+        
+        The result URLs are collected from the feed once, then loaded in batches
+        of ``parallel_tabs`` tabs. All tabs in a batch load at the same time, so
+        a city takes about as long as its slowest few pages instead of the sum
+        of every click, wait and back navigation.
+        
+        Returns:
+            list: A list of dictionaries containing permit office information.
+        """
+        urls = self._collect_result_urls(self.config["max_results"])
+        logger.info(f"Extracting {len(urls)} results in batches of {self.parallel_tabs} tabs")
+        
+        results_window = self.driver.current_window_handle
+        offices = []
+        
+        for start in range(0, len(urls), self.parallel_tabs):
+            known = set(self.driver.window_handles)
+            try:
+                # Start loading the whole batch before reading any of it
+                tabs = []
+                for url in urls[start:start + self.parallel_tabs]:
+                    tabs.append((self._open_tab(url), url))
+                    self.driver.switch_to.window(results_window)
+                
+                for handle, url in tabs:
+                    try:
+                        self.driver.switch_to.window(handle)
+                        self.waits.element_with_text(By.CSS_SELECTOR, self.PLACE_NAME_SELECTOR, timeout=15)
+                        office = self._extract_office_details()
+                        if office is not None:
+                            offices.append(office)
+                    except WebDriverException as e:
+                        # One broken tab only loses its own result, unless the whole browser is gone
+                        if browser_gone(self.driver, e):
+                            raise
+                        logger.error(f"Error processing result {url}: {str(e)}")
+            finally:
+                self._close_tabs(known, results_window)
+        
+        return offices
+    
+    def _close_tabs(self, keep, results_window):
+        """
+        Close every tab opened since a batch started and go back to the results.
+        
+        Args:
+            keep (set): The window handles that were open before the batch.
+            results_window (str): The window handle of the search results.
+        """
+        try:
+            for handle in self.driver.window_handles:
+                if handle not in keep:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+            self.driver.switch_to.window(results_window)
+        except Exception as e:
+            # Do not hide the error that ended the batch
+            logger.warning(f"Could not close result tabs: {str(e)}")
+    
+    def _open_tab(self, url):
+        """
+        Open a URL in a new tab without waiting for it to load.
+        
+        Args:
+            url (str): The URL to open.
+        
+        Returns:
+            str: The window handle of the tab, which is now the current window.
+        """
+        known = set(self.driver.window_handles)
+        self.driver.execute_script("window.open('about:blank', '_blank');")
+        handle = next(handle for handle in self.driver.window_handles if handle not in known)
+        self.driver.switch_to.window(handle)
+        
+        # Resource blocking is per tab, so set it up before the page starts loading
+        if self.lean:
+            block_resources(self.driver)
+        self.driver.execute_script("window.location.href = arguments[0];", url)
+        return handle
+    
+    def _extract_office_details(self):
+        """
+        Extract an office from the place details shown in the current window.
+        
+        Returns:
+            dict: The permit office information, or None if the place has no name.
+        """
+        office = {}
+        
+        # Name
+        name_elem = self.waits.optional(By.CSS_SELECTOR, self.PLACE_NAME_SELECTOR)
+        if name_elem is None:
+            logger.warning("Could not find name for an office")
+            return None
+        office["name"] = name_elem.text.strip()
+        
+        # Generate ID
+        office["id"] = f"ga-{re.sub(r'[^a-z0-9]', '-', office['name'].lower())}"
+        
+        # City and State
+        office["city"] = self.config["city"]
+        office["state"] = self.config["state"]
+        
+        # The info buttons can render after the name, so wait once for the
+        # first of them; after that the remaining fields are either there or
+        # the place does not have them, and none of the lookups wait
+        try:
+            self.waits.element(By.CSS_SELECTOR, self.PLACE_INFO_SELECTOR, timeout=3)
+        except TimeoutException:
+            logger.warning(f"No details section found for {office['name']}")
+        if self.recorder is not None:
+            self.recorder.record_page(self.driver, "place")
+        
+        # Address
+        address_button = self.waits.optional(By.XPATH, "//button[contains(@data-item-id, 'address')]")
+        if address_button is not None:
+            office["address"] = address_button.text.strip()
+            
+            # Try to extract zip from address
+            zip_match = re.search(r'GA\s+(\d{5}(?:-\d{4})?)', office["address"])
+            if zip_match:
+                office["zip"] = zip_match.group(1)
+        else:
+            logger.warning(f"Could not find address for {office['name']}")
+        
+        # Phone
+        phone_button = self.waits.optional(By.XPATH, "//button[contains(@data-item-id, 'phone:')]")
+        if phone_button is not None:
+            office["phone"] = phone_button.text.strip()
+        else:
+            logger.warning(f"Could not find phone for {office['name']}")
+        
+        # Website
+        website_button = self.waits.optional(By.XPATH, "//a[contains(@data-item-id, 'authority')]")
+        if website_button is not None:
+            office["website"] = website_button.get_attribute("href")
+        else:
+            logger.warning(f"Could not find website for {office['name']}")
+        
+        # Hours
+        hours_section = self.waits.optional(By.XPATH, "//div[contains(text(), 'Hours')]/following-sibling::div")
+        if hours_section is not None:
+            office["hours"] = hours_section.text.strip().replace('\n', '; ')
+        else:
+            logger.warning(f"Could not find hours for {office['name']}")
+        
+        # Get coordinates, from the map position or, for a place URL that has
+        # not been redirected yet, from its data parameter
+        try:
+            url = self.driver.current_url
+            coords_match = re.search(r'@([-\d.]+),([-\d.]+)', url) or re.search(r'!3d([-\d.]+)!4d([-\d.]+)', url)
+            if coords_match:
+                office["latitude"] = float(coords_match.group(1))
+                office["longitude"] = float(coords_match.group(2))
+        except Exception as e:
+            logger.warning(f"Could not extract coordinates for {office['name']}: {str(e)}")
+        
+        # Calculate distance (approximate)
+        distance_elem = self.waits.optional(By.XPATH, "//div[contains(text(), 'mi') or contains(text(), 'km')]")
+        if distance_elem is not None:
+            distance_text = distance_elem.text.strip()
+            distance_match = re.search(r'([\d.]+)', distance_text)
+            if distance_match:
+                distance = float(distance_match.group(1))
+                # Convert km to miles if needed
+                if 'km' in distance_text:
+                    distance *= 0.621371
+                office["distance"] = distance
+        else:
+            logger.warning(f"Could not find distance for {office['name']}")
+        
+        # Add a source field
+        office["source"] = "google_maps"
+        office["source_city"] = self.city
+        
+        # Add timestamp
+        office["scraped_at"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        return office
+    
     def get_permit_forms(self, office_id=None):
         """
         Get permit application forms for a specific office or city.
         
         Args:
             office_id (str, optional): The ID of the permit office.
-            
+        
         Returns:
             list: A list of dictionaries containing permit form information.
         """
@@ -382,127 +682,148 @@ class SeleniumPermitScraper:
         
         return self._get_cached_or_execute(cache_key, lambda: self._execute_form_search(office_id))
     
+    def get_permit_forms_batch(self, office_ids):
+        """
+        Get permit application forms for many offices at once.
+        
+        Offices with cached forms are read from the cache. The rest are looked
+        up together: the office index is loaded once, the Google fallback
+        search runs at most once, and the metadata of all forms found is
+        looked up in one concurrent batch.
+        
+        Args:
+            office_ids (list): The IDs of the permit offices.
+        
+        Returns:
+            dict: The forms of each office, keyed by office ID.
+        """
+        logger.info(f"Fetching permit forms for {len(office_ids)} offices in {self.config['city']}")
+        
+        forms_by_office = {}
+        pending = []
+        for office_id in office_ids:
+            cached = self._read_cache(f"{office_id}_forms")
+            if cached is None:
+                pending.append(office_id)
+            else:
+                forms_by_office[office_id] = cached
+        
+        if pending:
+            for office_id, forms in self._execute_form_searches(pending).items():
+                if not self._is_mock(forms):
+                    self._write_cache(f"{office_id}_forms", forms)
+                forms_by_office[office_id] = forms
+        
+        return {office_id: forms_by_office[office_id] for office_id in office_ids}
+    
+    def _office_index(self):
+        """
+        Get the cached offices of this city, keyed by ID.
+        
+        The offices file is only parsed again when it changes on disk.
+        
+        Returns:
+            dict: The offices, keyed by ID.
+        """
+        cache_file = f"cache/{self.city}_permit_offices.json"
+        try:
+            mtime = os.stat(cache_file).st_mtime_ns
+        except OSError:
+            self._offices_by_id, self._offices_mtime = {}, None
+            return self._offices_by_id
+        
+        if mtime != self._offices_mtime:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                self._offices_by_id = {office["id"]: office for office in json.load(f)}
+            self._offices_mtime = mtime
+        return self._offices_by_id
+    
     def _execute_form_search(self, office_id=None):
         """
         Execute the search for permit forms.
         
         Args:
             office_id (str, optional): The ID of the permit office.
-            
+        
         Returns:
             list: A list of dictionaries containing permit form information.
         """
-        search_query = self.config["form_search_query"]
+        return self._execute_form_searches([office_id])[office_id]
+    
+    def _execute_form_searches(self, office_ids):
+        """
+        Execute the search for permit forms for several offices.
         
-        # If office_id is provided, try to get the office website
-        if office_id:
-            # Load offices from cache
-            cache_file = f"cache/{self.city}_permit_offices.json"
-            if os.path.exists(cache_file):
-                with open(cache_file, "r", encoding="utf-8") as f:
-                    offices = json.load(f)
-                
-                # Find the office
-                office = next((o for o in offices if o["id"] == office_id), None)
-                if office and "website" in office:
-                    # Navigate directly to the office website
-                    try:
-                        self.driver.get(office["website"])
-                        
-                        # Wait for page to load
-                        time.sleep(3)
-                        
-                        # Look for links containing "form", "application", "permit", etc.
-                        form_links = self.driver.find_elements(
-                            By.XPATH, 
-                            "//a[contains(@href, '.pdf') and (contains(translate(text(), 'FORM', 'form'), 'form') or contains(translate(text(), 'APPLICATION', 'application'), 'application') or contains(translate(text(), 'PERMIT', 'permit'), 'permit'))]"
-                        )
-                        
-                        forms = []
-                        for i, link in enumerate(form_links[:10]):  # Limit to first 10 forms
-                            try:
-                                form = {
-                                    "id": f"{office_id}-form-{i+1}",
-                                    "title": link.text.strip() or f"Form {i+1}",
-                                    "description": link.get_attribute("title") or link.text.strip() or f"Form {i+1}",
-                                    "file_url": link.get_attribute("href"),
-                                    "file_type": "application/pdf",
-                                    "file_size": 0,  # We don't know the file size without downloading
-                                    "last_updated": datetime.now().strftime("%Y-%m-%d"),
-                                    "office_id": office_id,
-                                    "permit_type": "Building",
-                                    "source": "office_website",
-                                    "source_city": self.city,
-                                    "scraped_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                                }
-                                forms.append(form)
-                            except Exception as e:
-                                logger.warning(f"Error processing form link: {str(e)}")
-                        
-                        if forms:
-                            logger.info(f"Found {len(forms)} permit forms for office {office_id}")
-                            return forms
-                    except Exception as e:
-                        logger.error(f"Error fetching forms from office website: {str(e)}")
-        
-        # If we couldn't get forms from the office website or no office_id was provided,
-        # search for forms using Google
-        try:
-            # Navigate to Google
-            self.driver.get("https://www.google.com")
-            
-            # Accept cookies if the dialog appears
-            try:
-                WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_element_located((By.XPATH, "//button[contains(text(), 'Accept all')]"))
-                )
-                accept_button = self.driver.find_element(By.XPATH, "//button[contains(text(), 'Accept all')]")
-                accept_button.click()
-                time.sleep(1)
-            except (TimeoutException, NoSuchElementException):
-                logger.info("No cookie consent dialog found or it was already accepted")
+        Forms are taken from each office's website. Offices without any fall
+        back to a Google search, and then to mock data.
+        
+        Args:
+            office_ids (list): The IDs of the permit offices. None stands for
+                the whole city.
+        
+        Returns:
+            dict: The forms of each office, keyed by office ID.
+        """
+        offices = self._office_index()
+        forms_by_office = {}
+        found = []
+        
+        for office_id in office_ids:
+            # Try the office website first
+            office = offices.get(office_id) if office_id else None
+            forms = self._office_website_forms(office) if office and "website" in office else []
             
-            # Find the search box and enter the query
-            search_box = WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.NAME, "q"))
-            )
-            search_box.clear()
-            search_box.send_keys(search_query)
-            search_box.send_keys(Keys.RETURN)
+            # If we couldn't get forms from the office website or no office_id was provided,
+            # use the forms found by searching Google
+            if not forms:
+                forms = self._google_search_forms(office_id)
             
-            # Wait for search results to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.ID, "search"))
-            )
+            if forms:
+                found.extend(forms)
+            else:
+                forms = self._mock_forms(office_id)
+            forms_by_office[office_id] = forms
+        
+        # One batch of metadata requests for the real forms of every office
+        self.form_metadata.enrich(found)
+        return forms_by_office
+    
+    def _office_website_forms(self, office):
+        """
+        Find permit forms on an office website.
+        
+        Args:
+            office (dict): The permit office.
+        
+        Returns:
+            list: A list of dictionaries containing permit form information.
+        """
+        office_id = office["id"]
+        forms = []
+        
+        # Fetch the office website, over plain HTTP unless it needs the browser
+        try:
+            page = self.fetcher.fetch(office["website"], selector="a[href*='.pdf']")
+            if self.recorder is not None:
+                self.recorder.record_html("office_website", page.url, page.html)
             
-            # Find all PDF links
-            pdf_links = self.driver.find_elements(
-                By.XPATH, 
-                "//a[contains(@href, '.pdf')]"
-            )
+            # Look for links containing "form", "application", "permit", etc.
+            form_links = self._find_form_links(page.html)
             
-            forms = []
-            for i, link in enumerate(pdf_links[:10]):  # Limit to first 10 forms
+            for i, link in enumerate(form_links[:10]):  # Limit to first 10 forms
                 try:
-                    # Get the link text and href
-                    link_text = link.text.strip()
-                    href = link.get_attribute("href")
-                    
-                    # Skip if not a PDF or doesn't look like a form
-                    if not href.lower().endswith('.pdf') or not any(keyword in link_text.lower() for keyword in ['form', 'application', 'permit']):
-                        continue
-                    
+                    link_text = link.get_text(" ", strip=True)
                     form = {
-                        "id": f"{self.city}-form-{i+1}",
+                        "id": f"{office_id}-form-{i+1}",
                         "title": link_text or f"Form {i+1}",
-                        "description": link.get_attribute("aria-label") or link_text or f"Form {i+1}",
-                        "file_url": href,
+                        "description": link.get("title") or link_text or f"Form {i+1}",
+                        "file_url": urljoin(page.url, link["href"]),
                         "file_type": "application/pdf",
-                        "file_size": 0,  # We don't know the file size without downloading
-                        "last_updated": datetime.now().strftime("%Y-%m-%d"),
-                        "office_id": office_id or f"{self.city}-office",
+                        "file_size": 0,  # Filled in by FormMetadata
+                        "last_updated": None,  # Filled in by FormMetadata if the server reports it
+                        "office_id": office_id,
                         "permit_type": "Building",
-                        "source": "google_search",
+                        "source": "office_website",
                         "source_city": self.city,
                         "scraped_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                     }
@@ -511,13 +832,130 @@ class SeleniumPermitScraper:
                     logger.warning(f"Error processing form link: {str(e)}")
             
             if forms:
-                logger.info(f"Found {len(forms)} permit forms for {self.config['city']}")
-                return forms
-                
+                logger.info(f"Found {len(forms)} permit forms for office {office_id} ({page.mode})")
         except Exception as e:
+            if browser_gone(self.driver, e):
+                raise
+            logger.error(f"Error fetching forms from office website: {str(e)}")
+        
+        return forms
+    
+    def _google_search_forms(self, office_id=None):
+        """
+        Get the permit forms found by searching Google for the city's forms.
+        
+        The search is the same for every office, so it only runs once per
+        scraper and its results are labelled with each office ID.
+        
+        Args:
+            office_id (str, optional): The ID of the permit office.
+        
+        Returns:
+            list: A list of dictionaries containing permit form information.
+        """
+        if self._google_form_links is None:
+            self._google_form_links = self._search_google_form_links()
+        
+        return [
+            {
+                "id": f"{self.city}-form-{i+1}",
+                "title": link["text"] or f"Form {i+1}",
+                "description": link["label"] or link["text"] or f"Form {i+1}",
+                "file_url": link["href"],
+                "file_type": "application/pdf",
+                "file_size": 0,  # Filled in by FormMetadata
+                "last_updated": None,  # Filled in by FormMetadata if the server reports it
+                "office_id": office_id or f"{self.city}-office",
+                "permit_type": "Building",
+                "source": "google_search",
+                "source_city": self.city,
+                "scraped_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+            for i, link in self._google_form_links
+        ]
+    
+    def _search_google_form_links(self):
+        """
+        Search Google for links to the city's permit forms.
+        
+        Returns:
+            list: (result position, link) pairs, where each link is a dict with
+                the link ``text``, aria ``label`` and ``href``.
+        """
+        search_query = self.config["form_search_query"]
+        links = []
+        
+        try:
+            # Navigate to Google
+            self.driver.get("https://www.google.com")
+            self._accept_cookies()
+            
+            # Find the search box and enter the query
+            search_box = self.waits.element(By.NAME, "q")
+            search_box.clear()
+            search_box.send_keys(search_query)
+            search_box.send_keys(Keys.RETURN)
+            
+            # Wait for search results to load
+            self.waits.element(By.ID, "search")
+            if self.recorder is not None:
+                self.recorder.record_page(self.driver, "form_search")
+            
+            links = self._read_google_form_links()
+            if links:
+                logger.info(f"Found {len(links)} permit forms for {self.config['city']}")
+        
+        except Exception as e:
+            if browser_gone(self.driver, e):
+                raise
             logger.error(f"Error searching for permit forms: {str(e)}")
         
-        # If we couldn't get real forms, use mock data
+        return links
+    
+    def _read_google_form_links(self):
+        """
+        Read the links to permit forms from the Google results page in the current window.
+        
+        Returns:
+            list: (result position, link) pairs, where each link is a dict with
+                the link ``text``, aria ``label`` and ``href``.
+        """
+        links = []
+        
+        # Find all PDF links
+        pdf_links = self.driver.find_elements(
+            By.XPATH, 
+            "//a[contains(@href, '.pdf')]"
+        )
+        
+        for i, link in enumerate(pdf_links[:10]):  # Limit to first 10 forms
+            try:
+                # Get the link text and href
+                link_text = link.text.strip()
+                href = link.get_attribute("href")
+                
+                # Skip if not a PDF or doesn't look like a form
+                if not href.lower().endswith('.pdf') or not any(keyword in link_text.lower() for keyword in ['form', 'application', 'permit']):
+                    continue
+                
+                links.append((i, {"text": link_text, "label": link.get_attribute("aria-label"), "href": href}))
+            except Exception as e:
+                if browser_gone(self.driver, e):
+                    raise
+                logger.warning(f"Error processing form link: {str(e)}")
+        
+        return links
+    
+    def _mock_forms(self, office_id=None):
+        """
+        Build mock permit forms, for when no real ones were found.
+        
+        Args:
+            office_id (str, optional): The ID of the permit office.
+        
+        Returns:
+            list: A list of dictionaries containing permit form information.
+        """
         logger.info("Using mock form data")
         forms = [
             {
@@ -553,6 +991,23 @@ class SeleniumPermitScraper:
         logger.info(f"Using {len(forms)} mock permit forms for {self.config['city']}")
         return forms
     
+    @classmethod
+    def _find_form_links(cls, html):
+        """
+        Find the links to PDF forms on a page.
+        
+        Args:
+            html (str): The page HTML.
+        
+        Returns:
+            list: The ``a`` tags linking to PDFs whose text mentions a form, application or permit.
+        """
+        soup = BeautifulSoup(html, "html.parser")
+        return [
+            link for link in soup.find_all("a", href=True)
+            if ".pdf" in link["href"] and any(keyword in link.get_text().lower() for keyword in cls.FORM_LINK_KEYWORDS)
+        ]
+    
     def save_to_csv(self, data, filename):
         """
         Save data to a CSV file.
@@ -564,9 +1019,8 @@ class SeleniumPermitScraper:
         if not data:
             logger.warning(f"No data to save to {filename}")
             return
-            
-        df = pd.DataFrame(data)
-        df.to_csv(filename, index=False)
+        
+        write_csv(data, filename)
         logger.info(f"Saved data to {filename}")
     
     def save_to_json(self, data, filename):
@@ -580,20 +1034,56 @@ class SeleniumPermitScraper:
         if not data:
             logger.warning(f"No data to save to {filename}")
             return
-            
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2)
+        
+        write_json(data, filename)
         logger.info(f"Saved data to {filename}")
     
     def close(self):
         """Close the WebDriver."""
         if hasattr(self, 'driver'):
-            self.driver.quit()
-            logger.info("WebDriver closed")
+            self.waits.log_summary()
+            self.fetcher.log_summary()
+            self.fetcher.save()
+            self.form_metadata.log_summary()
+            self.form_metadata.save()
+            if self.recorder is not None:
+                self.recorder.save()
+            if self.owns_driver:
+                self.driver.quit()
+                logger.info("WebDriver closed")
 
 
 def main():
     """Main function to run the scraper."""
+    parser = argparse.ArgumentParser(description="Selenium permit office scraper")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only rewrite output that changed since the last crawl and write a change log")
+    parser.add_argument("--formats", default="csv,json",
+                        help="Comma-separated output formats: csv, json, jsonl (default: csv,json)")
+    parser.add_argument("--columnar", choices=sorted(COLUMNAR_FORMATS),
+                        help="Also write Parquet or Arrow IPC files partitioned by city to output/columnar")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted crawl from its checkpoint instead of starting over")
+    parser.add_argument("--parallel-tabs", type=int, default=0,
+                        help="Load this many Google Maps results at once in separate tabs (default: one at a time)")
+    parser.add_argument("--full-browser", action="store_true",
+                        help="Load pages with images, fonts, media and trackers instead of the lean browser profile")
+    parser.add_argument("--network-capture", action="store_true",
+                        help="Read Google Maps results from the network payloads instead of the page")
+    parser.add_argument("--record", metavar="DIR",
+                        help="Save snapshots of the pages extracted from, for benchmark_selenium.py")
+    parser.add_argument("--farm", type=int, metavar="WORKERS",
+                        help="Scrape with this many browser worker processes (see browser_farm.py)")
+    parser.add_argument("--memory-budget", type=float,
+                        help="With --farm, the memory all workers and their browsers may use, in MB (default: 750 per worker)")
+    args = parser.parse_args()
+    if args.farm and (args.incremental or args.resume):
+        parser.error("--incremental and --resume are not supported with --farm")
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+    
     # Create output directory if it doesn't exist
     output_dir = "output"
     os.makedirs(output_dir, exist_ok=True)
@@ -604,70 +1094,139 @@ def main():
     # Cities in Georgia to scrape - only Atlanta for now
     georgia_cities = ["atlanta"]
     
-    all_offices = []
-    all_forms = []
+    if args.farm:
+        # Imported here because browser_farm imports this module
+        from browser_farm import run_browser_farm
+        run_browser_farm(
+            georgia_cities, args.farm, output_dir, formats, args.columnar, args.memory_budget,
+            parallel_tabs=args.parallel_tabs, lean=not args.full_browser, network_capture=args.network_capture
+        )
+        logger.info("Scraping completed successfully")
+        return
+    
+    # Records are streamed to per-city and per-office files as they are
+    # scraped; the combined files are built from those at the end
+    office_files = []
+    form_files = []
+    
+    # In incremental mode, compare against the previous crawl
+    crawl_state = CrawlState() if args.incremental else None
+    change_log = ChangeLog(output_dir) if args.incremental else None
+    
+    # Progress is journaled so an interrupted crawl can be resumed
+    journal = CrawlJournal("cache/checkpoints/selenium_scraper.jsonl", resume=args.resume)
+    if args.resume:
+        remove_stale_tmp_files(output_dir)
+    failed_cities = []
+    
+    def save(records, basename, fieldnames, dataset, scope, city):
+        """Stream records to disk, keeping the files only if they changed."""
+        sink = RecordSink(basename, fieldnames, formats)
+        if args.columnar:
+            sink.add_writer(ColumnarWriter(dataset, city, f"{output_dir}/columnar", args.columnar))
+        # An empty result usually means the search failed, so it is not diffed
+        tracker = crawl_state.track(dataset, scope) if crawl_state and records else None
+        for record in records:
+            sink.write(record)
+            if tracker:
+                tracker.add(record)
+        
+        if tracker is None or change_log.write(dataset, scope, tracker.finish()):
+            return sink.close()
+        sink.discard()
+        return True
     
     for city in georgia_cities:
+        checkpoint = journal.city(city)
+        if checkpoint["done"]:
+            logger.info(f"Skipping {city}, finished before the crawl was interrupted")
+            office_files.extend(checkpoint["files"].get("offices", []))
+            form_files.extend(checkpoint["files"].get("forms", []))
+            continue
+        
         logger.info(f"Processing city: {city}")
+        city_files = {"offices": [], "forms": []}
         
         # Initialize the scraper for this city
-        scraper = SeleniumPermitScraper(city=city, headless=True)
+        scraper = SeleniumPermitScraper(
+            city=city, headless=True, parallel_tabs=args.parallel_tabs, lean=not args.full_browser,
+            network_capture=args.network_capture, record_dir=args.record
+        )
         
         try:
-            # Search for permit offices
-            offices = scraper.search_permit_offices()
+            # Search for permit offices, unless they were found before the crawl was interrupted
+            offices = checkpoint["offices"]
+            if offices is None:
+                offices = scraper.search_permit_offices()
+                journal.save_offices(city, offices)
             
-            if offices:
-                # Add city to each office
-                for office in offices:
-                    if "source_city" not in office:
-                        office["source_city"] = city
-                
-                all_offices.extend(offices)
-                
-                # Save city-specific data
-                scraper.save_to_csv(offices, f"{output_dir}/{city}_permit_offices.csv")
-                scraper.save_to_json(offices, f"{output_dir}/{city}_permit_offices.json")
+            # Add city to each office
+            for office in offices:
+                if "source_city" not in office:
+                    office["source_city"] = city
+            
+            # Save city-specific data, unless nothing changed since the last crawl
+            if save(offices, f"{output_dir}/{city}_permit_offices", OFFICE_FIELDS, "offices", city, city):
+                city_files["offices"].append(f"{output_dir}/{city}_permit_offices")
             
             # Get permit forms for the city
-            city_forms = scraper.get_permit_forms()
+            city_forms = journal.get_records(city, "forms", city)
+            if city_forms is None:
+                city_forms = scraper.get_permit_forms()
+                journal.save_records(city, "forms", city, city_forms)
+            if save(city_forms, f"{output_dir}/{city}_permit_forms", FORM_FIELDS, "forms", city, city):
+                city_files["forms"].append(f"{output_dir}/{city}_permit_forms")
             
-            if city_forms:
-                all_forms.extend(city_forms)
-                
-                # Save city-specific data
-                scraper.save_to_csv(city_forms, f"{output_dir}/{city}_permit_forms.csv")
-                scraper.save_to_json(city_forms, f"{output_dir}/{city}_permit_forms.json")
+            # Get permit forms for each office, looking up those not journaled in one batch
+            forms_by_office = {office["id"]: journal.get_records(city, "forms", office["id"]) for office in offices}
+            pending = [office_id for office_id, forms in forms_by_office.items() if forms is None]
+            if pending:
+                for office_id, office_forms in scraper.get_permit_forms_batch(pending).items():
+                    journal.save_records(city, "forms", office_id, office_forms)
+                    forms_by_office[office_id] = office_forms
             
-            # Get permit forms for each office
             for office in offices:
-                office_forms = scraper.get_permit_forms(office["id"])
-                if office_forms:
-                    all_forms.extend(office_forms)
-                    
-                    # Save office-specific data
-                    scraper.save_to_csv(office_forms, f"{output_dir}/{office['id']}_forms.csv")
-                    scraper.save_to_json(office_forms, f"{output_dir}/{office['id']}_forms.json")
+                office_forms = forms_by_office[office["id"]]
+                
+                # Save office-specific data, unless nothing changed since the last crawl
+                if save(office_forms, f"{output_dir}/{office['id']}_forms", FORM_FIELDS, "forms", office["id"], city):
+                    city_files["forms"].append(f"{output_dir}/{office['id']}_forms")
             
-            logger.info(f"Completed scraping for {city}")
+            # Save the crawl state with each city so a resumed crawl diffs
+            # against what was already reported
+            if crawl_state is not None:
+                crawl_state.save()
             
+            journal.city_done(city, city_files)
+            office_files.extend(city_files["offices"])
+            form_files.extend(city_files["forms"])
+            logger.info(f"Completed scraping for {city}")
+        
         except Exception as e:
             logger.error(f"Error processing {city}: {str(e)}")
+            failed_cities.append(city)
         
         finally:
             # Make sure to close the WebDriver
             scraper.close()
     
-    # Save combined data
-    if all_offices:
-        pd.DataFrame(all_offices).to_csv(f"{output_dir}/atlanta_permit_offices.csv", index=False)
-        with open(f"{output_dir}/atlanta_permit_offices.json", 'w', encoding='utf-8') as f:
-            json.dump(all_offices, f, indent=2)
+    if crawl_state is not None:
+        change_log.close()
+    
+    # Save combined data by concatenating the per-city and per-office files
+    for fmt in formats:
+        extension = FILE_EXTENSIONS[fmt]
+        if office_files:
+            concat_files([name + extension for name in office_files], f"{output_dir}/georgia_permit_offices{extension}")
+        if form_files:
+            concat_files([name + extension for name in form_files], f"{output_dir}/georgia_permit_forms{extension}")
     
-    if all_forms:
-        pd.DataFrame(all_forms).to_csv(f"{output_dir}/atlanta_permit_forms.csv", index=False)
-        with open(f"{output_dir}/atlanta_permit_forms.json", 'w', encoding='utf-8') as f:
-            json.dump(all_forms, f, indent=2)
+    # Keep the checkpoint if any city failed, so --resume retries only those
+    if failed_cities:
+        journal.close()
+        logger.warning(f"Failed cities: {', '.join(failed_cities)}. Run again with --resume to retry them.")
+    else:
+        journal.complete()
     
     logger.info("Scraping completed successfully")
 
@@ -0,0 +1,302 @@
+#!/usr/bin/env python
+"""
+Sharded Permit Office Crawler
+
+Runs the basic scraper across many cities in parallel worker processes.
+BeautifulSoup parsing is CPU-bound and holds the GIL, so each worker is a
+separate process with its own interpreter. Cities are handed out to workers
+from a shared task queue, the workers share the on-disk page and extraction
+caches (both are written atomically), and all extracted records come back
+through a single result queue to one writer in the parent process.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import queue
+import time
+
+from basic_scraper import PermitOfficeScraper
+from columnar import ColumnarWriter, COLUMNAR_FORMATS
+import transport
+from writers import RecordSink, OFFICE_FIELDS, FEE_FIELDS, FILE_EXTENSIONS, concat_files, parse_formats
+
+logger = logging.getLogger(__name__)
+
+
+def crawl_worker(worker_id, tasks, results, max_depth=0, max_pages=200, http2=False):
+    """
+    Crawl cities from the task queue until it hands out None.
+    
+    Each city's records are sent back as ``("offices"|"fees", city, records)``
+    batches followed by ``("done", city, None)``, or ``("error", city, message)``
+    if the city failed. When the worker stops it sends ``("exit", worker_id, stats)``.
+    
+    Args:
+        worker_id (int): The worker number, used in the throughput report.
+        tasks (multiprocessing.Queue): City names to crawl.
+        results (multiprocessing.Queue): Where records and reports are sent.
+        max_depth (int): How many links deep to crawl from each permit page.
+        max_pages (int): The most pages to fetch per city in a deep crawl.
+        http2 (bool): Use HTTP/2 where servers support it.
+    """
+    # Each worker process has its own pooled session, shared by its cities
+    transport.configure(http2=http2)
+    stats = {"cities": 0, "failed": 0, "pages": 0, "requests": 0, "bytes": 0, "records": 0}
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    
+    while True:
+        city = tasks.get()
+        if city is None:
+            break
+        
+        try:
+            scraper = PermitOfficeScraper(city)
+            
+            offices = scraper.get_permit_offices(max_depth, max_pages)
+            for office in offices:
+                office["source_city"] = city
+            results.put(("offices", city, offices))
+            
+            for office in offices:
+                fees = scraper.get_permit_fees(office["id"])
+                for fee in fees:
+                    fee["source_city"] = city
+                results.put(("fees", city, fees))
+                stats["records"] += len(fees)
+            
+            results.put(("done", city, None))
+            stats["cities"] += 1
+            stats["records"] += len(offices)
+        except Exception as e:
+            logger.error(f"Worker {worker_id} failed on {city}: {str(e)}")
+            results.put(("error", city, str(e)))
+            stats["failed"] += 1
+            continue
+        
+        stats["pages"] += scraper.stats["requests"] + scraper.stats["cache_hits"]
+        stats["requests"] += scraper.stats["requests"]
+        stats["bytes"] += scraper.stats["bytes"]
+    
+    stats["seconds"] = time.perf_counter() - start
+    stats["cpu_seconds"] = time.process_time() - cpu_start
+    results.put(("exit", worker_id, stats))
+
+
+class ShardWriter:
+    """Writes records from all workers to per-city files as they arrive."""
+    
+    def __init__(self, output_dir="output", formats=("csv", "json"), columnar=None):
+        """
+        Initialize the writer.
+        
+        Args:
+            output_dir (str): Directory the output files are written to.
+            formats (tuple): Any of "csv", "json" and "jsonl".
+            columnar (str, optional): "parquet" or "arrow" to also write columnar files.
+        """
+        self.output_dir = output_dir
+        self.formats = formats
+        self.columnar = columnar
+        self.office_files = {}
+        self.fee_files = {}
+        self._sinks = {}
+    
+    def _sink(self, dataset, city):
+        key = (dataset, city)
+        if key not in self._sinks:
+            fieldnames = OFFICE_FIELDS if dataset == "offices" else FEE_FIELDS
+            sink = RecordSink(f"{self.output_dir}/{city}_permit_{dataset}", fieldnames, self.formats)
+            if self.columnar:
+                sink.add_writer(ColumnarWriter(dataset, city, f"{self.output_dir}/columnar", self.columnar))
+            self._sinks[key] = sink
+        return self._sinks[key]
+    
+    def write(self, dataset, city, records):
+        """
+        Write a batch of records for a city.
+        
+        Args:
+            dataset (str): "offices" or "fees".
+            city (str): The city the records belong to.
+            records (list): The records.
+        """
+        self._sink(dataset, city).write_all(records)
+    
+    def finish_city(self, city):
+        """
+        Close a finished city's files.
+        
+        Args:
+            city (str): The city.
+        """
+        for dataset, files in (("offices", self.office_files), ("fees", self.fee_files)):
+            sink = self._sink(dataset, city)
+            if sink.close():
+                files[city] = sink.basename
+            del self._sinks[(dataset, city)]
+    
+    def discard_city(self, city):
+        """
+        Throw away a failed city's partial files, leaving earlier output untouched.
+        
+        Args:
+            city (str): The city.
+        """
+        for dataset in ("offices", "fees"):
+            sink = self._sinks.pop((dataset, city), None)
+            if sink is not None:
+                sink.discard()
+    
+    def write_combined(self, cities):
+        """
+        Concatenate the per-city files into combined files, in city order.
+        
+        Args:
+            cities (list): The cities in the order they should appear.
+        """
+        for fmt in self.formats:
+            extension = FILE_EXTENSIONS[fmt]
+            for dataset, files in (("offices", self.office_files), ("fees", self.fee_files)):
+                sources = [files[city] + extension for city in cities if city in files]
+                if sources:
+                    concat_files(sources, f"{self.output_dir}/all_permit_{dataset}{extension}")
+
+
+def run_sharded_crawl(cities, workers=None, output_dir="output", formats=("csv", "json"),
+                      columnar=None, max_depth=0, max_pages=200, http2=False):
+    """
+    Crawl cities in parallel worker processes and write their records.
+    
+    Args:
+        cities (list): The cities to crawl.
+        workers (int, optional): The number of worker processes. Defaults to
+            the number of CPUs, but never more than the number of cities.
+        output_dir (str): Directory the output files are written to.
+        formats (tuple): Any of "csv", "json" and "jsonl".
+        columnar (str, optional): "parquet" or "arrow" to also write columnar files.
+        max_depth (int): How many links deep to crawl from each permit page.
+        max_pages (int): The most pages to fetch per city in a deep crawl.
+        http2 (bool): Use HTTP/2 where servers support it.
+    
+    Returns:
+        list: Per-worker throughput statistics.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, len(cities)))
+    os.makedirs(output_dir, exist_ok=True)
+    os.makedirs("cache", exist_ok=True)
+    
+    tasks = multiprocessing.Queue()
+    # Bounded so that workers wait for the writer instead of piling up records
+    results = multiprocessing.Queue(maxsize=1000)
+    for city in cities:
+        tasks.put(city)
+    for _ in range(workers):
+        tasks.put(None)
+    
+    processes = []
+    for worker_id in range(workers):
+        process = multiprocessing.Process(
+            target=crawl_worker,
+            args=(worker_id, tasks, results, max_depth, max_pages, http2),
+            name=f"crawl-worker-{worker_id}"
+        )
+        process.start()
+        processes.append(process)
+    logger.info(f"Started {workers} crawl workers for {len(cities)} cities")
+    
+    writer = ShardWriter(output_dir, formats, columnar)
+    worker_stats = []
+    start = time.perf_counter()
+    
+    while len(worker_stats) < workers:
+        try:
+            kind, key, payload = results.get(timeout=1)
+        except queue.Empty:
+            # Stop waiting for workers that died without reporting
+            if not any(process.is_alive() for process in processes) and results.empty():
+                logger.error("All crawl workers exited before reporting")
+                break
+            continue
+        
+        if kind in ("offices", "fees"):
+            writer.write(kind, key, payload)
+        elif kind == "done":
+            writer.finish_city(key)
+            logger.info(f"Finished {key}")
+        elif kind == "error":
+            writer.discard_city(key)
+            logger.error(f"Failed to crawl {key}: {payload}")
+        elif kind == "exit":
+            worker_stats.append(dict(payload, worker=key))
+    
+    for process in processes:
+        process.join()
+    
+    writer.write_combined(cities)
+    _log_throughput(worker_stats, time.perf_counter() - start)
+    return worker_stats
+
+
+def _log_throughput(worker_stats, elapsed):
+    total_pages = 0
+    total_records = 0
+    for stats in sorted(worker_stats, key=lambda s: s["worker"]):
+        seconds = stats["seconds"] or 1e-9
+        logger.info(
+            f"Worker {stats['worker']}: {stats['cities']} cities ({stats['failed']} failed), "
+            f"{stats['pages']} pages ({stats['requests']} requested), {stats['records']} records, "
+            f"{stats['pages'] / seconds:.2f} pages/s, {stats['records'] / seconds:.1f} records/s, "
+            f"{stats['bytes'] / seconds / 1024:.1f} KB/s, CPU {stats['cpu_seconds'] / seconds:.0%} busy"
+        )
+        total_pages += stats["pages"]
+        total_records += stats["records"]
+    
+    elapsed = elapsed or 1e-9
+    logger.info(
+        f"Total: {total_pages} pages, {total_records} records in {elapsed:.1f}s "
+        f"({total_pages / elapsed:.2f} pages/s, {total_records / elapsed:.1f} records/s)"
+    )
+
+
+def main():
+    """Main function to run the sharded crawler."""
+    parser = argparse.ArgumentParser(description="Crawl many cities in parallel worker processes")
+    parser.add_argument("--cities", default=",".join(PermitOfficeScraper.CITY_CONFIGS),
+                        help="Comma-separated cities to crawl (default: all configured cities)")
+    parser.add_argument("--workers", type=int, help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument("--formats", default="csv,json",
+                        help="Comma-separated output formats: csv, json, jsonl (default: csv,json)")
+    parser.add_argument("--columnar", choices=sorted(COLUMNAR_FORMATS),
+                        help="Also write Parquet or Arrow IPC files partitioned by city to output/columnar")
+    parser.add_argument("--max-depth", type=int, default=0,
+                        help="Crawl each city website this many links deep from the permit page (default: 0)")
+    parser.add_argument("--max-pages", type=int, default=200,
+                        help="The most pages to fetch per city in a deep crawl (default: 200)")
+    parser.add_argument("--http2", action="store_true",
+                        help="Use HTTP/2 where servers support it (requires httpx[http2])")
+    args = parser.parse_args()
+    
+    cities = []
+    for city in args.cities.split(","):
+        city = city.strip().lower().replace(" ", "_")
+        if city in PermitOfficeScraper.CITY_CONFIGS:
+            cities.append(city)
+        elif city:
+            logger.warning(f"Skipping unknown city: {city}")
+    try:
+        formats = parse_formats(args.formats)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    run_sharded_crawl(
+        cities, args.workers, formats=formats, columnar=args.columnar,
+        max_depth=args.max_depth, max_pages=args.max_pages, http2=args.http2
+    )
+    logger.info("Sharded crawl completed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+Page Snapshots
+
+Records the pages the Selenium scraper extracts from during a real run, so the
+extraction can be replayed and benchmarked offline (see
+``benchmark_selenium.py``).
+
+A snapshot directory is a ``replay.py`` fixture set. Every rendered page is
+saved as DOM HTML with its scripts removed, so it renders the same static
+page when loaded again instead of starting the app. It is listed in
+``index.json`` under the URL it was recorded from, and ``ReplayServer`` can
+serve it to the browser. An MHTML archive of each page is kept next to it
+when Chrome can make one; it can be opened in Chrome to see the page as it
+looked. Network payloads captured in ``--network-capture`` mode are saved as
+JSON. ``snapshots.json`` lists every snapshot with its kind:
+
+- ``search``: a Google Maps results page
+- ``search_payloads``: the Maps search responses read in network capture mode
+- ``place``: a Google Maps place page
+- ``form_search``: a Google results page searched for PDF forms
+- ``office_website``: an office website searched for form links
+
+Record a run with ``python selenium_scraper.py --record snapshots/run1``.
+"""
+
+import json
+import logging
+import os
+import re
+
+from replay import FixtureSet
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_TAGS = re.compile(r"<script\b[^>]*>.*?</script\s*>", re.I | re.S)
+
+
+def strip_scripts(html):
+    """
+    Remove the scripts from a page, so loading it again does not re-run the app.
+    
+    Args:
+        html (str): The page HTML.
+    
+    Returns:
+        str: The HTML without ``script`` elements.
+    """
+    return SCRIPT_TAGS.sub("", html)
+
+
+class SnapshotSet:
+    """The snapshots recorded in a directory."""
+    
+    def __init__(self, directory):
+        """
+        Open a snapshot directory, loading its listing if there is one.
+        
+        Args:
+            directory (str): The snapshot directory.
+        """
+        self.directory = directory
+        self.fixtures = FixtureSet(directory)
+        self.entries = {}
+        
+        listing = os.path.join(directory, "snapshots.json")
+        if os.path.exists(listing):
+            with open(listing, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def snapshots(self, kinds=None):
+        """
+        List the snapshots.
+        
+        Args:
+            kinds (iterable, optional): Only list snapshots of these kinds.
+        
+        Returns:
+            list: The snapshot entries, each with ``kind``, ``url`` and the
+                ``html``, ``mhtml`` and ``responses`` file names (None if absent).
+        """
+        return [entry for entry in self.entries.values() if kinds is None or entry["kind"] in kinds]
+    
+    def path(self, name):
+        """
+        Get the path of a snapshot file.
+        
+        Args:
+            name (str): The file name from a snapshot entry.
+        
+        Returns:
+            str: The path.
+        """
+        return os.path.join(self.directory, name)
+    
+    def read_html(self, entry):
+        """
+        Read the HTML of a snapshot.
+        
+        Args:
+            entry (dict): The snapshot entry.
+        
+        Returns:
+            str: The page HTML.
+        """
+        with open(self.path(entry["html"]), "r", encoding="utf-8") as f:
+            return f.read()
+    
+    def read_responses(self, entry):
+        """
+        Read the network payloads of a snapshot.
+        
+        Args:
+            entry (dict): The snapshot entry.
+        
+        Returns:
+            list: Dicts with the ``url``, ``status``, ``mime_type`` and ``body`` of each response.
+        """
+        with open(self.path(entry["responses"]), "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    def _name(self, kind):
+        return f"{kind}-{len(self.entries) + 1:04d}"
+    
+    def add(self, kind, url, html=None, mhtml=None, responses=None):
+        """
+        Record a snapshot, replacing an earlier one of the same kind and URL.
+        
+        Args:
+            kind (str): What the page is, such as "place" or "search".
+            url (str): The URL the page was recorded from.
+            html (str, optional): The page HTML. Scripts are removed.
+            mhtml (str, optional): An MHTML archive of the page.
+            responses (list, optional): Captured network responses, as dicts
+                with ``url``, ``status``, ``mime_type`` and ``body``.
+        """
+        key = f"{kind} {url}"
+        name = self.entries[key]["name"] if key in self.entries else self._name(kind)
+        entry = {"kind": kind, "url": url, "name": name, "html": None, "mhtml": None, "responses": None}
+        
+        if html is not None:
+            entry["html"] = f"{name}.html"
+            self.fixtures.add(url, strip_scripts(html), entry["html"])
+        if mhtml is not None:
+            entry["mhtml"] = f"{name}.mhtml"
+            with open(self.path(entry["mhtml"]), "w", encoding="utf-8") as f:
+                f.write(mhtml)
+        if responses is not None:
+            entry["responses"] = f"{name}.responses.json"
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.path(entry["responses"]), "w", encoding="utf-8") as f:
+                json.dump(responses, f)
+        
+        self.entries[key] = entry
+    
+    def save(self):
+        """Write the fixture index and the snapshot listing."""
+        self.fixtures.save()
+        with open(os.path.join(self.directory, "snapshots.json"), "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+class SnapshotRecorder:
+    """Records the pages a scraper extracts from into a ``SnapshotSet``."""
+    
+    def __init__(self, directory, mhtml=True):
+        """
+        Initialize the recorder.
+        
+        Args:
+            directory (str): The snapshot directory. Snapshots already in it are kept.
+            mhtml (bool): Also save an MHTML archive of each rendered page.
+        """
+        self.snapshots = SnapshotSet(directory)
+        self.mhtml = mhtml
+        self.recorded = 0
+    
+    def record_page(self, driver, kind):
+        """
+        Record the page shown in the driver's current window.
+        
+        Args:
+            driver: The Chrome WebDriver.
+            kind (str): What the page is.
+        """
+        mhtml = None
+        if self.mhtml:
+            try:
+                mhtml = driver.execute_cdp_cmd("Page.captureSnapshot", {"format": "mhtml"})["data"]
+            except Exception as e:
+                logger.debug(f"Could not capture MHTML: {str(e)}")
+        try:
+            self.snapshots.add(kind, driver.current_url, html=driver.page_source, mhtml=mhtml)
+            self.recorded += 1
+        except Exception as e:
+            logger.warning(f"Could not record {kind} snapshot: {str(e)}")
+    
+    def record_html(self, kind, url, html):
+        """
+        Record a page that was fetched rather than rendered.
+        
+        Args:
+            kind (str): What the page is.
+            url (str): The page URL.
+            html (str): The page HTML.
+        """
+        self.snapshots.add(kind, url, html=html)
+        self.recorded += 1
+    
+    def record_responses(self, kind, url, responses):
+        """
+        Record captured network responses.
+        
+        Args:
+            kind (str): What the responses are.
+            url (str): The page the responses were captured on.
+            responses (list): ``network_capture.CapturedResponse`` objects.
+        """
+        self.snapshots.add(kind, url, responses=[
+            {"url": response.url, "status": response.status, "mime_type": response.mime_type, "body": response.body}
+            for response in responses
+        ])
+        self.recorded += 1
+    
+    def save(self):
+        """Write the snapshot listing."""
+        if self.recorded:
+            self.snapshots.save()
+            logger.info(f"Recorded {self.recorded} page snapshots to {self.snapshots.directory}")
@@ -0,0 +1,327 @@
+"""
+Shared HTTP Transport
+
+One pooled HTTP session per process, shared by every scraper instance, so
+connections, TLS sessions and DNS lookups are reused across cities instead of
+every scraper starting cold:
+
+- per-host connection pools sized to the crawl's concurrency, with retries
+  and backoff for transient errors
+- TCP keep-alive on pooled connections so idle sockets are not silently
+  dropped between requests to the same host
+- an in-process DNS cache with a TTL in front of ``socket.getaddrinfo``
+- optional HTTP/2 multiplexing through httpx (``pip install httpx[http2]``);
+  servers that do not support HTTP/2 are spoken to over HTTP/1.1 as usual
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+# Transport settings; change them with configure() before the first request
+SETTINGS = {
+    "pool_connections": 20,  # Number of hosts to keep a pool for
+    "pool_maxsize": 10,      # Connections kept per host; match the crawl's concurrency
+    "retries": 3,
+    "backoff_factor": 0.5,
+    "keepalive_idle": 60,    # Seconds before TCP keep-alive probes start
+    "dns_ttl": 300,          # Seconds to cache DNS answers; 0 disables the cache
+    "http2": False,
+    "timeout": 30,
+}
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+
+
+class DNSCache:
+    """A TTL cache in front of ``socket.getaddrinfo``."""
+    
+    def __init__(self, ttl=300):
+        """
+        Initialize the cache.
+        
+        Args:
+            ttl (float): How long answers are reused, in seconds.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._getaddrinfo = socket.getaddrinfo
+    
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        """Resolve like ``socket.getaddrinfo``, answering repeat lookups from the cache."""
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        
+        result = self._getaddrinfo(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+            self.misses += 1
+        return result
+    
+    def install(self):
+        """Route every lookup in this process through the cache."""
+        socket.getaddrinfo = self.getaddrinfo
+    
+    def uninstall(self):
+        """Restore the original resolver."""
+        socket.getaddrinfo = self._getaddrinfo
+    
+    def clear(self):
+        """Forget all cached answers."""
+        with self._lock:
+            self._entries.clear()
+
+
+_dns_cache = None
+
+
+def install_dns_cache(ttl=300):
+    """
+    Install the process-wide DNS cache, or update its TTL if already installed.
+    
+    Args:
+        ttl (float): How long answers are reused, in seconds.
+    
+    Returns:
+        DNSCache: The installed cache.
+    """
+    global _dns_cache
+    with _lock:
+        if _dns_cache is None:
+            _dns_cache = DNSCache(ttl)
+            _dns_cache.install()
+        else:
+            _dns_cache.ttl = ttl
+    return _dns_cache
+
+
+def _socket_options(keepalive_idle):
+    options = list(HTTPConnection.default_socket_options) + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    # Probe timing is only tunable on some platforms
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        options += [
+            (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, keepalive_idle),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10),
+            (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3),
+        ]
+    return options
+
+
+class KeepAliveAdapter(HTTPAdapter):
+    """An ``HTTPAdapter`` whose pooled connections use TCP keep-alive."""
+    
+    def __init__(self, keepalive_idle=60, **kwargs):
+        self.socket_options = _socket_options(keepalive_idle)
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class Http2Session:
+    """
+    A ``requests.Session``-like wrapper around an HTTP/2 capable httpx client.
+    
+    Only the parts of the requests API the scrapers use are provided. httpx
+    errors are re-raised as the matching ``requests`` exceptions so existing
+    error handling keeps working.
+    """
+    
+    def __init__(self, pool_maxsize=10, pool_connections=20, retries=3, timeout=30):
+        self.headers = dict(DEFAULT_HEADERS)
+        self.timeout = timeout
+        self._client = httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_connections * pool_maxsize,
+                max_keepalive_connections=pool_connections * pool_maxsize,
+                keepalive_expiry=60,
+            ),
+            transport=httpx.HTTPTransport(http2=True, retries=retries),
+        )
+    
+    def request(self, method, url, headers=None, timeout=None, **kwargs):
+        merged = dict(self.headers)
+        merged.update(headers or {})
+        if "allow_redirects" in kwargs:
+            # requests' name for it; the client follows redirects unless told not to
+            kwargs["follow_redirects"] = kwargs.pop("allow_redirects")
+        try:
+            response = self._client.request(method, url, headers=merged, timeout=timeout or self.timeout, **kwargs)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+        except httpx.HTTPError as e:
+            raise requests.exceptions.RequestException(str(e)) from e
+        return _Http2Response(response)
+    
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+    
+    def head(self, url, **kwargs):
+        return self.request("HEAD", url, **kwargs)
+    
+    def close(self):
+        self._client.close()
+
+
+class _Http2Response:
+    """Adapts an ``httpx.Response`` to the parts of ``requests.Response`` the scrapers use."""
+    
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+    
+    @property
+    def text(self):
+        return self._response.text
+    
+    @property
+    def content(self):
+        return self._response.content
+    
+    def json(self):
+        return self._response.json()
+    
+    def raise_for_status(self):
+        try:
+            self._response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise requests.exceptions.HTTPError(str(e)) from e
+
+
+class _TimeoutSession(requests.Session):
+    """A ``requests.Session`` with a default timeout, which requests lacks."""
+    
+    timeout = 30
+    
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(pool_maxsize=None, pool_connections=None, retries=None, http2=None):
+    """
+    Create a new pooled session. Most callers want the shared ``get_session``.
+    
+    Args:
+        pool_maxsize (int, optional): Connections kept per host.
+        pool_connections (int, optional): Number of hosts to keep a pool for.
+        retries (int, optional): Retries for connection errors and 429/5xx responses.
+        http2 (bool, optional): Use HTTP/2 through httpx when it is installed.
+    
+    Returns:
+        requests.Session or Http2Session: The session.
+    """
+    pool_maxsize = pool_maxsize or SETTINGS["pool_maxsize"]
+    pool_connections = pool_connections or SETTINGS["pool_connections"]
+    retries = SETTINGS["retries"] if retries is None else retries
+    http2 = SETTINGS["http2"] if http2 is None else http2
+    
+    if http2:
+        if httpx is not None:
+            return Http2Session(pool_maxsize, pool_connections, retries, SETTINGS["timeout"])
+        logger.warning("HTTP/2 requires httpx with h2 (pip install httpx[http2]); using HTTP/1.1")
+    
+    session = _TimeoutSession()
+    session.timeout = SETTINGS["timeout"]
+    session.headers.update(DEFAULT_HEADERS)
+    
+    retry = Retry(
+        total=retries,
+        backoff_factor=SETTINGS["backoff_factor"],
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD", "OPTIONS"),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = KeepAliveAdapter(
+        keepalive_idle=SETTINGS["keepalive_idle"],
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def configure(**settings):
+    """
+    Change transport settings. Call before the first request of the process.
+    
+    Args:
+        **settings: Any of the keys of ``SETTINGS``.
+    """
+    global _session
+    unknown = set(settings) - set(SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown transport settings: {', '.join(sorted(unknown))}")
+    
+    with _lock:
+        SETTINGS.update(settings)
+        # The next get_session() builds a session with the new settings
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session():
+    """
+    Get the process-wide shared session, creating it on first use.
+    
+    Forked worker processes get their own session rather than sharing the
+    parent's sockets.
+    
+    Returns:
+        requests.Session or Http2Session: The shared session.
+    """
+    global _session, _session_pid
+    
+    if SETTINGS["dns_ttl"]:
+        install_dns_cache(SETTINGS["dns_ttl"])
+    
+    with _lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = create_session()
+            _session_pid = os.getpid()
+        return _session
@@ -0,0 +1,206 @@
+"""
+Browser Waits
+
+Condition-based waits for the Selenium scraper. Instead of sleeping for a fixed
+time after each navigation or click, or letting an implicit wait hold up every
+lookup, the scraper waits for the condition it actually needs: an element to
+appear, a panel to change, a dialog to go away. Lookups for elements a page may
+simply not have are answered immediately from what is already rendered.
+
+Every wait and lookup is timed by name, so a summary at the end of a crawl
+shows which selectors the time went to and which ones timed out.
+"""
+
+import logging
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+logger = logging.getLogger(__name__)
+
+
+class WaitEngine:
+    """Explicit, timed waits on one WebDriver."""
+    
+    def __init__(self, driver, timeout=10, poll_frequency=0.1):
+        """
+        Initialize the wait engine.
+        
+        Args:
+            driver: The WebDriver to wait on. It should have no implicit wait,
+                or optional lookups will wait for it.
+            timeout (float): The default time to wait for a condition, in seconds.
+            poll_frequency (float): How often conditions are checked, in seconds.
+        """
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.stats = {}
+    
+    def until(self, condition, name, timeout=None):
+        """
+        Wait for a condition to hold.
+        
+        Args:
+            condition (callable): Called with the driver until it returns a
+                truthy value, like Selenium's expected conditions.
+            name (str): What is waited for, for the timing summary.
+            timeout (float, optional): The time to wait. Defaults to the engine's timeout.
+        
+        Returns:
+            Any: The condition's value.
+        
+        Raises:
+            TimeoutException: If the condition does not hold in time.
+        """
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return WebDriverWait(
+                self.driver, self.timeout if timeout is None else timeout, poll_frequency=self.poll_frequency
+            ).until(condition)
+        except TimeoutException:
+            timed_out = True
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, timed_out)
+    
+    def element(self, by, selector, timeout=None):
+        """
+        Wait for an element to be present.
+        
+        Args:
+            by (str): The locator strategy, e.g. ``By.CSS_SELECTOR``.
+            selector (str): The locator.
+            timeout (float, optional): The time to wait.
+        
+        Returns:
+            WebElement: The element.
+        """
+        return self.until(EC.presence_of_element_located((by, selector)), selector, timeout)
+    
+    def element_with_text(self, by, selector, timeout=None):
+        """
+        Wait for an element to be present and have rendered text.
+        
+        Args:
+            by (str): The locator strategy.
+            selector (str): The locator.
+            timeout (float, optional): The time to wait.
+        
+        Returns:
+            WebElement: The element.
+        """
+        def has_text(driver):
+            element = driver.find_element(by, selector)
+            return element if element.text.strip() else False
+        
+        return self.until(has_text, selector, timeout)
+    
+    def clickable(self, by, selector, timeout=None):
+        """
+        Wait for an element to be visible and enabled.
+        
+        Args:
+            by (str): The locator strategy.
+            selector (str): The locator.
+            timeout (float, optional): The time to wait.
+        
+        Returns:
+            WebElement: The element.
+        """
+        return self.until(EC.element_to_be_clickable((by, selector)), selector, timeout)
+    
+    def gone(self, element, name, timeout=None):
+        """
+        Wait for an element to be removed from the page, e.g. a dismissed dialog
+        or a panel that is replaced after a click.
+        
+        Args:
+            element (WebElement): The element.
+            name (str): What is waited for, for the timing summary.
+            timeout (float, optional): The time to wait.
+        """
+        self.until(EC.staleness_of(element), name, timeout)
+    
+    def page_loaded(self, timeout=None):
+        """
+        Wait for the current document to be parsed. Images and other
+        subresources may still be loading, as with the ``eager`` page load strategy.
+        
+        Args:
+            timeout (float, optional): The time to wait.
+        """
+        self.until(
+            lambda driver: driver.execute_script("return document.readyState") != "loading",
+            "document.readyState", timeout
+        )
+    
+    def optional(self, by, selector, within=None):
+        """
+        Look up an element the page may not have, without waiting.
+        
+        Args:
+            by (str): The locator strategy.
+            selector (str): The locator.
+            within (WebElement, optional): Search inside this element instead of the page.
+        
+        Returns:
+            WebElement: The first matching element, or None.
+        """
+        start = time.perf_counter()
+        elements = (within or self.driver).find_elements(by, selector)
+        self.record(selector, time.perf_counter() - start, False)
+        return elements[0] if elements else None
+    
+    def record(self, name, seconds, timed_out=False):
+        """
+        Record the duration of a wait.
+        
+        Args:
+            name (str): What was waited for.
+            seconds (float): How long it took.
+            timed_out (bool): Whether the wait gave up.
+        """
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = {"count": 0, "seconds": 0.0, "max_seconds": 0.0, "timeouts": 0}
+        stats["count"] += 1
+        stats["seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+        stats["timeouts"] += timed_out
+    
+    def summary(self):
+        """
+        Get the recorded wait times, slowest first.
+        
+        Returns:
+            list: A dictionary per name with its count, total, mean and maximum
+                seconds and number of timeouts.
+        """
+        rows = [
+            dict(stats, name=name, mean_seconds=stats["seconds"] / stats["count"])
+            for name, stats in self.stats.items()
+        ]
+        return sorted(rows, key=lambda row: row["seconds"], reverse=True)
+    
+    def log_summary(self, limit=10):
+        """
+        Log where the waiting time went.
+        
+        Args:
+            limit (int): The number of names to log.
+        """
+        rows = self.summary()
+        if not rows:
+            return
+        
+        total = sum(row["seconds"] for row in rows)
+        logger.info(f"Spent {total:.1f}s waiting on {sum(row['count'] for row in rows)} waits and lookups")
+        for row in rows[:limit]:
+            logger.info(
+                f"  {row['seconds']:7.2f}s  {row['count']:4d}x  mean {row['mean_seconds']:.2f}s  "
+                f"max {row['max_seconds']:.2f}s  {row['timeouts']} timeouts  {row['name']}"
+            )
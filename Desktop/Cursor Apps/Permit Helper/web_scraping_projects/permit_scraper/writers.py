@@ -0,0 +1,376 @@
+"""
+Streaming Record Writers
+
+Writers that append scraped records to CSV, JSON Lines or JSON files as they
+are produced instead of collecting them in memory first. Combined output is
+built by concatenating the per-city files on disk, so memory stays flat no
+matter how many cities are crawled.
+"""
+
+import csv
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Column order for each dataset. Fields a scraper does not fill in are left empty.
+OFFICE_FIELDS = [
+    "id", "name", "address", "city", "state", "zip", "phone", "email", "website",
+    "hours", "latitude", "longitude", "distance", "source", "source_city", "scraped_at"
+]
+FEE_FIELDS = [
+    "id", "name", "amount", "amount_max", "unit", "description", "office_id", "permit_type",
+    "source_city", "scraped_at"
+]
+FORM_FIELDS = [
+    "id", "title", "description", "file_url", "file_type", "file_size", "last_updated",
+    "office_id", "permit_type", "source", "source_city", "scraped_at"
+]
+
+FILE_EXTENSIONS = {"csv": ".csv", "json": ".json", "jsonl": ".jsonl"}
+
+
+class _RecordWriter:
+    """Base class for writers that stream records to a temporary file."""
+    
+    def __init__(self, filename, flush_every=100):
+        """
+        Open the writer.
+        
+        Records go to a temporary file that replaces ``filename`` on ``close``,
+        so readers never see a half-written file.
+        
+        Args:
+            filename (str): The file to write.
+            flush_every (int): Flush to disk after this many records.
+        """
+        self.filename = filename
+        self.flush_every = flush_every
+        self.count = 0
+        self._tmp_filename = f"{filename}.{os.getpid()}.tmp"
+        self._file = open(self._tmp_filename, "w", encoding="utf-8", newline="")
+    
+    def write(self, record):
+        """
+        Write a single record.
+        
+        Args:
+            record (dict): The record to write.
+        """
+        self._write_record(record)
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self._file.flush()
+    
+    def close(self):
+        """Finish the file and move it into place."""
+        self._write_footer()
+        self._file.close()
+        os.replace(self._tmp_filename, self.filename)
+    
+    def discard(self):
+        """Throw away everything written, leaving any existing file untouched."""
+        self._file.close()
+        os.remove(self._tmp_filename)
+    
+    def _write_record(self, record):
+        raise NotImplementedError
+    
+    def _write_footer(self):
+        pass
+
+
+class CsvRecordWriter(_RecordWriter):
+    """Streams records to a CSV file with a fixed set of columns."""
+    
+    def __init__(self, filename, fieldnames, flush_every=100):
+        """
+        Open the writer and write the header row.
+        
+        Args:
+            filename (str): The file to write.
+            fieldnames (list): The CSV columns, in order.
+            flush_every (int): Flush to disk after this many records.
+        """
+        super().__init__(filename, flush_every)
+        self.fieldnames = list(fieldnames)
+        self._known_fields = set(self.fieldnames)
+        self._warned_fields = set()
+        self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore", lineterminator="\n")
+        self._writer.writeheader()
+    
+    def _write_record(self, record):
+        unknown = set(record) - self._known_fields - self._warned_fields
+        if unknown:
+            logger.warning(f"Dropping fields not in the {self.filename} columns: {', '.join(sorted(unknown))}")
+            self._warned_fields.update(unknown)
+        self._writer.writerow(record)
+
+
+class JsonlRecordWriter(_RecordWriter):
+    """Streams records to a JSON Lines file, one record per line."""
+    
+    def _write_record(self, record):
+        self._file.write(json.dumps(record) + "\n")
+
+
+class JsonRecordWriter(_RecordWriter):
+    """Streams records to a JSON array formatted like ``json.dump(data, indent=2)``."""
+    
+    def _write_record(self, record):
+        self._file.write("[\n" if self.count == 0 else ",\n")
+        self._file.write("\n".join("  " + line for line in json.dumps(record, indent=2).splitlines()))
+    
+    def _write_footer(self):
+        self._file.write("\n]" if self.count else "[]")
+
+
+class RecordSink:
+    """Fans each record out to one writer per output format."""
+    
+    def __init__(self, basename, fieldnames, formats=("csv", "json"), flush_every=100):
+        """
+        Open a writer for each format.
+        
+        Args:
+            basename (str): The output path without extension.
+            fieldnames (list): The CSV columns, in order.
+            formats (tuple): Any of "csv", "json" and "jsonl".
+            flush_every (int): Flush to disk after this many records.
+        """
+        self.basename = basename
+        self.count = 0
+        self.writers = []
+        
+        for fmt in formats:
+            filename = basename + FILE_EXTENSIONS[fmt]
+            if fmt == "csv":
+                self.writers.append(CsvRecordWriter(filename, fieldnames, flush_every))
+            elif fmt == "jsonl":
+                self.writers.append(JsonlRecordWriter(filename, flush_every))
+            else:
+                self.writers.append(JsonRecordWriter(filename, flush_every))
+    
+    def add_writer(self, writer):
+        """
+        Send records to an additional writer, such as a columnar writer.
+        
+        Args:
+            writer: Any object with ``write``, ``close`` and ``discard`` methods.
+        """
+        self.writers.append(writer)
+    
+    def write(self, record):
+        """
+        Write a record to every format.
+        
+        Args:
+            record (dict): The record to write.
+        """
+        for writer in self.writers:
+            writer.write(record)
+        self.count += 1
+    
+    def write_all(self, records):
+        """
+        Write several records to every format.
+        
+        Args:
+            records (iterable): The records to write.
+        """
+        for record in records:
+            self.write(record)
+    
+    def close(self):
+        """
+        Finish all files. Nothing is written if no records were received.
+        
+        Returns:
+            bool: True if files were written.
+        """
+        if not self.count:
+            logger.warning(f"No data to save to {self.basename}.*")
+            self.discard()
+            return False
+        
+        for writer in self.writers:
+            writer.close()
+        logger.info(f"Saved {self.count} records to {self.basename}.*")
+        return True
+    
+    def discard(self):
+        """Throw away everything written, leaving existing files untouched."""
+        for writer in self.writers:
+            writer.discard()
+
+
+def parse_formats(value):
+    """
+    Parse a comma-separated list of output formats, such as a ``--formats`` argument.
+    
+    Args:
+        value (str): The formats, e.g. "csv,jsonl".
+    
+    Returns:
+        list: The format names.
+    
+    Raises:
+        ValueError: If a format is unknown or none is given.
+    """
+    formats = [fmt.strip() for fmt in value.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in FILE_EXTENSIONS]
+    if unknown:
+        raise ValueError(f"unknown output format(s): {', '.join(unknown)} (choose from {', '.join(FILE_EXTENSIONS)})")
+    if not formats:
+        raise ValueError("no output format given")
+    return formats
+
+
+def concat_files(sources, dest):
+    """
+    Concatenate CSV, JSON Lines or JSON array files written by these writers.
+    
+    Files are streamed line by line, so memory use does not depend on their
+    size. The format is taken from the destination's extension. Missing
+    sources are skipped.
+    
+    Args:
+        sources (list): The files to concatenate, in order.
+        dest (str): The combined file to write.
+    
+    Returns:
+        bool: True if the combined file was written.
+    """
+    sources = [source for source in sources if os.path.exists(source)]
+    if not sources:
+        logger.warning(f"No data to save to {dest}")
+        return False
+    
+    tmp_dest = f"{dest}.{os.getpid()}.tmp"
+    with open(tmp_dest, "w", encoding="utf-8", newline="") as out:
+        if dest.endswith(".csv"):
+            _concat_csv(sources, out)
+        elif dest.endswith(".json"):
+            _concat_json(sources, out)
+        else:
+            for source in sources:
+                with open(source, "r", encoding="utf-8", newline="") as f:
+                    for line in f:
+                        out.write(line)
+    os.replace(tmp_dest, dest)
+    
+    logger.info(f"Saved combined data to {dest}")
+    return True
+
+
+def _concat_csv(sources, out):
+    header = None
+    for source in sources:
+        with open(source, "r", encoding="utf-8", newline="") as f:
+            first_line = f.readline()
+            if header is None:
+                header = first_line
+                out.write(first_line)
+            elif first_line != header:
+                raise ValueError(f"CSV header of {source} does not match {sources[0]}")
+            for line in f:
+                out.write(line)
+
+
+def _concat_json(sources, out):
+    # Each source is "[]" or "[\n" + records + "\n]", as written by JsonRecordWriter
+    wrote_any = False
+    for source in sources:
+        with open(source, "r", encoding="utf-8") as f:
+            first_line = f.readline()
+            if first_line.strip() == "[]":
+                continue
+            if first_line.strip() != "[":
+                raise ValueError(f"{source} was not written by JsonRecordWriter")
+            
+            out.write("[\n" if not wrote_any else ",\n")
+            wrote_any = True
+            
+            # Hold back the last two lines: the final record line, whose
+            # newline belongs to the closing bracket, and the bracket itself
+            pending = []
+            for line in f:
+                pending.append(line)
+                if len(pending) > 2:
+                    out.write(pending.pop(0))
+            if len(pending) != 2 or pending[1].strip() != "]":
+                raise ValueError(f"{source} is not a complete JSON array")
+            out.write(pending[0].rstrip("\n"))
+    
+    out.write("\n]" if wrote_any else "[]")
+
+
+def remove_stale_tmp_files(directory):
+    """
+    Remove temporary files left behind by writers of crashed processes.
+    
+    Files of processes that are still running are left alone.
+    
+    Args:
+        directory (str): The output directory.
+    
+    Returns:
+        int: The number of files removed.
+    """
+    removed = 0
+    if not os.path.isdir(directory):
+        return removed
+    
+    for name in os.listdir(directory):
+        match = re.match(r".+\.(\d+)\.tmp$", name)
+        if not match or _process_running(int(match.group(1))):
+            continue
+        os.remove(os.path.join(directory, name))
+        removed += 1
+    
+    if removed:
+        logger.info(f"Removed {removed} unfinished files from {directory}")
+    return removed
+
+
+def _process_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+
+def write_csv(data, filename):
+    """
+    Save a list of records to a CSV file.
+    
+    Columns are taken from the records in order of first appearance.
+    
+    Args:
+        data (list): A list of dictionaries to save.
+        filename (str): The name of the file to save to.
+    """
+    fieldnames = list(dict.fromkeys(key for record in data for key in record))
+    writer = CsvRecordWriter(filename, fieldnames)
+    for record in data:
+        writer.write(record)
+    writer.close()
+
+
+def write_json(data, filename):
+    """
+    Save a list of records to a JSON file.
+    
+    Args:
+        data (list): A list of dictionaries to save.
+        filename (str): The name of the file to save to.
+    """
+    writer = JsonRecordWriter(filename)
+    for record in data:
+        writer.write(record)
+    writer.close()
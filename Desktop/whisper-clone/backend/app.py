@@ -4,11 +4,15 @@ Whisper Clone Backend Server
 Real-time speech-to-text processing using whisper.cpp
 """
 
+import atexit
+import io
 import os
+import signal
 import sys
 import threading
 import subprocess
 import tempfile
+import time
 import wave
 import json
 from pathlib import Path
@@ -20,12 +24,22 @@ import pyaudio
 import numpy as np
 import requests
 
+from audio_buffer import AudioRingBuffer
+from streaming import StreamingTranscriber
+from whisper_server import WhisperModelServer
+
 # Configuration
 SAMPLE_RATE = 16000
 CHUNK_SIZE = 1024
 CHANNELS = 1
-RECORD_SECONDS = 5  # Process audio in 5-second chunks
+RECORD_SECONDS = 5  # Process audio in 5-second chunks when not streaming
+STREAMING = True  # Re-transcribe a sliding window every step and send interim text
+STREAM_STEP_SECONDS = 1.0  # How often the current window is transcribed
+STREAM_WINDOW_SECONDS = 8.0  # Longest window before its text is finalized
+STREAM_OVERLAP_SECONDS = 1.0  # Audio carried into the next window when one is cut
+BUFFER_SECONDS = 30  # Audio held between capture and transcription before the oldest is dropped
 WHISPER_MODEL = "base"
+USE_MODEL_SERVER = True  # Keep the model loaded in whisper-server between chunks
 
 class WhisperCloneServer:
     def __init__(self):
@@ -35,8 +49,16 @@ class WhisperCloneServer:
         
         self.is_recording = False
         self.audio_thread = None
+        self.audio_buffer = None
+        self.input_overflows = 0
+        self.falling_behind = False
         self.whisper_path = self._find_whisper_executable()
         self.model_path = self._find_model_path()
+        self.model_server = None
+        
+        server_path = self._find_whisper_server_executable() if USE_MODEL_SERVER else None
+        if server_path:
+            self.model_server = WhisperModelServer(server_path, self.model_path)
         
         self._setup_routes()
         self._setup_socket_events()
@@ -58,6 +80,23 @@ class WhisperCloneServer:
         
         raise FileNotFoundError("whisper.cpp executable not found")
     
+    def _find_whisper_server_executable(self):
+        """Find the whisper.cpp server executable, if it was built"""
+        possible_paths = [
+            "../whisper.cpp/build/bin/whisper-server",
+            "./whisper.cpp/build/bin/whisper-server",
+            "whisper.cpp/build/bin/whisper-server",
+            "../whisper.cpp/server",
+            "./whisper.cpp/server",
+            "whisper.cpp/server"
+        ]
+        
+        for path in possible_paths:
+            if os.path.exists(path):
+                return os.path.abspath(path)
+        
+        return None
+    
     def _find_model_path(self):
         """Find the Whisper model file"""
         model_name = f"ggml-{WHISPER_MODEL}.bin"
@@ -96,7 +135,9 @@ class WhisperCloneServer:
                 'status': 'healthy',
                 'whisper_path': self.whisper_path,
                 'model_path': self.model_path,
-                'is_recording': self.is_recording
+                'transcriber': 'whisper-server' if self.model_server else 'whisper-cli',
+                'is_recording': self.is_recording,
+                'audio_buffer': self.audio_buffer.stats(SAMPLE_RATE) if self.audio_buffer else None
             })
         
         @self.app.route('/start-recording', methods=['POST'])
@@ -135,7 +176,7 @@ class WhisperCloneServer:
                     processed_file = self._prepare_audio_for_whisper(temp_file.name)
                     
                     # Transcribe
-                    transcription = self._run_whisper(processed_file)
+                    transcription = self._transcribe(processed_file)
                     
                     # Clean up
                     os.unlink(temp_file.name)
@@ -201,6 +242,12 @@ class WhisperCloneServer:
     def _record_audio(self):
         """Record audio from microphone in real-time"""
         try:
+            # Capture and transcription run separately: the PyAudio callback only copies
+            # samples into the ring buffer, and the worker transcribes from it
+            self.audio_buffer = AudioRingBuffer(SAMPLE_RATE * BUFFER_SECONDS)
+            self.input_overflows = 0
+            self.falling_behind = False
+            
             # Initialize PyAudio
             audio = pyaudio.PyAudio()
             
@@ -210,65 +257,131 @@ class WhisperCloneServer:
                 channels=CHANNELS,
                 rate=SAMPLE_RATE,
                 input=True,
-                frames_per_buffer=CHUNK_SIZE
+                frames_per_buffer=CHUNK_SIZE,
+                stream_callback=self._on_audio
             )
             
-            print("🎙️ Recording started...")
-            frames = []
-            frame_count = 0
+            # Streaming re-transcribes every step, which is only fast enough with the model kept loaded
+            if STREAMING and self.model_server:
+                worker_target = self._streaming_worker
+            else:
+                worker_target = self._transcription_worker
+            worker = threading.Thread(target=worker_target, args=(self.audio_buffer,))
+            worker.daemon = True
+            worker.start()
             
-            while self.is_recording:
-                data = stream.read(CHUNK_SIZE)
-                frames.append(data)
-                frame_count += 1
-                
-                # Process every 5 seconds of audio
-                if frame_count >= (SAMPLE_RATE * RECORD_SECONDS) // CHUNK_SIZE:
-                    self._process_audio_chunk(frames, audio)
-                    frames = []
-                    frame_count = 0
+            print("🎙️ Recording started...")
+            stream.start_stream()
             
-            # Process remaining frames
-            if frames:
-                self._process_audio_chunk(frames, audio)
+            while self.is_recording and stream.is_active():
+                time.sleep(0.1)
             
             # Clean up
             stream.stop_stream()
             stream.close()
             audio.terminate()
             
-            print("🛑 Recording stopped...")
+            # Let the worker transcribe what is still buffered
+            self.audio_buffer.close()
+            worker.join()
+            
+            stats = self.audio_buffer.stats(SAMPLE_RATE)
+            print(f"🛑 Recording stopped... (peak buffer {stats['peak_occupancy']:.0%}, "
+                  f"{stats['dropped_seconds']:.1f}s dropped, {self.input_overflows} input overflows)")
             
         except Exception as e:
             print(f"❌ Audio recording error: {e}")
             self.socketio.emit('error', {'message': f'Recording error: {e}'})
+            if self.audio_buffer:
+                self.audio_buffer.close()
     
-    def _process_audio_chunk(self, frames, audio):
-        """Process a chunk of audio and transcribe it"""
-        try:
-            # Convert frames to numpy array
-            audio_data = np.frombuffer(b''.join(frames), dtype=np.int16)
+    def _on_audio(self, in_data, frame_count, time_info, status_flags):
+        """PyAudio callback: copy captured samples into the ring buffer and return at once"""
+        if status_flags & pyaudio.paInputOverflow:
+            self.input_overflows += 1
+        
+        dropped = self.audio_buffer.write(np.frombuffer(in_data, dtype=np.int16))
+        if dropped and not self.falling_behind:
+            # Report once per overflow, not on every callback while it lasts
+            print(f"⚠️ Audio buffer full ({BUFFER_SECONDS}s); dropping the oldest audio until transcription catches up")
+        self.falling_behind = bool(dropped)
+        
+        return (None, pyaudio.paContinue)
+    
+    def _transcription_worker(self, audio_buffer):
+        """Transcribe fixed-length windows from the ring buffer until it is closed and empty"""
+        window = SAMPLE_RATE * RECORD_SECONDS
+        
+        while True:
+            samples = audio_buffer.read(window, timeout=0.5)
+            if len(samples):
+                self._process_audio_chunk(samples)
+            elif audio_buffer.closed:
+                break
+    
+    def _streaming_worker(self, audio_buffer):
+        """Transcribe a sliding window every step, sending interim and final text"""
+        streamer = StreamingTranscriber(
+            lambda samples: self._transcribe(self._to_wav(samples)),
+            sample_rate=SAMPLE_RATE,
+            step=STREAM_STEP_SECONDS,
+            window=STREAM_WINDOW_SECONDS,
+            overlap=STREAM_OVERLAP_SECONDS
+        )
+        
+        while True:
+            samples = audio_buffer.read(streamer.step_samples, timeout=0.5)
+            if not len(samples) and not audio_buffer.closed:
+                continue
             
-            # Save to temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                with wave.open(temp_file.name, 'wb') as wf:
-                    wf.setnchannels(CHANNELS)
-                    wf.setsampwidth(audio.get_sample_size(pyaudio.paInt16))
-                    wf.setframerate(SAMPLE_RATE)
-                    wf.writeframes(b''.join(frames))
+            try:
+                if len(samples):
+                    # Catch up on audio that arrived while whisper was running
+                    backlog = min(len(audio_buffer), streamer.window_samples)
+                    if backlog:
+                        samples = np.concatenate((samples, audio_buffer.read(backlog, timeout=0)))
+                    events = streamer.feed(samples)
+                else:
+                    # Closed and drained: finalize the last segment
+                    events = streamer.flush()
                 
-                # Transcribe the audio
-                transcription = self._run_whisper(temp_file.name)
+                for event in events:
+                    event['timestamp'] = self._get_timestamp()
+                    self.socketio.emit('transcription', event)
                 
-                # Clean up temp file
-                os.unlink(temp_file.name)
+            except Exception as e:
+                print(f"❌ Audio processing error: {e}")
+                self.socketio.emit('error', {'message': f'Processing error: {e}'})
+            
+            if not len(samples):
+                break
+        
+        print(f"📊 Streaming: {streamer.stats['windows']} windows, {streamer.stats['finals']} final segments, "
+              f"{streamer.stats['forced_cuts']} cut at {STREAM_WINDOW_SECONDS:g}s")
+    
+    def _to_wav(self, samples):
+        """Encode int16 samples as an in-memory WAV file"""
+        wav_buffer = io.BytesIO()
+        with wave.open(wav_buffer, 'wb') as wf:
+            wf.setnchannels(CHANNELS)
+            wf.setsampwidth(samples.dtype.itemsize)
+            wf.setframerate(SAMPLE_RATE)
+            wf.writeframes(samples.tobytes())
+        return wav_buffer.getvalue()
                 
-                # Emit transcription to frontend
-                if transcription.strip():
-                    self.socketio.emit('transcription', {
-                        'text': transcription,
-                        'timestamp': self._get_timestamp()
-                    })
+    def _process_audio_chunk(self, samples):
+        """Process a chunk of audio and transcribe it"""
+        try:
+            # The model server takes the WAV data as is
+            transcription = self._transcribe(self._to_wav(samples))
+                
+            # Emit transcription to frontend
+            if transcription.strip():
+                self.socketio.emit('transcription', {
+                    'text': transcription,
+                    'is_final': True,
+                    'timestamp': self._get_timestamp()
+                })
                     
         except Exception as e:
             print(f"❌ Audio processing error: {e}")
@@ -307,6 +420,24 @@ class WhisperCloneServer:
             print("⚠️ ffmpeg not available, using original audio format")
             return input_path
     
+    def _transcribe(self, audio):
+        """Transcribe WAV audio (bytes or a file path), preferring the resident model server"""
+        if self.model_server:
+            try:
+                return self.model_server.transcribe(audio)
+            except Exception as e:
+                print(f"⚠️ Model server failed, falling back to whisper-cli: {e}")
+        
+        if isinstance(audio, (str, os.PathLike)):
+            return self._run_whisper(audio)
+        
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+            temp_file.write(audio)
+        try:
+            return self._run_whisper(temp_file.name)
+        finally:
+            os.unlink(temp_file.name)
+    
     def _run_whisper(self, audio_file_path):
         """Run whisper.cpp on audio file and return transcription"""
         try:
@@ -396,12 +527,25 @@ class WhisperCloneServer:
         from datetime import datetime
         return datetime.now().isoformat()
     
+    def _start_model_server(self):
+        """Start the model server, falling back to whisper-cli if it fails"""
+        try:
+            self.model_server.start()
+        except Exception as e:
+            print(f"⚠️ {e}; using whisper-cli for each chunk")
+            self.model_server = None
+    
     def run(self, host='127.0.0.1', port=5000, debug=False):
         """Start the Flask server"""
         print(f"🚀 Starting Whisper Clone Server on {host}:{port}")
         print(f"📂 Whisper executable: {self.whisper_path}")
         print(f"🤖 Model: {self.model_path}")
         
+        if self.model_server:
+            # Load the model in the background so the first chunk does not wait for it
+            atexit.register(self.model_server.stop)
+            threading.Thread(target=self._start_model_server, daemon=True).start()
+        
         self.socketio.run(
             self.app,
             host=host,
@@ -413,17 +557,32 @@ class WhisperCloneServer:
 def main():
     """Main entry point"""
     import argparse
+    global WHISPER_MODEL, USE_MODEL_SERVER, STREAMING, STREAM_STEP_SECONDS, STREAM_WINDOW_SECONDS
     
     parser = argparse.ArgumentParser(description='Whisper Clone Backend Server')
     parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
     parser.add_argument('--port', type=int, default=5000, help='Port to bind to')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     parser.add_argument('--model', default='base', help='Whisper model to use')
+    parser.add_argument('--no-model-server', action='store_true',
+                        help='Run whisper-cli for every chunk instead of keeping the model loaded')
+    parser.add_argument('--no-stream', action='store_true',
+                        help=f'Transcribe fixed {RECORD_SECONDS}-second blocks instead of a sliding window')
+    parser.add_argument('--step', type=float, default=STREAM_STEP_SECONDS,
+                        help='Seconds between streaming transcriptions')
+    parser.add_argument('--window', type=float, default=STREAM_WINDOW_SECONDS,
+                        help='Longest streaming window in seconds before its text is finalized')
     
     args = parser.parse_args()
     
-    global WHISPER_MODEL
     WHISPER_MODEL = args.model
+    USE_MODEL_SERVER = not args.no_model_server
+    STREAMING = not args.no_stream
+    STREAM_STEP_SECONDS = args.step
+    STREAM_WINDOW_SECONDS = args.window
+    
+    # The Electron app stops the backend with SIGTERM; exit cleanly so the model server is stopped too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     try:
         server = WhisperCloneServer()
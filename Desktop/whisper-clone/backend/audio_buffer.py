@@ -0,0 +1,126 @@
+"""
+Audio ring buffer
+A fixed-size NumPy ring buffer between the microphone callback (producer) and
+the transcription worker (consumer), so capture never waits for whisper
+"""
+
+import threading
+import time
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """Thread-safe ring buffer of audio samples with occupancy and overflow metrics"""
+    
+    def __init__(self, capacity, dtype=np.int16, drop_oldest=True):
+        """
+        capacity: number of samples the buffer holds
+        drop_oldest: on overflow, overwrite the oldest audio (True) or discard the new audio (False)
+        """
+        self.capacity = capacity
+        self.drop_oldest = drop_oldest
+        self._buffer = np.zeros(capacity, dtype=dtype)
+        self._read_pos = 0
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        
+        self.written = 0
+        self.read_total = 0
+        self.dropped = 0
+        self.overflows = 0
+        self.peak_size = 0
+        self.last_overflow = None
+    
+    def __len__(self):
+        with self._cond:
+            return self._size
+    
+    @property
+    def closed(self):
+        return self._closed
+    
+    def write(self, samples):
+        """Append samples without blocking; returns the number of samples dropped"""
+        samples = np.asarray(samples, dtype=self._buffer.dtype).ravel()
+        with self._cond:
+            if self._closed:
+                return len(samples)
+            
+            dropped = 0
+            overflow = self._size + len(samples) - self.capacity
+            if overflow > 0:
+                self.overflows += 1
+                self.last_overflow = time.time()
+                if self.drop_oldest:
+                    # Keep the newest audio: skip the oldest samples (and any excess of the write itself)
+                    if len(samples) > self.capacity:
+                        dropped += len(samples) - self.capacity
+                        samples = samples[-self.capacity:]
+                        overflow = self._size + len(samples) - self.capacity
+                    self._read_pos = (self._read_pos + overflow) % self.capacity
+                    self._size -= overflow
+                    dropped += overflow
+                else:
+                    dropped = overflow
+                    samples = samples[:len(samples) - overflow]
+                self.dropped += dropped
+            
+            count = len(samples)
+            if count:
+                start = (self._read_pos + self._size) % self.capacity
+                first = min(count, self.capacity - start)
+                self._buffer[start:start + first] = samples[:first]
+                self._buffer[:count - first] = samples[first:]
+                self._size += count
+                self.written += count
+                self.peak_size = max(self.peak_size, self._size)
+                self._cond.notify_all()
+            
+            return dropped
+    
+    def read(self, count, timeout=None):
+        """
+        Remove and return the next `count` samples, waiting until they are available.
+        Returns an empty array if the timeout expires first; once the buffer is
+        closed, returns whatever is left (up to `count` samples)
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._size >= count or self._closed, timeout):
+                return self._buffer[:0].copy()
+            count = min(count, self._size)
+            
+            first = min(count, self.capacity - self._read_pos)
+            samples = np.concatenate((
+                self._buffer[self._read_pos:self._read_pos + first],
+                self._buffer[:count - first]
+            ))
+            self._read_pos = (self._read_pos + count) % self.capacity
+            self._size -= count
+            self.read_total += count
+            return samples
+    
+    def close(self):
+        """Stop accepting audio and wake up any waiting reader"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+    
+    def occupancy(self):
+        """Fraction of the buffer currently filled"""
+        with self._cond:
+            return self._size / self.capacity
+    
+    def stats(self, sample_rate):
+        """Buffer metrics, in seconds of audio"""
+        with self._cond:
+            return {
+                'capacity_seconds': self.capacity / sample_rate,
+                'buffered_seconds': self._size / sample_rate,
+                'occupancy': round(self._size / self.capacity, 3),
+                'peak_occupancy': round(self.peak_size / self.capacity, 3),
+                'captured_seconds': self.written / sample_rate,
+                'dropped_seconds': self.dropped / sample_rate,
+                'overflows': self.overflows
+            }
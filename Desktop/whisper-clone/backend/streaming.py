@@ -0,0 +1,141 @@
+"""
+Sliding-window streaming transcription
+Re-transcribes the current speech segment every step (e.g. 1 s) so words show
+up as interim hypotheses about a second after they are spoken, and finalizes
+the segment once its text has stopped changing
+"""
+
+import re
+
+import numpy as np
+
+
+def _normalize(word):
+    return re.sub(r"[^\w']", '', word.lower())
+
+
+def _common_prefix(first, second):
+    """Number of leading words two hypotheses agree on, ignoring case and punctuation"""
+    count = 0
+    for a, b in zip(first, second):
+        if _normalize(a) != _normalize(b):
+            break
+        count += 1
+    return count
+
+
+class StreamingTranscriber:
+    """
+    Turns a stream of audio steps into interim and final transcription events
+    
+    Each step is appended to the current segment and the whole segment (at most
+    `window` seconds) is transcribed again. A segment is finalized when
+    - its hypothesis was the same for `stable_windows` windows in a row and the
+      speaker paused, or
+    - it reached `window` seconds. Then the last `overlap` seconds of audio
+      start the next segment, so a word cut at the boundary is heard again in
+      full. Every word except the ones estimated to fall in that overlap is
+      finalized; words from the overlap that were finalized anyway are dropped
+      from the next segment's text
+    """
+    
+    def __init__(self, transcribe, sample_rate=16000, step=1.0, window=8.0, overlap=1.0,
+                 stable_windows=2, silence_rms=300):
+        """
+        transcribe: callable taking int16 samples and returning text
+        silence_rms: RMS level (int16 scale) below which a step counts as a pause
+        """
+        self.transcribe = transcribe
+        self.sample_rate = sample_rate
+        self.step_samples = int(step * sample_rate)
+        self.window_samples = int(window * sample_rate)
+        self.overlap_samples = int(overlap * sample_rate)
+        self.stable_windows = stable_windows
+        self.silence_rms = silence_rms
+        
+        self.segment = np.zeros(0, dtype=np.int16)
+        self.segment_id = 0
+        self.history = []
+        self.has_speech = False
+        self.emitted = False
+        self.carried_words = []
+        self.stats = {'windows': 0, 'finals': 0, 'forced_cuts': 0}
+    
+    def _is_quiet(self, samples):
+        if not len(samples):
+            return True
+        return np.sqrt(np.mean(samples.astype(np.float32) ** 2)) < self.silence_rms
+    
+    def _hypothesis(self):
+        self.stats['windows'] += 1
+        words = self.transcribe(self.segment).split()
+        
+        # Drop words the overlap repeats from the end of the previous segment
+        for count in range(min(len(self.carried_words), len(words)), 0, -1):
+            if _common_prefix(self.carried_words[-count:], words[:count]) == count:
+                return words[count:]
+        return words
+    
+    def feed(self, samples):
+        """Add captured audio; returns the events it produced"""
+        self.segment = np.concatenate((self.segment, samples))
+        quiet = self._is_quiet(samples)
+        
+        if quiet and not self.has_speech:
+            # Nothing said yet: keep only enough audio for a word starting right now
+            self.segment = self.segment[-self.overlap_samples:] if self.overlap_samples else self.segment[:0]
+            return []
+        self.has_speech = True
+        
+        words = self._hypothesis()
+        self.history = (self.history + [words])[-self.stable_windows:]
+        stable = min(_common_prefix(words, previous) for previous in self.history)
+        
+        if len(self.history) == self.stable_windows and stable == len(words) and quiet:
+            return self._finalize(words, keep=0)
+        
+        if len(self.segment) >= self.window_samples:
+            self.stats['forced_cuts'] += 1
+            # Hold back the words spoken during the overlap (estimated by their share of the
+            # audio, at least the last one); the next segment transcribes them again
+            held = 0
+            if words and self.overlap_samples:
+                held = max(1, len(words) * self.overlap_samples // len(self.segment))
+            return self._finalize(words[:len(words) - held], keep=self.overlap_samples)
+        
+        self.emitted = True
+        return [self._event(words, is_final=False, stable_text=' '.join(words[:stable]))]
+    
+    def flush(self):
+        """Finalize whatever is left at the end of the recording"""
+        if self.has_speech and len(self.segment):
+            return self._finalize(self._hypothesis(), keep=0)
+        if self.emitted:
+            return self._finalize([], keep=0)
+        return []
+    
+    def _finalize(self, words, keep):
+        events = []
+        if words or self.emitted:
+            # An empty final still tells the client to drop the segment's interim text
+            events.append(self._event(words, is_final=True))
+            self.stats['finals'] += 1
+        
+        self.carried_words = words if keep else []
+        self.segment = self.segment[-keep:] if keep else self.segment[:0]
+        self.segment_id += 1
+        self.history = []
+        # Carried-over audio is mid-speech, so it must not be trimmed as silence
+        self.has_speech = bool(keep)
+        self.emitted = False
+        return events
+    
+    def _event(self, words, is_final, stable_text=None):
+        event = {
+            'text': ' '.join(words),
+            'is_final': is_final,
+            'segment_id': self.segment_id
+        }
+        if stable_text is not None:
+            event['stable_text'] = stable_text
+        return event
@@ -0,0 +1,139 @@
+"""
+Persistent whisper.cpp model server
+Keeps one whisper.cpp server process (whisper-server) running with the model
+loaded, so each transcription is a local HTTP request instead of a new
+whisper-cli process that reloads the model from disk
+"""
+
+import io
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+
+import requests
+
+
+class WhisperModelServer:
+    """Manages a long-lived whisper-server process and sends audio to it"""
+    
+    def __init__(self, executable, model_path, host='127.0.0.1', port=None, startup_timeout=60, request_timeout=30):
+        self.executable = executable
+        self.model_path = model_path
+        self.host = host
+        self.port = port
+        self.startup_timeout = startup_timeout
+        self.request_timeout = request_timeout
+        self.log_path = os.path.join(tempfile.gettempdir(), 'whisper-server.log')
+        
+        self.process = None
+        self.session = requests.Session()
+        self._lock = threading.Lock()
+        self.stats = {'starts': 0, 'requests': 0, 'seconds': 0.0}
+    
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+    
+    def is_running(self):
+        """Check whether the server process is alive"""
+        return self.process is not None and self.process.poll() is None
+    
+    def start(self):
+        """Start the server and wait until the model is loaded"""
+        with self._lock:
+            if self.is_running():
+                return
+            
+            if self.port is None:
+                self.port = self._free_port()
+            
+            cmd = [
+                self.executable,
+                '-m', self.model_path,
+                '--host', self.host,
+                '--port', str(self.port),
+                '--no-timestamps'
+            ]
+            
+            # The server logs every request; keep it out of our output but on disk for debugging
+            with open(self.log_path, 'ab') as log_file:
+                self.process = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=log_file,
+                    stderr=subprocess.STDOUT
+                )
+            self.stats['starts'] += 1
+            
+            start = time.time()
+            while time.time() - start < self.startup_timeout:
+                if self.process.poll() is not None:
+                    break
+                if self._is_ready():
+                    print(f"🧠 Whisper model server ready on {self.url} ({time.time() - start:.1f}s)")
+                    return
+                time.sleep(0.2)
+            
+            self._terminate()
+            raise RuntimeError(f"whisper-server did not start, see {self.log_path}")
+    
+    def _is_ready(self):
+        try:
+            # Newer servers answer 503 on /health while the model loads; older ones
+            # only start listening once it is loaded and have no /health route
+            response = self.session.get(f"{self.url}/health", timeout=1)
+            return response.status_code != 503
+        except requests.exceptions.RequestException:
+            return False
+    
+    @staticmethod
+    def _free_port():
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+    
+    def transcribe(self, wav_data):
+        """Transcribe 16 kHz mono WAV audio given as bytes or a file path"""
+        if not self.is_running():
+            self.start()
+        
+        if isinstance(wav_data, (str, os.PathLike)):
+            with open(wav_data, 'rb') as f:
+                wav_data = f.read()
+        
+        start = time.time()
+        response = self.session.post(
+            f"{self.url}/inference",
+            files={'file': ('audio.wav', io.BytesIO(wav_data), 'audio/wav')},
+            data={'response_format': 'json', 'temperature': '0.0'},
+            timeout=self.request_timeout
+        )
+        response.raise_for_status()
+        
+        result = response.json()
+        if 'error' in result:
+            raise RuntimeError(f"whisper-server error: {result['error']}")
+        
+        self.stats['requests'] += 1
+        self.stats['seconds'] += time.time() - start
+        return result.get('text', '').strip()
+    
+    def stop(self):
+        """Stop the server process"""
+        with self._lock:
+            self._terminate()
+    
+    def _terminate(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
@@ -10,6 +10,7 @@ class WhisperCloneClient {
         this.socket = null;
         this.isRecording = false;
         this.transcriptData = [];
+        this.interimEntries = new Map();
         this.serverUrl = null;
         this.reconnectAttempts = 0;
         this.maxReconnectAttempts = 5;
@@ -142,11 +143,18 @@ class WhisperCloneClient {
         });
 
         this.socket.on('transcription', (data) => {
-            this.addTranscription(data.text, data.timestamp);
+            // Streaming sends interim text for a segment until it is final;
+            // events without is_final are final
+            if (data.is_final === false) {
+                this.showInterimTranscription(data.segment_id, data.text, data.timestamp);
+            } else {
+                this.addTranscription(data.text, data.timestamp, data.segment_id);
+            }
         });
 
         this.socket.on('transcription_status', (data) => {
             if (data.status === 'started') {
+                this.clearInterimTranscriptions();
                 this.isRecording = true;
                 this.updateRecordButton();
                 this.updateStatus('Recording...', 'recording');
@@ -229,18 +237,20 @@ class WhisperCloneClient {
         }
     }
 
-    addTranscription(text, timestamp) {
-        if (!text || !text.trim()) return;
+    addTranscription(text, timestamp, segmentId) {
+        const interimElement = this.interimEntries.get(segmentId);
+        this.interimEntries.delete(segmentId);
+
+        if (!text || !text.trim()) {
+            if (interimElement) interimElement.remove();
+            return;
+        }
 
         const cleanText = text.trim();
         const entry = { text: cleanText, timestamp };
         this.transcriptData.push(entry);
 
-        // Remove placeholder if it exists
-        const placeholder = this.transcript.querySelector('[style*="italic"]');
-        if (placeholder) {
-            placeholder.remove();
-        }
+        this.removePlaceholder();
 
         // Create transcript entry element
         const entryElement = document.createElement('div');
@@ -250,13 +260,51 @@ class WhisperCloneClient {
             <div>${this.escapeHtml(cleanText)}</div>
         `;
 
-        this.transcript.appendChild(entryElement);
+        // A final segment takes the place of its interim text
+        if (interimElement) {
+            interimElement.replaceWith(entryElement);
+        } else {
+            this.transcript.appendChild(entryElement);
+        }
         this.transcript.scrollTop = this.transcript.scrollHeight;
 
         // Update footer status
         this.updateFooterStatus();
     }
 
+    showInterimTranscription(segmentId, text, timestamp) {
+        let element = this.interimEntries.get(segmentId);
+        if (!element) {
+            if (!text || !text.trim()) return;
+
+            this.removePlaceholder();
+            element = document.createElement('div');
+            element.className = 'transcript-entry interim';
+            this.transcript.appendChild(element);
+            this.interimEntries.set(segmentId, element);
+        }
+
+        // Interim text is not added to transcriptData until it is final
+        element.innerHTML = `
+            <div class="transcript-timestamp">${new Date(timestamp).toLocaleTimeString()}</div>
+            <div>${this.escapeHtml(text.trim())}</div>
+        `;
+        this.transcript.scrollTop = this.transcript.scrollHeight;
+    }
+
+    clearInterimTranscriptions() {
+        this.interimEntries.forEach(element => element.remove());
+        this.interimEntries.clear();
+    }
+
+    removePlaceholder() {
+        // Remove placeholder if it exists
+        const placeholder = this.transcript.querySelector('[style*="italic"]');
+        if (placeholder) {
+            placeholder.remove();
+        }
+    }
+
     clearTranscript() {
         if (this.transcriptData.length === 0) {
             this.showError('No transcript to clear');
@@ -264,6 +312,7 @@ class WhisperCloneClient {
         }
 
         this.transcriptData = [];
+        this.interimEntries.clear();
         this.transcript.innerHTML = `
             <div style="color: #666; font-style: italic; text-align: center; margin-top: 50px;">
                 Click the microphone to start recording...